@@ -0,0 +1,197 @@
+"""
+ Grouped statistics and correlations over the numerical columns of the movies and their genres.
+
+ The movies are taken as columns (see IMDBFileProcessor.numerical_columns): an array of values and a presence mask per
+ property, and the genre bitmasks. The work is done a column at a time with the loops in C (itertools.compress,
+ operator.itemgetter, map and sum over the arrays) rather than movie by movie:
+  - aggregate gathers the values of each group with one itemgetter call per column, then counts, sums and sorts them
+    (for the quantiles).
+  - correlation_matrix computes the pearson correlation of each pair of columns from their sums (of the values, the
+    squares and the products) over the movies that have both. The genres are 0/1 columns computed from the distinct
+    genre bitmasks, which are few: the movies are sorted by bitmask, and the sums involving a genre are added up per
+    bitmask instead of per movie.
+"""
+
+import math
+import operator
+from array import array
+from collections import namedtuple, Counter
+from itertools import compress, groupby
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+# the statistics of a column in a group. quantiles: list of the values at the quantiles asked for (None when empty)
+ColumnSummary = namedtuple('ColumnSummary', ['count', 'total', 'mean', 'quantiles'])
+
+
+# returns the values of a sequence at the given positions, as a tuple (gathered in C)
+def gather(values, positions):
+    if len(positions) == 0:
+        return ()
+    if len(positions) == 1:
+        return values[positions[0]],
+    return operator.itemgetter(*positions)(values)
+
+
+# returns the bytes of two masks (of 0 and 1 bytes) and-ed. as big integers on python 3 (a single operation in C)
+def and_masks(mask_x, mask_y):
+    if hasattr(int, 'from_bytes'):
+        return (int.from_bytes(bytes(mask_x), 'little') & int.from_bytes(bytes(mask_y), 'little')).to_bytes(
+            len(mask_x), 'little')
+    return bytearray(map(operator.and_, mask_x, mask_y))
+
+
+# returns the value at quantile q (0 to 1) of sorted values, interpolated linearly between the closest ranks
+def quantile(sorted_values, q):
+    if len(sorted_values) == 0:
+        return None
+    rank = q * (len(sorted_values) - 1)
+    low = int(math.floor(rank))
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+# returns ColumnSummary of the values (the present ones) of a group
+def summarize(values, quantiles=()):
+    count = len(values)
+    total = math.fsum(values)
+    sorted_values = sorted(values) if len(quantiles) > 0 else values
+    return ColumnSummary(count, total, total / count if count > 0 else None,
+                         [quantile(sorted_values, q) for q in quantiles])
+
+
+# returns dict: {group: {key: ColumnSummary}} of the columns in each group.
+#   columns: {key: (values, mask)} with the mask 1 where the value is present
+#   group_positions: {group: list of the positions of its movies}
+def aggregate(columns, group_positions, quantiles=()):
+    results = {}
+    for group, positions in group_positions.items():
+        group_results = results[group] = {}
+        for key, (values, mask) in columns.items():
+            present = list(compress(gather(values, positions), gather(mask, positions)))
+            group_results[key] = summarize(present, quantiles)
+    return results
+
+
+# returns dict: {group: list of positions} of the movies in each group (tuple of values).
+# the codes of the keys are combined into one code per movie, and the positions sorted by code (in C) are split at
+# each change of code.
+#   key_codes: list of tuple: [(codes, values), ...] for each key: the code of each movie's value (-1 when missing) and
+#       the value of each code
+#   genre_subsets: list of tuple: [(genre, sorted positions of its movies), ...] (see genre_positions) to also group by
+#       genre (a movie is in the group of each of its genres), at genre_index in the group tuples. None not to
+def group_positions(count, key_codes, genre_subsets=None, genre_index=0):
+    codes = key_codes[0][0] if len(key_codes) > 0 else [0] * count
+    for value_codes, values in key_codes[1:]:
+        cardinality = len(values)
+        codes = [code * cardinality + value_code if code >= 0 and value_code >= 0 else -1
+                 for code, value_code in zip(codes, value_codes)]
+    subsets = genre_subsets if genre_subsets is not None else [(None, range(count))]
+    groups = {}
+    for genre, positions in subsets:
+        for code, run in groupby(sorted(positions, key=codes.__getitem__), key=codes.__getitem__):
+            if code < 0:
+                continue
+            group = []
+            for _, values in reversed(key_codes):
+                group.append(values[code % len(values)])
+                code //= len(values)
+            group.reverse()
+            if genre is not None:
+                group.insert(genre_index, genre)
+            groups[tuple(group)] = list(run)
+    return groups
+
+
+# returns dict: {bit: sorted list of the positions of the movies with the genre bit} for the given bits.
+# the positions are sorted by bitmask (in C), and each run of the same bitmask is added to the lists of its bits
+def genre_positions(genre_masks, bits):
+    positions = dict((bit, []) for bit in bits)
+    order = sorted(range(len(genre_masks)), key=genre_masks.__getitem__)
+    for genre_mask, run in groupby(order, key=genre_masks.__getitem__):
+        run = list(run)
+        for bit in bits:
+            if genre_mask >> bit & 1:
+                positions[bit].extend(run)
+    for bit_positions in positions.values():
+        bit_positions.sort()
+    return positions
+
+
+# returns the pearson correlation from the sums over n pairs (x, y), or nan when a column is constant or n < 2
+def pearson(n, sum_x, sum_y, sum_xx, sum_yy, sum_xy):
+    if n < 2:
+        return float('nan')
+    covariance = sum_xy - sum_x * sum_y / n
+    variance_x = sum_xx - sum_x * sum_x / n
+    variance_y = sum_yy - sum_y * sum_y / n
+    if variance_x <= 0 or variance_y <= 0:
+        return float('nan')
+    return max(-1.0, min(1.0, covariance / math.sqrt(variance_x * variance_y)))
+
+
+# returns list of rows (array of floats) of the correlation matrix of the numerical columns and the genres, in the order
+# of the numerical keys then the genres. each pair is correlated over the movies that have both values (the genres are
+# always present: 1 when the movie has the genre, else 0). nan when a column is constant.
+# the numerical values are centered on their mean first, so the sums of their products lose little precision
+#   columns: {key: (values, mask)} of the numerical_keys. genre_masks: the genre bitmask of each movie.
+#   genre_bits: list of tuple: [(genre, bit), ...] of the genre columns
+def correlation_matrix(columns, numerical_keys, genre_masks, genre_bits):
+    count = len(genre_masks)
+    size = len(numerical_keys) + len(genre_bits)
+    matrix = [array('d', [float('nan')]) * size for _ in range(size)]
+    centered = {}
+    for key in numerical_keys:
+        values, mask = columns[key]
+        present = list(compress(values, mask))
+        mean = math.fsum(present) / len(present) if len(present) > 0 else 0.0
+        centered[key] = ([value - mean for value in values], mask)
+
+    # numerical x numerical: over the movies with both values
+    for i, key_x in enumerate(numerical_keys):
+        values_x, mask_x = centered[key_x]
+        for j in range(i, len(numerical_keys)):
+            values_y, mask_y = centered[numerical_keys[j]]
+            both = and_masks(mask_x, mask_y) if i != j else mask_x
+            xs = list(compress(values_x, both))
+            ys = list(compress(values_y, both)) if i != j else xs
+            matrix[i][j] = matrix[j][i] = pearson(len(xs), sum(xs), sum(ys), sum(map(operator.mul, xs, xs)),
+                                                  sum(map(operator.mul, ys, ys)), sum(map(operator.mul, xs, ys)))
+
+    # genre x genre: from the number of movies of each bitmask
+    mask_counts = Counter(genre_masks)
+    genre_counts = [sum(mask_count for genre_mask, mask_count in mask_counts.items() if genre_mask >> bit & 1)
+                    for _, bit in genre_bits]
+    offset = len(numerical_keys)
+    for i, (_, bit_x) in enumerate(genre_bits):
+        for j in range(i, len(genre_bits)):
+            bit_y = genre_bits[j][1]
+            both_count = sum(mask_count for genre_mask, mask_count in mask_counts.items()
+                             if genre_mask >> bit_x & 1 and genre_mask >> bit_y & 1)
+            matrix[offset + i][offset + j] = matrix[offset + j][offset + i] = pearson(
+                count, genre_counts[i], genre_counts[j], genre_counts[i], genre_counts[j], both_count)
+
+    # numerical x genre: the sums of the values are added up per bitmask
+    for i, key in enumerate(numerical_keys):
+        values, mask = centered[key]
+        key_values = list(compress(values, mask))
+        key_masks = list(compress(genre_masks, mask))
+        mask_sums = {}  # bitmask -> sum of the values of its movies
+        key_mask_counts = {}  # bitmask -> number of its movies
+        order = sorted(range(len(key_masks)), key=key_masks.__getitem__)
+        for genre_mask, run in groupby(order, key=key_masks.__getitem__):
+            run = list(run)
+            mask_sums[genre_mask] = sum(gather(key_values, run))
+            key_mask_counts[genre_mask] = len(run)
+        n = len(key_values)
+        sum_x = sum(key_values)
+        sum_xx = sum(map(operator.mul, key_values, key_values))
+        for j, (_, bit) in enumerate(genre_bits):
+            genre_count = sum(mask_count for genre_mask, mask_count in key_mask_counts.items() if genre_mask >> bit & 1)
+            sum_xy = sum(mask_sum for genre_mask, mask_sum in mask_sums.items() if genre_mask >> bit & 1)
+            matrix[i][offset + j] = matrix[offset + j][i] = pearson(n, sum_x, genre_count, sum_xx, genre_count, sum_xy)
+    return matrix
@@ -0,0 +1,802 @@
+#!/usr/bin/env python
+
+"""
+Benchmarks for IMDBFileProcessor.
+Data files should be downloaded from http://www.imdb.com/interfaces
+and extracted to the data_path.
+
+usage: python Benchmark.py data_path [benchmark_name ...]
+(runs all the benchmarks when no name is given; requires python 3.4+ for tracemalloc)
+
+data_path can also be synthetic:titles (e.g. synthetic:1000000) to run on files written by SyntheticData
+to a temporary directory, so the results can be reproduced and tracked without the real data files.
+"""
+
+import gzip
+import io
+import locale
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from CurrencyEstimator import CurrencyEstimator
+from IMDBFileProcessor import IMDBFileProcessor, encode_vote_distribution, open_imdb
+from NumberParser import duration_formats, parse_duration
+from SyntheticData import SyntheticData
+from TextIndex import tokenize
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+
+def print_result(name, value, unit):
+    print("  {:<40} {:>14,.1f} {}".format(name, value, unit))
+
+
+# loads all the properties and returns tuple: (processor, seconds, MB allocated and still held by the processor)
+def load_measured(data_path, compact_store):
+    tracemalloc.start()
+    start_time = time.time()
+    processor = IMDBFileProcessor(data_path, compact_store=compact_store)
+    processor.enable_print_progress = False
+    processor.load(workers=1)
+    seconds = time.time() - start_time
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return processor, seconds, current / 1024.0 / 1024.0
+
+
+# memory held by self.movies: dict of dicts vs the columnar MovieStore
+def benchmark_store_memory(data_path):
+    print("\nstore_memory: memory of the loaded movies")
+    for compact_store in [False, True]:
+        processor, seconds, megabytes = load_measured(data_path, compact_store)
+        name = "MovieStore" if compact_store else "dict of dicts"
+        print_result(name + " (" + str(len(processor.movies)) + " titles)", megabytes, "MB")
+        print_result(name + " load time", seconds, "s")
+        del processor
+
+
+# parsing the list files vs loading a saved snapshot
+def benchmark_snapshot(data_path):
+    print("\nsnapshot: parse vs snapshot load")
+    snapshot = os.path.join(tempfile.mkdtemp(), "imdb.snapshot")
+    for compact_store in [False, True]:
+        name = "MovieStore" if compact_store else "dict of dicts"
+        processor = IMDBFileProcessor(data_path, compact_store=compact_store)
+        processor.enable_print_progress = False
+        start_time = time.time()
+        processor.load(snapshot=snapshot)
+        print_result(name + " parse + save", time.time() - start_time, "s")
+        print_result(name + " snapshot size", os.path.getsize(snapshot) / 1024.0 / 1024.0, "MB")
+        processor = IMDBFileProcessor(data_path, compact_store=compact_store)
+        processor.enable_print_progress = False
+        start_time = time.time()
+        processor.load(snapshot=snapshot)
+        print_result(name + " snapshot load", time.time() - start_time, "s")
+        os.remove(snapshot)
+    os.rmdir(os.path.dirname(snapshot))
+
+
+# title search latency: indexed get_movies_startwith / find_movies_contain vs scanning all the titles
+def benchmark_title_search(data_path, query_count=200):
+    print("\ntitle_search: latency per query")
+    processor = IMDBFileProcessor(data_path)
+    processor.enable_print_progress = False
+    processor.enable_series = True
+    processor.read_movies()
+    titles = list(processor.movies)
+    movies = processor.movies
+    if len(titles) == 0:
+        return
+    rand = random.Random(0)
+    samples = [rand.choice(titles) for _ in range(query_count)]
+    prefixes = [title[:len(title) // 2] for title in samples]
+    phrases = [title[len(title) // 3:len(title) // 3 + 5] for title in samples]
+
+    start_time = time.time()
+    processor.get_title_index()
+    print_result("prefix index build (" + str(len(titles)) + " titles)", time.time() - start_time, "s")
+    start_time = time.time()
+    processor.find_movies_contain("bench")
+    print_result("trigram index build", time.time() - start_time, "s")
+
+    for name, queries, search, scan in [
+            ("prefix", prefixes, processor.get_movies_startwith,
+             lambda phrase: [(k, v) for k, v in movies.items() if k.lower().startswith(phrase.lower())]),
+            ("substring", phrases, processor.find_movies_contain,
+             lambda phrase: [(k, v) for k, v in movies.items() if k.lower().find(phrase.lower()) != -1])]:
+        for label, run in [("scan", scan), ("index", search), ("index, limit 20", lambda q: search(q, limit=20))]:
+            start_time = time.time()
+            for query in queries:
+                run(query)
+            print_result(name + " " + label, (time.time() - start_time) * 1000.0 / len(queries), "ms")
+
+
+# export throughput: one save_tables pass for several tables vs a save_to_table call per table
+def benchmark_export(data_path):
+    print("\nexport: rows written per second")
+    processor = IMDBFileProcessor(data_path)
+    processor.enable_print_progress = False
+    processor.load()
+    output_directory = tempfile.mkdtemp()
+    properties = [key for key in IMDBFileProcessor.all_keys
+                  if key not in [IMDBFileProcessor.key_director, IMDBFileProcessor.key_mpaa_reason]]
+    tables = [{'filename': os.path.join(output_directory, "all.txt")},
+              {'filename': os.path.join(output_directory, "no_adult.txt"), 'save_properties': properties,
+               'ignore_movie_genres': ['Adult']},
+              {'filename': os.path.join(output_directory, "complete.txt"), 'ignore_when_missing': True,
+               'save_properties': [IMDBFileProcessor.key_year, IMDBFileProcessor.key_rating]}]
+    tables += [{'filename': os.path.join(output_directory, genre + ".txt"), 'save_properties': properties,
+                'only_movie_genres': [genre]} for genre in processor.genre_names[:9]]
+
+    def rows_written():
+        return sum(sum(1 for _ in open(table['filename'])) - 1 for table in tables)
+
+    start_time = time.time()
+    for table in tables:
+        processor.save_to_table(**table)
+    seconds = time.time() - start_time
+    print_result("save_to_table x " + str(len(tables)), rows_written() / seconds, "rows/s")
+    start_time = time.time()
+    processor.save_tables(tables)
+    seconds = time.time() - start_time
+    print_result("save_tables (" + str(len(tables)) + " tables)", rows_written() / seconds, "rows/s")
+    for table in tables:
+        os.remove(table['filename'])
+    os.rmdir(output_directory)
+
+
+# select latency: column indexed query vs filtering every movie in python
+def benchmark_select(data_path, query_count=50):
+    print("\nselect: latency per query")
+    processor = IMDBFileProcessor(data_path)
+    processor.enable_print_progress = False
+    processor.load()
+    start_time = time.time()
+    processor.select({IMDBFileProcessor.key_year: (2000, 2000), IMDBFileProcessor.key_rating: (9, None),
+                      IMDBFileProcessor.key_votes: (100000, None)})
+    print_result("index build (" + str(len(processor.movies)) + " titles)", time.time() - start_time, "s")
+
+    rand = random.Random(0)
+    queries = [(year, rand.choice([6.5, 7.5, 8.5])) for year in [rand.randint(1950, 2016) for _ in range(query_count)]]
+
+    def scan(year, min_rating):
+        results = []
+        for title, movie in processor.movies.items():
+            try:
+                if movie.get(IMDBFileProcessor.key_year) == year and \
+                        float(movie.get(IMDBFileProcessor.key_rating)) >= min_rating:
+                    results.append((title, movie))
+            except (TypeError, ValueError):
+                pass
+        return results
+
+    for name, run in [("scan", scan),
+                      ("select", lambda year, min_rating: processor.select({
+                          IMDBFileProcessor.key_year: (year, year), IMDBFileProcessor.key_rating: (min_rating, None)}))]:
+        start_time = time.time()
+        for year, min_rating in queries:
+            run(year, min_rating)
+        print_result(name + " (year = y and rating >= r)", (time.time() - start_time) * 1000.0 / len(queries), "ms")
+
+
+# vote distribution stats: the typed byte matrix vs parsing the vote codes of each movie
+def benchmark_vote_stats(data_path):
+    print("\nvote_stats: vote distributions summarized per second")
+    processor = IMDBFileProcessor(data_path, compact_store=True)
+    processor.enable_print_progress = False
+    processor.load(properties=[IMDBFileProcessor.key_vote_distribution])
+    titles, matrix = processor.vote_matrix()
+    if len(titles) == 0:
+        return
+    codes = [encode_vote_distribution(matrix[index * 10:index * 10 + 10]) for index in range(len(titles))]
+    percents = dict([('.', 0), ('*', 100)] + [(str(digit), digit * 10 + 5) for digit in range(10)])
+
+    def parse_codes():
+        for code in codes:
+            weights = [percents[char] for char in code]
+            total = float(sum(weights))
+            if total > 0:
+                mean = sum(weight * rating for rating, weight in enumerate(weights, 1)) / total
+                sum(weight * (rating - mean) ** 2 for rating, weight in enumerate(weights, 1)) / total
+
+    for name, run in [("parse codes (" + str(len(titles)) + " titles)", parse_codes),
+                      ("vote_distribution_stats", processor.vote_distribution_stats)]:
+        start_time = time.time()
+        run()
+        print_result(name, len(titles) / (time.time() - start_time), "movies/s")
+
+
+# running time parsing: NumberParser.parse_duration vs the former cascade of locale.atof attempts
+def benchmark_number_parsing(data_path):
+    print("\nnumber_parsing: running times parsed per second")
+    texts = []
+    with io.open(os.path.join(data_path, "running-times.list"), encoding="ISO-8859-1") as f:
+        for line in f:
+            tokens = re.split("\t+", line.strip())
+            if len(tokens) >= 2:
+                texts.append(tokens[1])
+    if len(texts) == 0:
+        return
+    try:
+        locale.setlocale(locale.LC_ALL, 'en_US.UTF-8')
+        atof = locale.atof
+    except locale.Error:
+        print("  (en_US.UTF-8 locale not available: the cascade uses float() instead of locale.atof)")
+        atof = lambda text: float(text.replace(",", ""))
+
+    def cascade(text):
+        try:
+            return atof(text)
+        except:
+            try:
+                return atof(text[text.find(":") + 1:])
+            except:
+                try:
+                    return atof(text.split(":")[1]) + atof(text.split(":")[2]) / 60.0
+                except:
+                    try:
+                        return atof(re.split("\s+", re.sub("(\D)", " ", text).strip())[0])
+                    except:
+                        return -1
+
+    for name, parse in [("locale.atof cascade (" + str(len(texts)) + " records)", cascade),
+                        ("parse_duration", parse_duration)]:
+        start_time = time.time()
+        for text in texts:
+            parse(text)
+        print_result(name, len(texts) / (time.time() - start_time), "records/s")
+    format_count = {}
+    for text in texts:
+        length_format = parse_duration(text)[1]
+        format_count[length_format] = format_count.get(length_format, 0) + 1
+    for length_format in duration_formats:
+        print_result("format " + length_format, format_count.get(length_format, 0), "records")
+
+
+# parsing throughput of each reader: decoded text lines vs the binary readers (enable_binary_lines)
+def benchmark_binary_lines(data_path):
+    print("\nbinary_lines: list file bytes parsed per second")
+    processor = IMDBFileProcessor(data_path)
+    processor.enable_print_progress = False
+    # read_movies adds the titles the other readers look up: each of its runs starts from no movies
+    for reader in IMDBFileProcessor.readers:
+        filename = getattr(processor, IMDBFileProcessor.reader_files[reader])
+        if not os.path.isfile(filename):
+            continue
+        size = os.path.getsize(filename)
+        for enable_binary_lines in [False, True]:
+            processor.enable_binary_lines = enable_binary_lines
+            seconds = None
+            for _ in range(3):  # the best of 3 runs
+                if reader == 'read_movies':
+                    processor.movies = {}
+                    processor.encoded_titles = None
+                start_time = time.time()
+                getattr(processor, reader)()
+                seconds = min(seconds or float('inf'), time.time() - start_time)
+            name = reader + (" (binary)" if enable_binary_lines else " (text)")
+            print_result(name, size / 1024.0 / 1024.0 / seconds, "MB/s")
+
+
+# reading the .list.gz dumps: the uncompressed files vs decompressing in the parser thread vs the pipelined
+# GzipBlockReader, then a whole load() from the uncompressed and the compressed files
+def benchmark_gzip(data_path):
+    print("\ngzip: list file lines read per second")
+    gzip_path = tempfile.mkdtemp() + os.sep
+    names = ["movies.list", "genres.list", "ratings.list", "business.list", "directors.list", "running-times.list",
+             "countries.list", "language.list", "mpaa-ratings-reasons.list"]
+    names = [name for name in names if os.path.isfile(os.path.join(data_path, name))]
+    if len(names) == 0:
+        return
+    for name in names:
+        with io.open(os.path.join(data_path, name), 'rb') as source:
+            with gzip.open(gzip_path + name + ".gz", 'wb') as target:
+                shutil.copyfileobj(source, target)
+
+    def read_lines(open_lines, suffix):
+        count = 0
+        for name in names:
+            with open_lines(os.path.join(gzip_path if suffix else data_path, name + suffix)) as f:
+                for _ in f:
+                    count += 1
+        return count
+
+    for label, open_lines, suffix in [
+            ("uncompressed", lambda filename: io.open(filename, encoding="ISO-8859-1"), ""),
+            (".gz in the parser thread", lambda filename: io.TextIOWrapper(gzip.open(filename), encoding="ISO-8859-1"),
+             ".gz"),
+            (".gz pipelined", open_imdb, ".gz")]:
+        start_time = time.time()
+        count = read_lines(open_lines, suffix)
+        print_result(label + " (" + str(count) + " lines)", count / (time.time() - start_time), "lines/s")
+
+    for label, path in [("load() uncompressed", data_path), ("load() .gz pipelined", gzip_path)]:
+        processor = IMDBFileProcessor(path)
+        processor.enable_print_progress = False
+        start_time = time.time()
+        processor.load(workers=1)
+        print_result(label, time.time() - start_time, "s")
+    for name in names:
+        os.remove(gzip_path + name + ".gz")
+    os.rmdir(gzip_path)
+
+
+# throughput and peak memory of each reader and of save_to_table. the throughput is measured on a run without
+# tracemalloc (which slows down the allocations) and the peak memory on a second, traced run
+def benchmark_ingest(data_path):
+    print("\ningest: throughput and peak memory of each step")
+
+    # returns the peak MB allocated while running a step
+    def traced(processor, run):
+        tracemalloc.start()
+        start, _ = tracemalloc.get_traced_memory()
+        run(processor)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return (peak - start) / 1024.0 / 1024.0
+
+    output_directory = tempfile.mkdtemp()
+    output_filename = os.path.join(output_directory, "movies.txt")
+    steps = [(reader, getattr(IMDBFileProcessor, reader)) for reader in IMDBFileProcessor.readers]
+    steps.append(("save_to_table", lambda processor: processor.save_to_table(output_filename)))
+    processors = []
+    for _ in range(2):  # one processor for the timed runs and one for the traced runs
+        processor = IMDBFileProcessor(data_path)
+        processor.enable_print_progress = False
+        processors.append(processor)
+    for name, run in steps:
+        if name == "save_to_table":
+            units = sum(1 for _ in processors[0].movies.items())
+            unit = "rows"
+        else:
+            filename = getattr(processors[0], IMDBFileProcessor.reader_files[name])
+            if not os.path.isfile(filename):
+                continue
+            units = os.path.getsize(filename) / 1024.0 / 1024.0
+            unit = "MB"
+        start_time = time.time()
+        run(processors[0])
+        seconds = time.time() - start_time
+        megabytes = traced(processors[1], run)
+        print_result(name, units / seconds, unit + "/s")
+        print_result(name + " peak memory", megabytes, "MB")
+    os.remove(output_filename)
+    os.rmdir(output_directory)
+
+
+# memory of the director info after reading directors.list: a list of name strings per movie (the former storage,
+# where each record kept its own copy of the name) vs the arrays of director ids with the names in director_pool
+def benchmark_director_memory(data_path):
+    print("\ndirector_memory: memory held by the director info")
+    processor = IMDBFileProcessor(data_path)
+    processor.enable_print_progress = False
+    processor.read_movies()
+    title_resolver = processor.get_title_resolver()
+
+    def name_lists():
+        lists = {}
+        for entry in processor.iter_directors():
+            title = title_resolver.resolve(entry.title)
+            if title is not None:
+                lists[title] = lists.get(title, []) + [entry.director]
+        return lists
+
+    for name, run in [("name lists", name_lists), ("director ids + pool", lambda: processor.read_director())]:
+        tracemalloc.start()
+        start_time = time.time()
+        result = run()
+        seconds = time.time() - start_time
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print_result(name, current / 1024.0 / 1024.0, "MB")
+        print_result(name + " read time", seconds, "s")
+        del result
+    print_result("distinct directors", len(processor.director_pool), "names")
+
+
+# the cast graph: actors.list and actresses.list read into CSR arrays vs a list of names per movie (memory and read
+# time), and the latency of the neighbour and co-star queries
+def benchmark_cast(data_path, query_count=200):
+    print("\ncast: memory and queries of the cast graph")
+    processor = IMDBFileProcessor(data_path)
+    processor.enable_print_progress = False
+    processor.enable_binary_lines = True
+    processor.read_movies()
+    title_resolver = processor.get_title_resolver()
+    # (the title lookups shared by the readers are built before the memory is traced)
+    processor.get_title_resolver(encoded=True)
+    processor.get_title_ids()
+
+    def name_lists():
+        lists = {}
+        for entries in [processor.iter_actors(), processor.iter_actresses()]:
+            for entry in entries:
+                title = title_resolver.resolve(entry.title)
+                if title is not None and title in processor.movies:
+                    lists.setdefault(title, []).append(entry.person)
+        return lists
+
+    def cast_graph():
+        processor.read_actors()
+        processor.read_actresses()
+        return processor.get_cast_graph()
+
+    for name, run in [("name lists", name_lists), ("cast graph", cast_graph)]:
+        tracemalloc.start()
+        start_time = time.time()
+        result = run()
+        seconds = time.time() - start_time
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print_result(name, current / 1024.0 / 1024.0, "MB")
+        print_result(name + " read time", seconds, "s")
+        del result
+    processor.clear_indexes()
+    start_time = time.time()
+    cast_graph = processor.get_cast_graph()
+    print_result("title side build time", time.time() - start_time, "s")
+    for array_name, size in cast_graph.memory_usage():
+        print_result("  " + array_name, size / 1024.0 / 1024.0, "MB")
+    print_result("persons", len(cast_graph), "persons")
+    print_result("credits", cast_graph.credit_count(), "credits")
+    if len(cast_graph) == 0:
+        return
+    rand = random.Random(0)
+    persons = [rand.randrange(len(cast_graph)) for _ in range(query_count)]
+    for name, run in [("titles_of", lambda person_id: cast_graph.titles_of(person_id)),
+                      ("persons_of (cast of its titles)",
+                       lambda person_id: [cast_graph.persons_of(title_id) for title_id in cast_graph.titles_of(person_id)]),
+                      ("co_stars", lambda person_id: cast_graph.co_stars(person_id).most_common(10)),
+                      ("person_id (by name)", lambda person_id: cast_graph.person_id(cast_graph.person_name(person_id)))]:
+        start_time = time.time()
+        for person_id in persons:
+            run(person_id)
+        print_result(name, (time.time() - start_time) / query_count * 1000000.0, "us/query")
+
+
+# resolving the title fields of directors.list: the former regex match of the year and markers vs TitleResolver
+def benchmark_title_resolution(data_path):
+    print("\ntitle_resolution: directors.list title fields resolved per second")
+    processor = IMDBFileProcessor(data_path)
+    processor.enable_print_progress = False
+    processor.enable_series = True
+    processor.read_movies()
+    movies = processor.movies
+    fields = [entry.title for entry in processor.iter_directors()]
+    if len(fields) == 0:
+        return
+    regex_movie_year = re.compile(r"\((\d\d\d\d|\?\?\?\?)[^\)]*\)\s*(\(V\)|\(TV\)|\(VG\))*")
+
+    def regex_resolve(field):
+        if field in movies:
+            return field
+        title_match = regex_movie_year.search(field)
+        if title_match is not None and field[:title_match.end()].strip() in movies:
+            return field[:title_match.end()].strip()
+        return None
+
+    title_resolver = processor.get_title_resolver()
+    for name, resolve in [("regex (" + str(len(fields)) + " fields)", regex_resolve),
+                          ("TitleResolver", title_resolver.resolve)]:
+        start_time = time.time()
+        found = sum(1 for field in fields if resolve(field) is not None)
+        print_result(name, len(fields) / (time.time() - start_time), "fields/s")
+        print_result(name + " found", found, "fields")
+    for variant, count in sorted(title_resolver.variant_count.items()):
+        print_result("resolved " + variant, count, "fields")
+
+
+# converting the business amounts: one exchange per amount vs one exchange_many batch, and re-converting the kept
+# amounts (convert_business) vs reading business.list again
+def benchmark_currency(data_path):
+    print("\ncurrency: business amounts converted per second")
+    processor = IMDBFileProcessor(data_path)
+    processor.enable_print_progress = False
+    processor.read_movies()
+    processor.read_business()
+    business_amounts = processor.business_amounts
+    if len(business_amounts.amounts) == 0:
+        return
+    currencies = business_amounts.currency_pool.lookup(business_amounts.currencies)
+    dates = [date or None for date in business_amounts.dates]
+    for name, run in [("exchange (" + str(len(currencies)) + " amounts)",
+                       lambda: [CurrencyEstimator.exchange(amount, currency, date=date)
+                                for amount, currency, date in zip(business_amounts.amounts, currencies, dates)]),
+                      ("exchange_many", lambda: CurrencyEstimator.exchange_many(business_amounts.amounts, currencies,
+                                                                                dates))]:
+        start_time = time.time()
+        run()
+        print_result(name, len(currencies) / (time.time() - start_time), "amounts/s")
+    for name, run in [("read_business", processor.read_business), ("convert_business", processor.convert_business)]:
+        start_time = time.time()
+        run()
+        print_result(name, time.time() - start_time, "s")
+
+
+# grouped statistics and the correlation matrix of the table columns: the column passes of Aggregation vs a loop over
+# the movies
+def benchmark_aggregate(data_path):
+    print("\naggregate: grouped statistics and correlations")
+    for compact_store in [False, True]:
+        processor = IMDBFileProcessor(data_path, compact_store=compact_store)
+        processor.enable_print_progress = False
+        processor.load(workers=1)
+        store = ", compact" if compact_store else ", dict"
+        key_rating = IMDBFileProcessor.key_rating
+
+        start_time = time.time()
+        groups = {}
+        for movie in processor.movies.values():
+            rating = movie.get(key_rating)
+            if rating is not None and movie.get(IMDBFileProcessor.key_year, -1) != -1:
+                for genre in processor.get_genres(movie):
+                    groups.setdefault((genre, movie[IMDBFileProcessor.key_year]), []).append(rating)
+        for values in groups.values():
+            sorted(values)
+        print_result("loop rating by genre, year" + store, time.time() - start_time, "s")
+        start_time = time.time()
+        groups = processor.aggregate([key_rating], by=[IMDBFileProcessor.key_genre, IMDBFileProcessor.key_year],
+                                     quantiles=[0.5])
+        print_result("aggregate rating by genre, year" + store, time.time() - start_time, "s")
+        start_time = time.time()
+        processor.aggregate([IMDBFileProcessor.key_revenue], by=[IMDBFileProcessor.key_country])
+        print_result("aggregate revenue by country" + store, time.time() - start_time, "s")
+        start_time = time.time()
+        keys, _ = processor.correlation_matrix()
+        print_result("correlations " + str(len(keys)) + "x" + str(len(keys)) + store, time.time() - start_time, "s")
+    print_result("movies", len(processor.movies), "titles")
+    print_result("groups (genre, year)", len(groups), "groups")
+
+
+# the full-text index of keywords.list and plot.list: its build time and size, and the latency of the keyword, plot
+# word, and/or and filtered queries vs a scan of plot.list
+def benchmark_text_index(data_path, query_count=200):
+    print("\ntext_index: build time and query latency of the keyword and plot index")
+    processor = IMDBFileProcessor(data_path, compact_store=True)
+    processor.enable_print_progress = False
+    processor.enable_binary_lines = True
+    processor.load([IMDBFileProcessor.key_genre, IMDBFileProcessor.key_year], workers=1)
+    filename = os.path.join(tempfile.mkdtemp(), "imdb.textindex")
+    try:
+        start_time = time.time()
+        processor.build_text_index(filename)
+        print_result("build", time.time() - start_time, "s")
+        text_index = processor.text_index
+        list_size = sum(os.path.getsize(list_filename) for list_filename in
+                        [processor.keywords_filename, processor.plot_filename] if os.path.isfile(list_filename))
+        print_result("index size", text_index.size() / 1024.0 / 1024.0, "MB")
+        print_result("list files size", list_size / 1024.0 / 1024.0, "MB")
+        for field in text_index.fields:
+            print_result(field + " terms", len(text_index.terms[field]), "terms")
+        if len(text_index.terms[processor.text_keyword]) == 0 or len(text_index.terms[processor.text_plot]) == 0:
+            return
+        rand = random.Random(0)
+
+        def random_terms(field, count):
+            terms = text_index.terms[field]
+            return [terms[rand.randrange(len(terms))] for _ in range(count)]
+
+        queries = [
+            ("keyword", lambda: dict(keywords=random_terms(processor.text_keyword, 1))),
+            ("keyword and plot word", lambda: dict(keywords=random_terms(processor.text_keyword, 1),
+                                                   words=random_terms(processor.text_plot, 1))),
+            ("2 plot words", lambda: dict(words=random_terms(processor.text_plot, 2))),
+            ("any of 3 keywords", lambda: dict(any_keywords=random_terms(processor.text_keyword, 3))),
+            ("plot word, genre and years", lambda: dict(words=random_terms(processor.text_plot, 1), genres=['Drama'],
+                                                        ranges={IMDBFileProcessor.key_year: (1990, 2010)}))]
+        for name, make_query in queries:
+            query_args = [make_query() for _ in range(query_count)]
+            start_time = time.time()
+            result_count = sum(len(processor.search_text(**args)) for args in query_args)
+            seconds = time.time() - start_time
+            print_result(name, seconds / query_count * 1000.0, "ms/query")
+            print_result(name + " results", result_count / float(query_count), "titles/query")
+        word = random_terms(processor.text_plot, 1)[0]
+        start_time = time.time()
+        [entry.title for entry in processor.iter_plots() if word in tokenize(entry.plot)]
+        print_result("scan of plot.list (1 word)", (time.time() - start_time) * 1000.0, "ms/query")
+    finally:
+        if processor.text_index is not None:
+            processor.text_index.close()
+        shutil.rmtree(os.path.dirname(filename))
+
+
+# the byte offset index of the list files: its build time and size, and the latency of a single title lookup vs a scan
+# of business.list and mpaa-ratings-reasons.list for the title
+def benchmark_offset_index(data_path, lookup_count=200):
+    print("\noffset_index: build time of the byte offset index and single title lookups")
+    processor = IMDBFileProcessor(data_path, compact_store=True)
+    processor.enable_print_progress = False
+    processor.load([], workers=1)
+    filename = os.path.join(tempfile.mkdtemp(), "imdb.offsets")
+    try:
+        start_time = time.time()
+        processor.build_offset_index(filename)
+        print_result("build", time.time() - start_time, "s")
+        offset_index = processor.offset_index
+        list_size = sum(os.path.getsize(getattr(processor, filename_attr))
+                        for _, filename_attr, _, _ in processor.offset_files
+                        if os.path.isfile(getattr(processor, filename_attr)))
+        print_result("index size", offset_index.size() / 1024.0 / 1024.0, "MB")
+        print_result("list files size", list_size / 1024.0 / 1024.0, "MB")
+        record_count = sum(offset_index.header['record_counts'].values())
+        print_result("records", record_count, "ranges")
+        print_result("index size per record", offset_index.size() / float(max(record_count, 1)), "bytes")
+        if len(processor.movies) == 0:
+            return
+        rand = random.Random(0)
+        titles = list(processor.movies)
+        sample = [titles[rand.randrange(len(titles))] for _ in range(lookup_count)]
+        start_time = time.time()
+        entry_count = sum(sum(len(entries) for entries in processor.lookup(title).values()) for title in sample)
+        print_result("lookup", (time.time() - start_time) / lookup_count * 1000.0, "ms/title")
+        print_result("lookup records", entry_count / float(lookup_count), "entries/title")
+        title = sample[0]
+        for list_file, entries in [("business.list", processor.iter_business_blocks), ("mpaa-ratings-reasons.list",
+                                                                                      processor.iter_mpaa)]:
+            start_time = time.time()
+            [entry for entry in entries() if entry.title == title]
+            print_result("scan of " + list_file + " (1 title)", (time.time() - start_time) * 1000.0, "ms/title")
+    finally:
+        if processor.offset_index is not None:
+            processor.offset_index.close()
+        shutil.rmtree(os.path.dirname(filename))
+
+
+# the SQLite export vs the tsv table bulk loaded into SQLite, and loading the movies back from the database vs parsing
+# the list files
+def benchmark_sqlite(data_path, query_count=50):
+    print("\nsqlite: export and load times")
+    start_time = time.time()
+    processor = IMDBFileProcessor(data_path)
+    processor.enable_print_progress = False
+    processor.load(workers=1)
+    print_result("load (list files)", time.time() - start_time, "s")
+    output_directory = tempfile.mkdtemp()
+    table_filename = os.path.join(output_directory, "movies.txt")
+    table_database_filename = os.path.join(output_directory, "movies_tsv.sqlite")
+    database_filename = os.path.join(output_directory, "movies.sqlite")
+
+    start_time = time.time()
+    processor.save_to_table(table_filename)
+    connection = sqlite3.connect(table_database_filename)
+    with io.open(table_filename, encoding="utf-8") as f:
+        columns = f.readline().rstrip("\n").split("\t")
+        connection.execute("CREATE TABLE movies (" + ", ".join('"' + column + '"' for column in columns) + ")")
+        connection.executemany("INSERT INTO movies VALUES (" + ", ".join("?" * len(columns)) + ")",
+                               (line.rstrip("\n").split("\t") for line in f))
+    for column in ["year", "rating", "votes"]:
+        connection.execute("CREATE INDEX movies_" + column + " ON movies (" + column + ")")
+    connection.commit()
+    connection.close()
+    print_result("save_to_table + tsv load into sqlite", time.time() - start_time, "s")
+
+    start_time = time.time()
+    processor.save_to_sqlite(database_filename)
+    print_result("save_to_sqlite", time.time() - start_time, "s")
+    start_time = time.time()
+    loaded = IMDBFileProcessor(data_path)
+    loaded.enable_print_progress = False
+    loaded.load_from_sqlite(database_filename)
+    print_result("load_from_sqlite", time.time() - start_time, "s")
+    print_result("database size", os.path.getsize(database_filename) / 1024.0 / 1024.0, "MB")
+
+    connection = sqlite3.connect(database_filename)
+    start_time = time.time()
+    for index in range(query_count):
+        connection.execute("SELECT count(*) FROM movies m JOIN movie_genres g ON g.movie_id = m.id "
+                           "WHERE g.genre_id = ? AND m.year BETWEEN ? AND ? AND m.rating >= 7.5",
+                           (index % max(len(processor.genre_names), 1), 1990 + index % 20, 2000 + index % 20)).fetchone()
+    print_result("indexed query (genre, year, rating)", 1000.0 * (time.time() - start_time) / query_count, "ms")
+    connection.close()
+    shutil.rmtree(output_directory)
+
+
+# returns the private (copied or written) memory of this process in bytes, from /proc (linux only), or None
+def private_memory():
+    try:
+        with io.open("/proc/self/smaps_rollup") as f:
+            return sum(int(line.split()[1]) * 1024 for line in f if line.startswith("Private_"))
+    except (IOError, OSError):
+        return None
+
+
+_inherited_processor = None  # the processor the forked workers of benchmark_shared inherit
+
+
+# a worker of benchmark_shared: reads the votes of all the movies, either from the inherited processor or from the
+# dataset published as name. returns tuple: (attach seconds, private memory in bytes after the read)
+def _shared_worker(name):
+    start_time = time.time()
+    processor = _inherited_processor if name is None else IMDBFileProcessor.attach_shared(name)
+    attach_seconds = time.time() - start_time
+    votes = 0
+    for movie in processor.movies.values():
+        votes += movie.get(IMDBFileProcessor.key_votes) or 0
+    return attach_seconds, private_memory()
+
+
+# workers reading the dataset: inheriting the dict of dicts through fork vs attaching to it in shared memory
+def benchmark_shared(data_path, workers=4):
+    global _inherited_processor
+    print("\nshared: private memory per worker, reading the votes of all the movies")
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return
+    processor = IMDBFileProcessor(data_path)
+    processor.enable_print_progress = False
+    processor.load(workers=1)
+    start_time = time.time()
+    dataset = processor.publish_shared()
+    print_result("publish", time.time() - start_time, "s")
+    print_result("published size", dataset.size() / 1024.0 / 1024.0, "MB")
+    _inherited_processor = processor
+    try:
+        context = multiprocessing.get_context("fork")
+        for name, task in [("fork inherited", None), ("shared attached", dataset.name)]:
+            pool = context.Pool(workers)
+            try:
+                results = pool.map(_shared_worker, [task] * workers)
+            finally:
+                pool.close()
+                pool.join()
+            if task is not None:
+                print_result(name + " attach", 1000.0 * sum(seconds for seconds, _ in results) / workers, "ms")
+            if results[0][1] is not None:
+                print_result(name + " private memory", sum(memory for _, memory in results) / workers / 1024.0 / 1024.0,
+                             "MB")
+    finally:
+        _inherited_processor = None
+        dataset.close()
+        dataset.unlink()
+
+
+benchmarks = {
+    'aggregate': benchmark_aggregate,
+    'binary_lines': benchmark_binary_lines,
+    'cast': benchmark_cast,
+    'currency': benchmark_currency,
+    'director_memory': benchmark_director_memory,
+    'store_memory': benchmark_store_memory,
+    'snapshot': benchmark_snapshot,
+    'export': benchmark_export,
+    'gzip': benchmark_gzip,
+    'ingest': benchmark_ingest,
+    'number_parsing': benchmark_number_parsing,
+    'select': benchmark_select,
+    'shared': benchmark_shared,
+    'sqlite': benchmark_sqlite,
+    'text_index': benchmark_text_index,
+    'offset_index': benchmark_offset_index,
+    'vote_stats': benchmark_vote_stats,
+    'title_resolution': benchmark_title_resolution,
+    'title_search': benchmark_title_search
+}
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    data_path = sys.argv[1]
+    synthetic_path = None
+    if data_path.startswith("synthetic:"):
+        synthetic_path = tempfile.mkdtemp() + os.sep
+        start_time = time.time()
+        SyntheticData(int(data_path[len("synthetic:"):])).write(synthetic_path)
+        print("Wrote synthetic data files to " + synthetic_path + " in " +
+              "{:.1f}".format(time.time() - start_time) + " s")
+        data_path = synthetic_path
+    for benchmark_name in (sys.argv[2:] or sorted(benchmarks)):
+        benchmarks[benchmark_name](data_path)
+    if synthetic_path is not None:
+        shutil.rmtree(synthetic_path)
@@ -0,0 +1,106 @@
+"""
+ The raw budget and gross amounts of business.list, kept in their own currency and date.
+
+ Each movie block adds its amounts to parallel arrays (block, kind, amount, currency id, date), so the amounts can be
+ converted again (e.g. to another currency, or after CurrencyEstimator.load_rates) in one CurrencyEstimator.exchange_many
+ call, without parsing business.list again.
+"""
+
+from array import array
+
+from CurrencyEstimator import CurrencyEstimator
+from NumberParser import parse_number, parse_date
+from SymbolTable import SymbolTable
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+# the kinds of amounts
+kind_budget = 0
+kind_gross = 1
+_line_kinds = {'BT:': kind_budget, 'GR:': kind_gross}
+
+
+# returns tuple: (kind, amount, currency, date ordinal or None) of a BT: or GR: line of business.list,
+# e.g. "GR: USD 363,024,263 (USA) (5 June 2016)", or None when the amount is not a number
+def parse_amount_line(line):
+    amount = parse_number(line[8:].split(" ")[0])
+    if amount is None:
+        return None
+    return _line_kinds[line[:3]], amount, line[3:8].strip(), parse_date(line)
+
+
+class BusinessAmounts(object):
+    def __init__(self):
+        self.titles = []  # block -> title
+        self.block_dates = array('i')  # block -> date ordinal of its undated amounts (0 for the latest rates)
+        # per amount, in file order:
+        self.blocks = array('i')  # the block of the amount
+        self.kinds = bytearray()  # kind_budget or kind_gross
+        self.amounts = array('d')  # the amount in its currency
+        self.currencies = array('i')  # id of the currency in currency_pool
+        self.dates = array('i')  # date ordinal (0 for an undated amount)
+        self.currency_pool = SymbolTable()
+
+    # adds the amounts (see parse_amount_line) of a movie block.
+    #   default_date: date ordinal of its undated amounts, e.g. the movie's release year (0 for the latest rates)
+    def add_block(self, title, amounts, default_date=0):
+        block = len(self.titles)
+        self.titles.append(title)
+        self.block_dates.append(default_date)
+        for kind, amount, currency, date in amounts:
+            self.blocks.append(block)
+            self.kinds.append(kind)
+            self.amounts.append(amount)
+            self.currencies.append(self.currency_pool.intern(currency))
+            self.dates.append(date or 0)
+
+    def __len__(self):
+        return len(self.titles)
+
+    # converts all the amounts in one batch. returns list of the converted amounts, None for an unknown currency
+    def convert(self, to_currency='USD'):
+        block_dates = self.block_dates
+        dates = [date or block_dates[block] or None for date, block in zip(self.dates, self.blocks)]
+        return CurrencyEstimator.exchange_many(self.amounts, self.currency_pool.lookup(self.currencies), dates,
+                                               to_currency)
+
+    # yields tuple: (title, budget, revenue) for each block, in file order. budget and revenue are int, or None.
+    # the budget is the last one listed, and the revenue the largest gross (lazy: assuming it is the worldwide revenue)
+    #   converted: the converted amounts (see convert), to reuse them
+    def values(self, to_currency='USD', converted=None):
+        if converted is None:
+            converted = self.convert(to_currency)
+        index = 0
+        count = len(converted)
+        for block, title in enumerate(self.titles):
+            budget = None
+            revenue = None
+            while index < count and self.blocks[index] == block:
+                amount = converted[index]
+                if self.kinds[index] == kind_budget:
+                    budget = amount
+                elif amount is not None and (revenue is None or amount > revenue):
+                    revenue = amount
+                index += 1
+            yield title, _to_int(budget), _to_int(revenue)
+
+    # returns dict: currency -> number of amounts not converted (unknown currencies)
+    def unknown_currencies(self, converted):
+        unknown = {}
+        for currency_id, amount in zip(self.currencies, converted):
+            if amount is None:
+                currency = self.currency_pool.names[currency_id]
+                unknown[currency] = unknown.get(currency, 0) + 1
+        return unknown
+
+
+# returns a converted amount as int, or None (e.g. for an infinite amount)
+def _to_int(amount):
+    try:
+        return int(amount) if amount is not None else None
+    except (OverflowError, ValueError):
+        return None
@@ -0,0 +1,184 @@
+"""
+ The cast of the movies (actors.list and actresses.list) as a bipartite graph between persons and titles.
+
+ Both sides are kept in compressed sparse rows (CSR): flat integer arrays instead of a list per movie or per person.
+ The list files are grouped by person, so each file is read straight into the person side (CastList): the titles of
+ person p are person_titles[person_offsets[p]:person_offsets[p + 1]], as the title ids of the processor's movies
+ (their position in IMDBFileProcessor.movies). The names are a utf-8 blob with the offsets of each name.
+
+ CastGraph puts the lists of the files together (the persons of the second file numbered after the first ones) and
+ builds the title side by a counting sort of the credits: the persons of title t are
+ title_persons[title_offsets[t]:title_offsets[t + 1]]. The neighbours of a person or a title are a slice of an array,
+ and the co-stars of a person are counted over the persons of its titles.
+"""
+
+import sys
+from array import array
+from bisect import bisect_right
+from collections import Counter
+
+from SharedDataset import SharedStrings
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+# the typecode of the offset arrays: 64 bit integers ('q' is python 3.3+, 'l' is 64 bit with python 2 on 64 bit linux
+# and mac os)
+_offset_typecode = 'q' if sys.version_info >= (3, 3) else 'l'
+
+
+# returns the number of bytes held by the buffer of an array or bytearray
+def _buffer_size(values):
+    return len(values) * values.itemsize if isinstance(values, array) else len(values)
+
+
+# returns array of the offsets of consecutive runs of the given lengths (one more than the lengths, from 0)
+def _offsets(lengths):
+    offsets = array(_offset_typecode, [0])
+    total = 0
+    for length in lengths:
+        total += length
+        offsets.append(total)
+    return offsets
+
+
+# the persons of one list file and their titles, in CSR form, in file order
+class CastList(object):
+    def __init__(self):
+        self.names = SharedStrings(array(_offset_typecode, [0]), bytearray())  # person id -> name
+        self.person_offsets = array(_offset_typecode, [0])  # person id -> start of its titles in person_titles (count + 1 offsets)
+        self.person_titles = array('i')  # the title ids of each person
+
+    # starts a new person, whose titles are added next. returns its id
+    def add_person(self, name):
+        self.names.blob += name.encode("utf-8")
+        self.names.offsets.append(len(self.names.blob))
+        self.person_offsets.append(len(self.person_titles))
+        return len(self.person_offsets) - 2
+
+    # adds a title to the last person (a title listed again, e.g. for each episode of a series, is added once)
+    def add_title(self, title_id):
+        person_titles = self.person_titles
+        if self.person_offsets[-1] == self.person_offsets[-2] or person_titles[-1] != title_id:
+            person_titles.append(title_id)
+            self.person_offsets[-1] += 1
+
+    # appends the persons of another list (e.g. of the next byte range of the file)
+    def extend(self, other):
+        blob_size = len(self.names.blob)
+        self.names.blob += other.names.blob
+        self.names.offsets.extend(offset + blob_size for offset in other.names.offsets[1:])
+        credit_count = len(self.person_titles)
+        self.person_offsets.extend(offset + credit_count for offset in other.person_offsets[1:])
+        self.person_titles.extend(other.person_titles)
+
+    def __len__(self):
+        return len(self.person_offsets) - 1
+
+    # returns the number of (person, title) credits
+    def credit_count(self):
+        return len(self.person_titles)
+
+    # returns dict: {array name: bytes} of the arrays of the list
+    def memory_usage(self):
+        return {
+            'names': _buffer_size(self.names.blob) + _buffer_size(self.names.offsets),
+            'person_offsets': _buffer_size(self.person_offsets),
+            'person_titles': _buffer_size(self.person_titles)
+        }
+
+
+class CastGraph(object):
+    #   cast_lists: the CastLists of the list files. the persons are numbered in their order
+    #   title_count: the number of titles (the title ids are from 0 to title_count - 1)
+    def __init__(self, cast_lists, title_count):
+        self.cast_lists = [cast_list for cast_list in cast_lists if len(cast_list) > 0]
+        self.title_count = title_count
+        self.list_starts = _offsets(len(cast_list) for cast_list in self.cast_lists)
+        # the title side: counting sort of the credits by title, the persons of each title staying in order
+        title_counts = Counter()
+        for cast_list in self.cast_lists:
+            title_counts.update(cast_list.person_titles)
+        self.title_offsets = _offsets(title_counts[title_id] for title_id in range(title_count))
+        self.title_persons = array('i', [0]) * self.title_offsets[-1]
+        next_positions = self.title_offsets[:-1]
+        title_persons = self.title_persons
+        for list_start, cast_list in zip(self.list_starts, self.cast_lists):
+            person_titles = cast_list.person_titles
+            for person_id, (start, end) in enumerate(zip(cast_list.person_offsets, cast_list.person_offsets[1:]),
+                                                     list_start):
+                for title_id in person_titles[start:end]:
+                    position = next_positions[title_id]
+                    title_persons[position] = person_id
+                    next_positions[title_id] = position + 1
+
+    def __len__(self):
+        return self.list_starts[-1]
+
+    # returns tuple: (cast list, id in the list) of a person
+    def _locate(self, person_id):
+        if not 0 <= person_id < len(self):
+            raise IndexError(person_id)
+        index = bisect_right(self.list_starts, person_id) - 1
+        return self.cast_lists[index], person_id - self.list_starts[index]
+
+    def person_name(self, person_id):
+        cast_list, list_id = self._locate(person_id)
+        return cast_list.names[list_id]
+
+    # returns the id of a person by name, or None. searches the name blobs (no dict of the names is kept)
+    def person_id(self, name):
+        encoded = name.encode("utf-8")
+        for list_start, cast_list in zip(self.list_starts, self.cast_lists):
+            blob = cast_list.names.blob
+            offsets = cast_list.names.offsets
+            start = blob.find(encoded)
+            while start >= 0:
+                index = bisect_right(offsets, start) - 1
+                if offsets[index] == start and offsets[index + 1] == start + len(encoded):
+                    return list_start + index
+                start = blob.find(encoded, start + 1)
+        return None
+
+    # returns array of the title ids of a person
+    def titles_of(self, person_id):
+        cast_list, list_id = self._locate(person_id)
+        return cast_list.person_titles[cast_list.person_offsets[list_id]:cast_list.person_offsets[list_id + 1]]
+
+    # returns array of the person ids of a title
+    def persons_of(self, title_id):
+        return self.title_persons[self.title_offsets[title_id]:self.title_offsets[title_id + 1]]
+
+    # returns Counter: {person id: number of shared titles} of the persons who share titles with a person
+    def co_stars(self, person_id):
+        counts = Counter()
+        for title_id in self.titles_of(person_id):
+            counts.update(self.persons_of(title_id))
+        del counts[person_id]
+        return counts
+
+    # returns sorted list of the title ids shared by two persons
+    def shared_titles(self, person_a, person_b):
+        return sorted(set(self.titles_of(person_a)).intersection(self.titles_of(person_b)))
+
+    # returns Counter: {person id: number of titles} of the persons in a set of titles (e.g. the titles of a query)
+    def cast_counts(self, title_ids):
+        counts = Counter()
+        for title_id in title_ids:
+            counts.update(self.persons_of(title_id))
+        return counts
+
+    # returns the number of (person, title) credits
+    def credit_count(self):
+        return len(self.title_persons)
+
+    # returns list of tuples: [(array name, bytes), ...] of the arrays of the graph, the lists of the files first
+    def memory_usage(self):
+        usage = Counter()
+        for cast_list in self.cast_lists:
+            usage.update(cast_list.memory_usage())
+        return list(usage.items()) + [('title_offsets', _buffer_size(self.title_offsets)),
+                                      ('title_persons', _buffer_size(self.title_persons))]
@@ -18,8 +18,18 @@
 
  Exchange rates for obsolete currencies are manually added from
     http://coinmill.com/USD_TRL.html?USD=1
+
+ Dated exchange rates can be added with add_rates / load_rates (e.g. yearly rates of the currencies the movies were
+ budgeted in): each currency with dated rates gets a table of (date, rate) sorted by date, looked up by binary search
+ and interpolated between the two nearest dates. The currencies without dated rates use the rates above at any date.
 """
 
+import datetime
+import io
+from array import array
+from bisect import bisect_right
+from itertools import repeat
+
 __author__ = "Hamid Younesy"
 __copyright__ = "Copyright 2016"
 __license__ = "MIT"
@@ -68,13 +78,110 @@ class CurrencyEstimator:
                     'ESP': 150, 'IEP': 0.71, 'XAU': 0.001, 'BGL': 1770, 'AFA': 68683,
                     'GRD': 308.0, 'FIM': 5, 'UYU': 30.0, 'MGF': 15850, 'ATS': 12, 'SDD': 644.91
                 }
+
+    # the date of the rates in currencies, as a proleptic gregorian ordinal (see datetime.date.toordinal)
+    currencies_date = datetime.date(2016, 7, 13).toordinal()
+
+    # currency -> tuple: (array of date ordinals, array of the rates at those dates), sorted by date
+    rate_history = {}
+
+    # (currency, date ordinal) -> rate looked up in rate_history. cleared by add_rates, and when it holds
+    # rate_cache_size rates (a batch of many distinct dates is deduplicated by exchange_many instead)
+    rate_cache = {}
+    rate_cache_size = 4096
+
+    # adds dated rates of a currency (units of the currency per USD).
+    #   dates: datetime.date or date ordinals. the rate in currencies is kept as the rate of currencies_date
+    @classmethod
+    def add_rates(cls, currency, dates, rates):
+        points = {}
+        if currency in cls.rate_history:
+            points.update(zip(*cls.rate_history[currency]))
+        elif currency in cls.currencies:
+            points[cls.currencies_date] = cls.currencies[currency]
+        points.update((_ordinal(date), float(rate)) for date, rate in zip(dates, rates))
+        dates = sorted(points)
+        cls.rate_history[currency] = (array('i', dates), array('d', [points[date] for date in dates]))
+        cls.rate_cache.clear()
+
+    # adds the dated rates of a csv file with lines: currency,YYYY-MM-DD,rate (units of the currency per USD)
     @classmethod
-    def exchange(cls, value, from_currency, to_currency = 'USD'):
-        from_rate = cls.currencies.get(from_currency, 0)
-        to_rate = cls.currencies.get(to_currency, 0)
+    def load_rates(cls, filename):
+        rates = {}
+        with io.open(filename, encoding="utf-8") as f:
+            for line in f:
+                fields = [field.strip() for field in line.split(",")]
+                if len(fields) != 3 or fields[0] == "" or fields[0].startswith("#"):
+                    continue
+                try:
+                    date = datetime.datetime.strptime(fields[1], "%Y-%m-%d").date()
+                    rate = float(fields[2])
+                except ValueError:
+                    continue  # e.g. a header line
+                rates.setdefault(fields[0], ([], []))
+                rates[fields[0]][0].append(date)
+                rates[fields[0]][1].append(rate)
+        for currency, (dates, currency_rates) in rates.items():
+            cls.add_rates(currency, dates, currency_rates)
+
+    # returns the rate of a currency (units per USD) at a date (datetime.date or ordinal, None for the latest rate),
+    # or 0 for an unknown currency
+    @classmethod
+    def rate(cls, currency, date=None):
+        history = cls.rate_history.get(currency)
+        if history is None:
+            return cls.currencies.get(currency, 0)
+        dates, rates = history
+        if date is None:
+            return rates[-1]
+        date = _ordinal(date)
+        rate = cls.rate_cache.get((currency, date))
+        if rate is None:
+            index = bisect_right(dates, date)
+            if index == 0:
+                rate = rates[0]
+            elif index == len(dates):
+                rate = rates[-1]
+            else:
+                # linear interpolation between the nearest dates
+                weight = float(date - dates[index - 1]) / (dates[index] - dates[index - 1])
+                rate = rates[index - 1] + (rates[index] - rates[index - 1]) * weight
+            if len(cls.rate_cache) >= cls.rate_cache_size:
+                cls.rate_cache.clear()
+            cls.rate_cache[(currency, date)] = rate
+        return rate
+
+    # converts an amount at the rates of a date (datetime.date or ordinal, None for the latest rates).
+    # returns None when a currency is unknown
+    @classmethod
+    def exchange(cls, value, from_currency, to_currency = 'USD', date=None):
+        from_rate = cls.rate(from_currency, date)
+        to_rate = cls.rate(to_currency, date)
         if from_rate == 0 or to_rate == 0:
             return None
         return value * to_rate / from_rate
 
+    # converts a batch of amounts, each at the rates of its date. the rates are looked up once per currency and date.
+    #   amounts, from_currencies: sequences of the same length. dates: the same length, or None for the latest rates
+    # returns list of the converted amounts, None for an unknown currency
+    @classmethod
+    def exchange_many(cls, amounts, from_currencies, dates=None, to_currency='USD'):
+        rates = {}  # (currency, date) -> rate
+        converted = []
+        for amount, from_currency, date in zip(amounts, from_currencies, repeat(None) if dates is None else dates):
+            from_rate = rates.get((from_currency, date))
+            if from_rate is None:
+                from_rate = rates[(from_currency, date)] = cls.rate(from_currency, date)
+            to_rate = rates.get((to_currency, date))
+            if to_rate is None:
+                to_rate = rates[(to_currency, date)] = cls.rate(to_currency, date)
+            converted.append(amount * to_rate / from_rate if from_rate != 0 and to_rate != 0 else None)
+        return converted
+
+
+# returns the ordinal of a datetime.date, or the date itself when it is already one
+def _ordinal(date):
+    return date.toordinal() if hasattr(date, 'toordinal') else date
+
 if __name__ == '__main__':
     print("100 CAD = " + str(round(CurrencyEstimator.exchange(100, 'CAD', 'EUR'),2)) + " EUR")
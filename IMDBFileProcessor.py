@@ -7,16 +7,50 @@ Used with permission: http://www.imdb.com/help/show_leaf?usedatasoftware
 """
 
 import re
-import locale
 import textwrap
 import os.path
 import operator
 import sys
-from CurrencyEstimator import CurrencyEstimator
+import io
+import copy
+import json
+import mmap
+import pickle
+import struct
+import multiprocessing
+import threading
+import gzip
+import hashlib
+import functools
+from itertools import compress
+import time
+import datetime
+from array import array
+from collections import namedtuple, Counter
+from Aggregation import aggregate, and_masks, correlation_matrix, genre_positions, group_positions
+from BusinessAmounts import BusinessAmounts, parse_amount_line
+from CastGraph import CastGraph, CastList
+from NumberParser import parse_duration
+from OffsetIndex import OffsetIndex, OffsetIndexBuilder
+from MovieStore import MovieStore
+from SharedDataset import SharedMovieStore, check_python_version
+from SQLiteStore import save_sqlite, load_sqlite
+from TextIndex import TextIndex, TextIndexBuilder, keyword_term, tokenize
+from TitleIndex import TitleIndex
+from TitleResolver import TitleResolver
+from MovieIndex import MovieIndex
+from ReaderStats import ReaderStats
+from SymbolTable import SymbolTable
 
 is_python_2 = sys.version_info < (3, 0)
 if is_python_2:
-    import io
+    import Queue as queue
+else:
+    import queue
+
+# the typecode of the genre bitmask arrays: 64 bit unsigned integers ('Q' is python 3.3+, 'L' is 64 bit with python 2
+# on 64 bit linux and mac os)
+_genre_typecode = 'Q' if sys.version_info >= (3, 3) else 'L'
 
 __author__ = "Hamid Younesy"
 __copyright__ = "Copyright 2016"
@@ -25,12 +59,420 @@ __version__ = "1.0.1"
 __maintainer__ = "Hamid Younesy"
 
 
-def open_imdb(filename):
+# records yielded by the IMDBFileProcessor.iter_* generators
+MovieEntry = namedtuple('MovieEntry', ['title', 'year'])
+GenreEntry = namedtuple('GenreEntry', ['title', 'genre'])
+RatingEntry = namedtuple('RatingEntry', ['title', 'vote_distribution', 'votes', 'rating'])
+BusinessEntry = namedtuple('BusinessEntry', ['title', 'budget', 'revenue'])
+BusinessBlock = namedtuple('BusinessBlock', ['title', 'amounts'])
+DirectorEntry = namedtuple('DirectorEntry', ['director', 'title'])
+CastEntry = namedtuple('CastEntry', ['person', 'title'])
+LengthEntry = namedtuple('LengthEntry', ['title', 'length'])
+CountryEntry = namedtuple('CountryEntry', ['title', 'country'])
+LanguageEntry = namedtuple('LanguageEntry', ['title', 'language'])
+MpaaEntry = namedtuple('MpaaEntry', ['title', 'mpaa', 'reason'])
+KeywordEntry = namedtuple('KeywordEntry', ['title', 'keyword'])
+PlotEntry = namedtuple('PlotEntry', ['title', 'plot'])
+
+
+# the vote distribution codes of ratings.list have one character per rating from 1 to 10, for the percent of the votes:
+# '.' no votes, '0' 1-9%, '1' 10-19%, ..., '9' 90-99%, '*' 100%.
+# they are decoded to one byte per rating with the (middle) percent: 0, 5, 15, ..., 95, 100
+_vote_percents = dict([('.', 0), ('*', 100)] + [(str(digit), digit * 10 + 5) for digit in range(10)])
+_vote_decode = dict((ord(char), bytearray([percent]).decode("ISO-8859-1")) for char, percent in _vote_percents.items())
+_vote_encode = dict((percent, char) for char, percent in _vote_percents.items())
+
+
+# returns the 10 bytes of a vote distribution code (e.g. '0000.00005'), or None if it is not a valid code
+def decode_vote_distribution(code):
+    if len(code) != 10 or len(code.strip(".*0123456789")) > 0:
+        return None
+    return code.translate(_vote_decode).encode("ISO-8859-1")
+
+
+# returns the vote distribution code of 10 decoded bytes
+def encode_vote_distribution(row):
+    return "".join(_vote_encode[percent] for percent in bytearray(row))
+
+
+# returns tuple: (mean, variance, polarization) of the ratings 1 to 10 weighted by a decoded vote distribution.
+# polarization is the variance relative to its largest possible value (votes split between 1 and 10), from 0 to 1
+def _vote_distribution_stats(row):
+    weights = bytearray(row)
+    total = float(sum(weights))
+    if total == 0:
+        return None
+    mean = sum(weight * rating for rating, weight in enumerate(weights, 1)) / total
+    variance = sum(weight * (rating - mean) ** 2 for rating, weight in enumerate(weights, 1)) / total
+    return mean, variance, variance / 20.25
+
+
+# returns the path of a list file in a directory: name (e.g. "movies.list"), or else its gzip compressed name.gz
+def find_list_file(directory, name):
+    if not os.path.isfile(directory + name) and os.path.isfile(directory + name + ".gz"):
+        return directory + name + ".gz"
+    return directory + name
+
+
+def is_gzip_file(filename):
+    return filename.endswith(".gz")
+
+
+# opens a list file. with start/end, only the lines between those two byte offsets are read.
+# a gzip compressed file (see is_gzip_file) is decompressed on the fly, and is always read as a whole
+def open_imdb(filename, start=0, end=None):
+    if is_gzip_file(filename):
+        return io.TextIOWrapper(_open_binary(filename), encoding="ISO-8859-1")
+    if start > 0 or end is not None:
+        return ListFileRange(filename, start, end)
     if is_python_2:
         return io.open(filename, 'r', encoding="ISO-8859-1")
     else:
         return open(filename, 'r', encoding="ISO-8859-1")
 
+
+# iterates the decoded lines of a list file between two byte offsets that fall on line starts
+class ListFileRange(object):
+    def __init__(self, filename, start, end):
+        self.file = io.open(filename, 'rb')
+        self.file.seek(start)
+        self.remaining = end - start if end is not None else -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.file.close()
+
+    def __iter__(self):
+        for line in self.file:
+            if self.remaining == 0:
+                break
+            if self.remaining > 0:
+                self.remaining = max(self.remaining - len(line), 0)
+            yield line.decode("ISO-8859-1")
+
+
+# a gzip compressed list file, decompressed in a separate thread that reads ahead of the parser through a queue of
+# at most queue_blocks blocks of block_size bytes: the decompression and the parsing overlap (zlib releases the GIL
+# while inflating). it is a raw binary file: wrapped by io.BufferedReader and io.TextIOWrapper for the text lines
+class GzipBlockReader(io.RawIOBase):
+    def __init__(self, filename, block_size=1 << 20, queue_blocks=8):
+        io.RawIOBase.__init__(self)
+        self.queue = queue.Queue(queue_blocks)
+        self.block = b''  # the last block taken from the queue, read up to offset
+        self.offset = 0
+        self.finished = False
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.decompress, args=(filename, block_size))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def decompress(self, filename, block_size):
+        try:
+            f = gzip.open(filename, 'rb')
+            try:
+                while not self.stopped.is_set():
+                    block = f.read(block_size)
+                    self.put(block)
+                    if len(block) == 0:
+                        break  # the empty block marks the end of the file
+            finally:
+                f.close()
+        except Exception as error:
+            self.put(error)
+
+    # waits for room in the queue, unless the reader is closed
+    def put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.offset == len(self.block) and not self.finished:
+            block = self.queue.get()
+            if isinstance(block, Exception):
+                self.finished = True
+                raise block
+            self.block = block
+            self.offset = 0
+            self.finished = len(block) == 0
+        size = min(len(buffer), len(self.block) - self.offset)
+        buffer[:size] = self.block[self.offset:self.offset + size]
+        self.offset += size
+        return size
+
+    # also stops the decompression thread when the file was not read to the end
+    def close(self):
+        if not self.closed:
+            self.stopped.set()
+            self.thread.join()
+        io.RawIOBase.close(self)
+
+
+# opens a list file for reading as bytes: a plain file, or a GzipBlockReader for a gzip compressed one
+def _open_binary(filename):
+    if is_gzip_file(filename):
+        return io.BufferedReader(GzipBlockReader(filename), 1 << 20)
+    return io.open(filename, 'rb')
+
+
+# iterates the lines (as bytes, with their line ends) of a list file between two byte offsets that fall on line starts.
+# the file is read in blocks of about block_size bytes: yields the list of the lines of each block
+# (for the binary readers). a gzip compressed file is always read as a whole
+def iter_list_blocks(filename, start=0, end=None, block_size=1 << 20):
+    with _open_binary(filename) as f:
+        if start > 0:
+            f.seek(start)
+        remaining = end - start if end is not None else -1
+        tail = b''
+        while remaining != 0:
+            block = f.read(block_size if remaining < 0 else min(block_size, remaining))
+            if len(block) == 0:
+                break
+            if remaining > 0:
+                remaining -= len(block)
+            lines = (tail + block).splitlines(True)
+            # the last line continues in the next block (also when it ends with the \r of a \r\n)
+            tail = lines.pop() if not lines[-1].endswith(b'\n') else b''
+            yield lines
+        if len(tail) > 0:
+            yield [tail]
+
+
+# the ISO-8859-1 whitespace bytes: the binary readers strip these, as str.strip() does to the decoded lines
+_whitespace = u"".join(char for char in bytearray(range(256)).decode("ISO-8859-1")
+                       if char.isspace()).encode("ISO-8859-1")
+# regex character classes of the whitespace bytes and of the other bytes (\s and \S of the decoded lines)
+_regex_whitespace = b"[" + b"".join(("\\x%02x" % byte).encode("ascii") for byte in bytearray(_whitespace)) + b"]"
+_regex_non_whitespace = b"[^" + _regex_whitespace[1:]
+
+
+# splits a list file into byte ranges of about chunk_size bytes, each starting at the beginning of a line.
+#   is_chunk_start: optional test of the (bytes) lines a range may start at, e.g. the first line of a block
+#   min_start: only the first range may start before this offset
+# returns list of tuples: [(start, end), ...] in file order
+def split_list_file(filename, chunk_size, is_chunk_start=None, min_start=0):
+    size = os.path.getsize(filename)
+    starts = [0]
+    with io.open(filename, 'rb') as f:
+        offset = max(chunk_size, min_start)
+        while offset < size:
+            # move to the start of the next line
+            f.seek(offset - 1)
+            f.readline()
+            start = f.tell()
+            if is_chunk_start is not None:
+                for line in iter(f.readline, b''):
+                    if is_chunk_start(line):
+                        break
+                    start += len(line)
+            if start >= size:
+                break
+            starts.append(start)
+            offset = start + chunk_size
+    return list(zip(starts, starts[1:] + [size]))
+
+
+# the first line of a name block (see IMDBFileProcessor.iter_credits): "[name]\t[title]"
+def _is_name_line(line):
+    return line[:1] not in (b'\t', b' ', b'\r', b'\n') and b'\t' in line
+
+
+# the movies found in one byte range of a list file: starts empty and adds a movie dict for each known title looked up
+class _PartialMovies(dict):
+    def __init__(self, titles):
+        dict.__init__(self)
+        self.titles = titles
+
+    def get(self, title, default=None):
+        movie = dict.get(self, title)
+        if movie is None and title in self.titles:
+            movie = self[title] = {}
+        return movie if movie is not None else default
+
+
+# value type of the stored lengths: minutes, or the int -1 for a length that could not be parsed
+def _length_value(value):
+    return -1 if value == -1 else float(value)
+
+
+# measures each run of a read_* method in a ReaderStats (see IMDBFileProcessor.reader_stats). the reader fills in
+# its counters through current_stats. a reader that found and read its whole list file is marked loaded
+def _measured_reader(read):
+    @functools.wraps(read)
+    def measured_read(self, *args, **kwargs):
+        range_args = dict(zip(['start', 'end'], args))
+        range_args.update(kwargs)
+        stats = ReaderStats(read.__name__, getattr(self, self.reader_files[read.__name__]),
+                            range_args.get('start', 0), range_args.get('end'))
+        self.current_stats = stats
+        stats.start(self.enable_profile, self.enable_trace_memory)
+        try:
+            read(self, *args, **kwargs)
+        finally:
+            stats.stop()
+            self.current_stats = None
+        if stats.file_found and stats.start_offset == 0 and stats.end_offset is None:
+            self.mark_loaded(read.__name__)
+        self.record_stats(stats)
+    return measured_read
+
+
+# processor copy used by the load() worker processes (inherited on fork, pickled otherwise)
+_load_worker_processor = None
+
+
+def _load_worker_init(processor):
+    global _load_worker_processor
+    _load_worker_processor = processor
+    # the stats are sent back to the parent, which prints them and calls the callback. profiling is done in this
+    # process only
+    processor.stats_callback = None
+    processor.enable_print_progress = False
+    processor.enable_profile = False
+    processor.enable_trace_memory = False
+
+
+# runs one reader in a worker process.
+# for a whole file (start is None): returns the values of the reader's keys and its state (see reader_state) after the read.
+# for a byte range: returns only the values and state found in that range, to be merged by the parent in file order.
+# also returns the ReaderStats of the run
+def _load_worker_read(task):
+    reader, start, end = task
+    processor = _load_worker_processor
+    if start is not None:
+        if processor.enable_binary_lines and reader != 'read_movies':
+            processor.get_encoded_titles()  # built once per worker process, shared by the copies
+        if reader in ('read_actors', 'read_actresses'):
+            processor.get_title_ids()
+        processor = copy.copy(processor)
+        processor.title_index = None
+        processor.movie_index = None
+        processor.genre_count = {}
+        processor.genre_names = []
+        processor.genre_bits = {}
+        processor.country_count = {}
+        processor.language_count = {}
+        processor.director_pool = SymbolTable()
+        processor.country_pool = SymbolTable()
+        processor.language_pool = SymbolTable()
+        processor.mpaa_count = {}
+        processor.length_format_count = {}
+        processor.actor_list = CastList()
+        processor.actress_list = CastList()
+        processor.movies = {} if reader == 'read_movies' else _PartialMovies(_load_worker_processor.movies)
+        getattr(processor, reader)(start, end)
+    else:
+        getattr(processor, reader)()
+    keys = [key for key, key_reader in processor.key_readers.items() if key_reader == reader]
+    values = []
+    for title, movie in processor.movies.items():
+        props = dict((key, movie[key]) for key in keys if key in movie)
+        if len(props) > 0:
+            values.append((title, props))
+    state = dict((name, getattr(processor, name)) for name in processor.reader_state.get(reader, []))
+    return reader, start, values, state, processor.reader_stats.get(reader)
+
+
+# writes one tab delimited table of IMDBFileProcessor.save_tables. the arguments are the ones of save_to_table
+class _TableWriter(object):
+    def __init__(self, processor, filename, save_properties=None, save_genres_keys=None, only_movie_genres=None,
+                 ignore_movie_genres=None, ignore_when_missing=False, replace_missing_number=-1,
+                 replace_missing_text="", output_encoding="utf-8", buffer_rows=10000):
+        print("\nSaving table to: " + filename)
+        self.filename = filename
+        self.out_file = io.open(filename, "w", encoding=output_encoding)
+        self.output_encoding = output_encoding
+        self.buffer_rows = buffer_rows
+        self.rows = []
+        self.num_rows = 0
+        self.positions = None  # the positions of the selected movies, None for all
+
+        if save_properties is None:
+            save_properties = processor.all_keys
+        if save_genres_keys is None and len(processor.genre_count) > 0:
+            save_genres_keys = list(processor.genre_count.keys())
+        self.save_properties = list(save_properties)
+        self.key_genre = processor.key_genre
+        self.key_vote_distribution = processor.key_vote_distribution
+        self.key_director = processor.key_director
+        self.director_names = processor.director_pool.names
+        self.ignore_when_missing = ignore_when_missing
+        # the column text of the missing values, by key
+        self.missing_texts = dict((key, "\t" + (str(replace_missing_number) if key in processor.numerical_keys
+                                               else replace_missing_text)) for key in self.save_properties)
+
+        header = "title\t" + re.sub("(\s|\[|\]|')", "", str(self.save_properties)).replace(",", "\t")
+        if self.key_genre in self.save_properties:
+            genres_header = ""
+            if len(save_genres_keys) > 0:
+                genres_header = re.sub("(\s|\[|\]|')", "", str(list(save_genres_keys))).replace(",", "\t")
+            header = header.replace(self.key_genre, genres_header)
+        self.write(header + "\n")
+
+        # the genres are compared as bitmasks, and the one hot columns are built once per combination of genres
+        self.save_genres_bits = [processor.genre_mask([genre]) for genre in (save_genres_keys or [])]
+        self.only_genres_mask = processor.genre_mask(only_movie_genres) if only_movie_genres is not None else None
+        self.ignore_genres_mask = processor.genre_mask(ignore_movie_genres) if ignore_movie_genres is not None else 0
+        self.genre_columns = {}  # genre mask -> one hot columns
+
+    def write(self, text):
+        if is_python_2 and not isinstance(text, unicode):
+            text = unicode(text, encoding=self.output_encoding, errors='replace')
+        self.out_file.write(text)
+
+    # adds the row of a movie, unless it is filtered out.
+    #   values: {key: value or None} of the movie. texts: cache of the value texts shared by the tables
+    def add_movie(self, title, values, texts):
+        line = [title]
+        for key in self.save_properties:
+            if key == self.key_genre:
+                genre_mask = values[key] or 0
+                columns = self.genre_columns.get(genre_mask)
+                if columns is None:
+                    columns = self.genre_columns[genre_mask] = "".join(
+                        "\t1" if genre_mask & genre_bit else "\t0" for genre_bit in self.save_genres_bits)
+                line.append(columns)
+                if self.only_genres_mask is not None and genre_mask & ~self.only_genres_mask:
+                    return  # has a genre not in only_movie_genres
+                if genre_mask & self.ignore_genres_mask:
+                    return
+                continue
+            text = texts.get(key)
+            if text is None:
+                curr_info = values[key]
+                if curr_info is None:
+                    if self.ignore_when_missing:
+                        return
+                    text = self.missing_texts[key]
+                else:
+                    if key == self.key_vote_distribution:
+                        curr_info = encode_vote_distribution(curr_info)
+                    elif key == self.key_director:
+                        curr_info = [self.director_names[director_id] for director_id in curr_info]
+                    text = texts[key] = "\t" + (curr_info if type(curr_info) == str else str(curr_info))
+            line.append(text)
+        line.append("\n")
+        self.rows.append("".join(line))
+        self.num_rows += 1
+        if len(self.rows) >= self.buffer_rows:
+            self.write("".join(self.rows))
+            self.rows = []
+
+    def close(self):
+        self.write("".join(self.rows))
+        self.rows = []
+        self.out_file.close()
+        print("[Done] rows: " + str(self.num_rows) + " (" + self.filename + ")")
+
+
 # Parses and stores movie info in a dictionary structure
 class IMDBFileProcessor(object):
     key_year = 'year'
@@ -46,6 +488,36 @@ class IMDBFileProcessor(object):
     key_language = 'language'
     key_mpaa = "mpaa"
     key_mpaa_reason = "mpaa_reason"
+    # the cast is not a property of the movies: it is read into the CastGraph of get_cast_graph. these keys are not in
+    # all_keys (actors.list and actresses.list are the largest list files): load or require them explicitly
+    key_actors = "actors"
+    key_actresses = "actresses"
+
+    # the fields of the full-text index (see build_text_index): the keywords and the words of the plot summaries
+    text_keyword = 'keyword'
+    text_plot = 'plot'
+
+    # the list files of the byte offset index (see build_offset_index and lookup): (name, filename attribute, iter
+    # method, records). the records of a title are found as:
+    #   'line': a line starting with the title (then tabs)
+    #   'rating': a line ending with the title, after the vote distribution, votes and rating
+    #   'block': a movie block, from its MV: line to the dashes line that ends it
+    #   'credit': a title line of a name block (see iter_credits)
+    offset_files = [
+        ('movies', 'movies_filename', 'iter_movies', 'line'),
+        ('genres', 'genres_filename', 'iter_genres', 'line'),
+        ('ratings', 'ratings_filename', 'iter_ratings', 'rating'),
+        ('business', 'business_filename', 'iter_business_blocks', 'block'),
+        ('directors', 'directors_filename', 'iter_directors', 'credit'),
+        ('running-times', 'runningtimes_filename', 'iter_lengths', 'line'),
+        ('countries', 'countries_filename', 'iter_countries', 'line'),
+        ('language', 'languages_filename', 'iter_languages', 'line'),
+        ('mpaa-ratings-reasons', 'mpaa_filename', 'iter_mpaa', 'block'),
+        ('actors', 'actors_filename', 'iter_actors', 'credit'),
+        ('actresses', 'actresses_filename', 'iter_actresses', 'credit'),
+        ('keywords', 'keywords_filename', 'iter_keywords', 'line'),
+        ('plot', 'plot_filename', 'iter_plots', 'block')
+    ]
 
     all_keys = [
         key_year,
@@ -72,88 +544,982 @@ class IMDBFileProcessor(object):
         key_length
     ]
 
-    def __init__(self, input_directory):
+    # increase when a change to the readers changes their results. invalidates the saved snapshots
+    parser_version = 7
+
+    # first bytes of a snapshot file, followed by the length of the json header, the header and the pickled data
+    snapshot_magic = b'IMDBSNAP'
+
+    # the numbers that mark an invalid value of a numerical key, left out of the statistics (see numerical_columns)
+    invalid_numbers = {
+        key_year: -1,
+        key_length: -1
+    }
+
+    # storage of the numerical keys and the genre bitmask in the compact MovieStore: (array typecode, value type)
+    numerical_types = {
+        key_genre: (_genre_typecode, int),  # up to 64 genres
+        key_year: ('i', int),
+        key_votes: ('i', int),
+        key_rating: ('d', float),
+        key_budget: ('d', int),
+        key_revenue: ('d', int),
+        key_length: ('d', _length_value)
+    }
+
+    # the keys with few distinct values, dictionary encoded in the compact MovieStore
+    categorical_keys = [
+        key_country,
+        key_language,
+        key_mpaa
+    ]
+
+    # the reader that fills in each property key
+    key_readers = {
+        key_year: 'read_movies',
+        key_genre: 'read_genres',
+        key_vote_distribution: 'read_ratings',
+        key_votes: 'read_ratings',
+        key_rating: 'read_ratings',
+        key_budget: 'read_business',
+        key_revenue: 'read_business',
+        key_director: 'read_director',
+        key_length: 'read_length',
+        key_country: 'read_country',
+        key_language: 'read_language',
+        key_mpaa: 'read_mpaa',
+        key_mpaa_reason: 'read_mpaa',
+        key_actors: 'read_actors',
+        key_actresses: 'read_actresses'
+    }
+
+    # the readers in the order they are run by load(). read_movies builds the titles and always goes first
+    readers = [
+        'read_movies',
+        'read_genres',
+        'read_ratings',
+        'read_business',
+        'read_director',
+        'read_length',
+        'read_country',
+        'read_language',
+        'read_mpaa',
+        'read_actors',
+        'read_actresses'
+    ]
+
+    # the filename attribute read by each reader
+    reader_files = {
+        'read_movies': 'movies_filename',
+        'read_genres': 'genres_filename',
+        'read_ratings': 'ratings_filename',
+        'read_business': 'business_filename',
+        'read_director': 'directors_filename',
+        'read_length': 'runningtimes_filename',
+        'read_country': 'countries_filename',
+        'read_language': 'languages_filename',
+        'read_mpaa': 'mpaa_filename',
+        'read_actors': 'actors_filename',
+        'read_actresses': 'actresses_filename'
+    }
+
+    # the readers that load() can split into byte ranges parsed in parallel
+    chunked_readers = [
+        'read_movies',
+        'read_genres',
+        'read_ratings',
+        'read_director',
+        'read_length',
+        'read_country',
+        'read_language',
+        'read_actors',
+        'read_actresses'
+    ]
+
+    # the readers of list files of name blocks (see iter_credits), split into byte ranges only at the start of a block
+    block_readers = [
+        'read_director',
+        'read_actors',
+        'read_actresses'
+    ]
+
+    # the attributes (other than the movies) updated by a reader
+    reader_state = {
+        'read_genres': ['genre_count', 'genre_names', 'genre_bits'],
+        'read_director': ['director_pool'],
+        'read_country': ['country_count', 'country_pool'],
+        'read_language': ['language_count', 'language_pool'],
+        'read_mpaa': ['mpaa_count'],
+        'read_length': ['length_format_count'],
+        'read_business': ['business_amounts', 'currency_not_found'],
+        'read_actors': ['actor_list'],
+        'read_actresses': ['actress_list']
+    }
+
+    # compact_store: keep the movies in a columnar MovieStore instead of a dict of dicts (uses much less memory)
+    def __init__(self, input_directory, compact_store=False):
         self.movies = {}
-        self.currency_not_found = {}
+        if compact_store:
+            self.movies = MovieStore(self.numerical_types, self.categorical_keys, {self.key_vote_distribution: 10})
+        self.currency_not_found = {}  # currency -> number of business amounts not converted
+        self.business_amounts = BusinessAmounts()  # the raw budget and gross amounts (see convert_business)
+        self.actor_list = CastList()  # the titles of each person of actors.list (see read_actors)
+        self.actress_list = CastList()
+        self.cast_graph = None  # built from the cast lists by get_cast_graph, cleared with the indexes
+        self.text_index = None  # the memory mapped TextIndex of the keywords and plots (see build_text_index)
+        self.offset_index = None  # the memory mapped OffsetIndex of the records of the titles (see build_offset_index)
         self.enable_print_progress = True
         self.enable_print_mismatch = False
         self.enable_movies = True # by default, process movies
         self.enable_series = False # by default, skip series
         self.enable_mpaa_reason = False # disabled (to save memory)
-        self.genre_count = {}
+        self.genre_count = {}  # genre -> number of movies
+        self.genre_names = []  # bit -> genre. each movie's genres are stored as a bitmask of these bits
+        self.genre_bits = {}  # genre -> bitmask with the genre's bit set
         self.country_count = {}
         self.language_count = {}
         self.mpaa_count = {}
+        # each movie's directors are stored as an array of the ids of their names in director_pool (see get_directors).
+        # the countries and languages are the pooled strings, shared by the movies
+        self.director_pool = SymbolTable()
+        self.country_pool = SymbolTable()
+        self.language_pool = SymbolTable()
+        self.length_format_count = {}  # running time format (see NumberParser.duration_formats) -> number of records
+        self.loaded_readers = []  # the readers run on the whole list files (by load, require or a read_* call)
+        self.enable_lazy_load = False  # read the list files of the properties used by queries and tables when needed
+        self.title_index = None  # built at the first title search
+        self.movie_index = None  # built at the first select, cleared when the movies change
+        self.enable_binary_lines = False  # parse the list files as bytes, decoding only the fields of known titles
+        self.encoded_titles = None  # {title as ISO-8859-1 bytes: title} for the binary readers, cleared by add_movie
+        self.title_ids = None  # {title: position in self.movies} (see get_title_ids), cleared by add_movie
+        self.title_resolvers = {}  # encoded -> TitleResolver of the titles (see get_title_resolver), cleared by add_movie
+        self.reader_stats = {}  # reader -> ReaderStats of its last run
+        self.stats_callback = None  # called with the ReaderStats of each reader run, e.g. to log them
+        self.enable_profile = False  # run each reader in cProfile (see ReaderStats.profile)
+        self.enable_trace_memory = False  # trace the allocations of each reader (see ReaderStats.memory_top)
+        self.current_stats = None  # ReaderStats of the reader running
+
+        self.movies_filename = find_list_file(input_directory, "movies.list")
+        self.genres_filename = find_list_file(input_directory, "genres.list")
+        self.ratings_filename = find_list_file(input_directory, "ratings.list")
+        self.business_filename = find_list_file(input_directory, "business.list")
+        self.directors_filename = find_list_file(input_directory, "directors.list")
+        self.runningtimes_filename = find_list_file(input_directory, "running-times.list")
+        self.countries_filename = find_list_file(input_directory, "countries.list")
+        self.languages_filename = find_list_file(input_directory, "language.list")
+        self.mpaa_filename = find_list_file(input_directory, "mpaa-ratings-reasons.list")
+        self.actors_filename = find_list_file(input_directory, "actors.list")
+        self.actresses_filename = find_list_file(input_directory, "actresses.list")
+        self.keywords_filename = find_list_file(input_directory, "keywords.list")
+        self.plot_filename = find_list_file(input_directory, "plot.list")
+
+    # the stats callback is not sent to the load() worker processes (it may not be picklable), nor the memory mapped
+    # indexes
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['stats_callback'] = None
+        state['current_stats'] = None
+        state['text_index'] = None
+        state['offset_index'] = None
+        return state
+
+    # adds a reader to loaded_readers, once it has read its list file into this processor (or its ranges have been
+    # merged). a reader whose list file is missing is not loaded, so that require reads the file once it is there
+    def mark_loaded(self, reader):
+        if reader not in self.loaded_readers:
+            self.loaded_readers.append(reader)
+
+    # keeps the stats of a reader run, and passes them to stats_callback
+    def record_stats(self, stats):
+        self.reader_stats[stats.reader] = stats
+        if self.enable_print_progress:
+            print(str(stats))
+        if self.stats_callback is not None:
+            self.stats_callback(stats)
+
+    # counts the lines (of a text list file) in current_stats as they are read
+    def count_lines(self, lines):
+        stats = self.current_stats
+        if stats is None:
+            return lines
+        return self._counted_lines(lines, stats)
+
+    @staticmethod
+    def _counted_lines(lines, stats):
+        for line in lines:
+            stats.lines += 1
+            yield line
+
+    # counts the lines of the blocks of iter_list_blocks in current_stats as they are read
+    def count_blocks(self, blocks):
+        stats = self.current_stats
+        for lines in blocks:
+            if stats is not None:
+                stats.lines += len(lines)
+            yield lines
+
+    # counts a line that does not match the format of its list file, printed with enable_print_mismatch
+    def count_mismatch(self, line):
+        if self.current_stats is not None:
+            self.current_stats.parse_failures += 1
+        if self.enable_print_mismatch:
+            if isinstance(line, bytes):
+                line = line.decode("ISO-8859-1")
+            print(line.strip())
+
+    # returns the title search index, building it at the first call
+    def get_title_index(self):
+        if self.enable_lazy_load:
+            self.require([])
+        if self.title_index is None:
+            self.title_index = TitleIndex(self.movies)
+        return self.title_index
+
+    # adds a new title (used by the readers, so that the title index is kept up to date)
+    def add_movie(self, title, movie):
+        self.movies[title] = movie
+        # (the indexes and caches of the titles are dropped only when built: read_movies adds the titles in a row)
+        if (self.movie_index is not None or self.cast_graph is not None or self.encoded_titles is not None or
+                self.title_ids is not None or len(self.title_resolvers) > 0):
+            self.clear_indexes()
+            self.encoded_titles = None
+            self.title_ids = None
+            self.title_resolvers = {}
+        if self.title_index is not None:
+            self.title_index.add(title)
+
+    # returns list of tuples: [(title, dict), ...] sorted by title. case insensitive
+    #   limit, offset: returns at most limit results, after skipping the first offset ones (for paging)
+    def get_movies_startwith(self, phrase, limit=None, offset=0):
+        return [(title, self.movies[title]) for title in self.get_title_index().startwith(phrase, limit, offset)]
+
+    # returns list of tuples: [(title, dict), ...] sorted by title. case insensitive
+    #   limit, offset: returns at most limit results, after skipping the first offset ones (for paging)
+    def find_movies_contain(self, phrase, limit=None, offset=0):
+        return [(title, self.movies[title]) for title in self.get_title_index().contain(phrase, limit, offset)]
+
+    # drops the column indexes of select() and the cast graph. needed after changing self.movies directly (the readers
+    # do it)
+    def clear_indexes(self):
+        self.movie_index = None
+        self.cast_graph = None
+
+    # returns dict: {title encoded as ISO-8859-1 bytes: title} of the movies, building it at the first call.
+    # the binary readers look the titles up in it before decoding anything
+    def get_encoded_titles(self):
+        if self.encoded_titles is None:
+            self.encoded_titles = dict((title.encode("ISO-8859-1"), title) for title in self.movies)
+        return self.encoded_titles
+
+    # returns dict: {title: title id} of the movies, building it at the first call. the ids are the positions of the
+    # titles in self.movies (the title ids of a MovieStore)
+    def get_title_ids(self):
+        # (a load() worker reading a byte range looks the titles up in all the movies)
+        movies = self.movies.titles if isinstance(self.movies, _PartialMovies) else self.movies
+        if isinstance(movies, MovieStore):
+            return movies.title_ids
+        if self.title_ids is None:
+            self.title_ids = dict((title, title_id) for title_id, title in enumerate(movies))
+        return self.title_ids
+
+    # returns the TitleResolver of the titles (of their ISO-8859-1 encoding with encoded), building it at the first call.
+    # the readers share it to resolve the title fields that can carry an episode or notes (see resolve_title)
+    def get_title_resolver(self, encoded=False):
+        title_resolver = self.title_resolvers.get(encoded)
+        if title_resolver is None:
+            if encoded:
+                titles = self.get_encoded_titles()
+            else:
+                # (a load() worker reading a byte range looks the titles up in all the movies)
+                titles = self.movies.titles if isinstance(self.movies, _PartialMovies) else self.movies
+            title_resolver = self.title_resolvers[encoded] = TitleResolver(titles)
+        return title_resolver
+
+    # returns the title (or encoded title) a title field refers to, or None when not found.
+    # counts the fields resolved to a shorter title in current_stats
+    def resolve_title(self, field, title_resolver):
+        title = title_resolver.resolve(field)
+        if title is not None and len(title) < len(field) and self.current_stats is not None:
+            self.current_stats.resolved += 1
+        return title
+
+    # returns the column index of select(), building it at the first call
+    def get_movie_index(self):
+        if self.movie_index is None:
+            self.movie_index = MovieIndex(self.movies, self.key_genre)
+        return self.movie_index
+
+    # returns the positions in self.movies of the movies matching all the conditions (see select)
+    def select_positions(self, ranges=None, equals=None, genres=None, ignore_genres=None):
+        if self.enable_lazy_load:
+            properties = list(ranges or {}) + list(equals or {})
+            self.require(properties + [self.key_genre] if genres or ignore_genres else properties)
+        genres = genres or []
+        if len([genre for genre in genres if genre not in self.genre_bits]) > 0:
+            return []  # no movie has the genre
+        equals = dict((key, list(value) if isinstance(value, (list, tuple, set)) else [value])
+                      for key, value in (equals or {}).items())
+        return self.get_movie_index().select(ranges, equals, self.genre_mask(genres),
+                                             self.genre_mask(ignore_genres or []))
+
+    # returns list of tuples: [(title, dict), ...] of the movies matching all the conditions, in the order of self.movies.
+    # the columns used are indexed at the first query, so a selective query only visits the movies it returns.
+    #   ranges: {key: (min, max), ...} inclusive ranges of numerical keys (None for an open end).
+    #           e.g. {IMDBFileProcessor.key_year: (2000, None), IMDBFileProcessor.key_rating: (7.5, 10)}
+    #   equals: {key: value or list of values, ...} e.g. {IMDBFileProcessor.key_country: ['USA', 'Canada']}
+    #   genres: the movies must have all these genres. ignore_genres: and none of these
+    def select(self, ranges=None, equals=None, genres=None, ignore_genres=None):
+        positions = self.select_positions(ranges, equals, genres, ignore_genres)
+        titles = self.get_movie_index().titles
+        return [(titles[position], self.movies[titles[position]]) for position in positions]
+
+    # returns tuple: (titles, matrix) of the movies with a vote distribution. the matrix is a bytearray with
+    # one row of 10 bytes per title (the percent of votes for each rating from 1 to 10, see decode_vote_distribution)
+    def vote_matrix(self):
+        if self.enable_lazy_load:
+            self.require([self.key_vote_distribution])
+        if isinstance(self.movies, MovieStore):
+            matrix, present = self.movies.vector(self.key_vote_distribution)
+            titles = [title for title_id, title in enumerate(self.movies.titles) if present[title_id]]
+            if len(titles) < len(self.movies):
+                matrix = bytearray().join(matrix[title_id * 10:title_id * 10 + 10]
+                                          for title_id in range(len(self.movies)) if present[title_id])
+            return titles, matrix
+        titles = []
+        rows = []
+        for title, movie in self.movies.items():
+            row = movie.get(self.key_vote_distribution)
+            if row is not None:
+                titles.append(title)
+                rows.append(row)
+        return titles, bytearray().join(rows)
+
+    # returns tuple: (titles, means, variances, polarizations) of the ratings weighted by the vote distributions,
+    # for the movies with a vote distribution (as arrays in the order of titles).
+    # polarization is the variance relative to its largest possible value (votes split between 1 and 10), from 0 to 1
+    def vote_distribution_stats(self):
+        titles, matrix = self.vote_matrix()
+        matrix = bytes(matrix)
+        # the matrix has few distinct rows: the stats are computed once per distinct row
+        row_stats = {}
+        for index in range(0, len(matrix), 10):
+            row = matrix[index:index + 10]
+            if row not in row_stats:
+                row_stats[row] = _vote_distribution_stats(row)
+        stats = [row_stats[matrix[index:index + 10]] for index in range(0, len(matrix), 10)]
+        stats_titles = [title for title, title_stats in zip(titles, stats) if title_stats is not None]
+        stats = [title_stats for title_stats in stats if title_stats is not None]
+        means = array('d', [title_stats[0] for title_stats in stats])
+        variances = array('d', [title_stats[1] for title_stats in stats])
+        polarizations = array('d', [title_stats[2] for title_stats in stats])
+        return stats_titles, means, variances, polarizations
+
+    # returns array of the genre bitmask of each movie (0 for none), in the order of self.movies
+    def genre_mask_column(self):
+        if isinstance(self.movies, MovieStore):
+            return self.movies.column(self.key_genre)[0]
+        return array(_genre_typecode, [movie.get(self.key_genre, 0) or 0 for movie in self.movies.values()])
+
+    # returns dict: {key: tuple: (values, mask)} of numerical keys and genres, in the order of self.movies.
+    # a genre's values are 1 for the movies with the genre, else 0. the mask is 1 where a movie has a valid value
+    # (the invalid_numbers are left out, e.g. a year of -1)
+    def numerical_columns(self, keys):
+        if self.enable_lazy_load:
+            self.require([key for key in keys if key in self.numerical_keys] +
+                         ([self.key_genre] if len([key for key in keys if key not in self.numerical_keys]) > 0 else []))
+        columns = {}
+        numerical_keys = [key for key in keys if key in self.numerical_keys]
+        if isinstance(self.movies, MovieStore):
+            for key in numerical_keys:
+                values, mask = self.movies.column(key)
+                if key in self.invalid_numbers:
+                    mask = and_masks(mask, bytearray(map(functools.partial(operator.ne, self.invalid_numbers[key]),
+                                                         values)))
+                columns[key] = (values, mask)
+        else:
+            for key in numerical_keys:
+                invalid = self.invalid_numbers.get(key)
+                values = [movie.get(key) for movie in self.movies.values()]
+                mask = bytearray(value is not None and value != invalid for value in values)
+                columns[key] = (array('d', [value if present else 0.0 for value, present in zip(values, mask)]), mask)
+        genres = [key for key in keys if key not in self.numerical_keys]
+        if len(genres) > 0:
+            genre_masks = self.genre_mask_column()
+            present = bytearray(b'\x01') * len(genre_masks)
+            distinct_masks = set(genre_masks)
+            for genre in genres:
+                genre_bit = self.genre_bits.get(genre, 0)
+                genre_values = dict((genre_mask, 1 if genre_mask & genre_bit else 0) for genre_mask in distinct_masks)
+                columns[genre] = (bytearray(map(genre_values.__getitem__, genre_masks)), present)
+        return columns
+
+    # returns dict: {group: {key: ColumnSummary(count, total, mean, quantiles)}} of the values of each group of movies
+    # (see Aggregation), e.g. the mean rating by genre and year: aggregate([key_rating], by=[key_genre, key_year]).
+    #   keys: numerical keys or genres (the share of the movies with the genre is its mean)
+    #   by: the keys of the groups: numerical, categorical, or key_genre (a movie is in the group of each of its genres).
+    #       the groups are tuples of their values. the movies without a valid value of a by key are left out
+    #   quantiles: e.g. [0.25, 0.5, 0.75], the values at those quantiles in ColumnSummary.quantiles
+    def aggregate(self, keys, by=(), quantiles=()):
+        if self.enable_lazy_load:
+            self.require(list(by))
+        columns = self.numerical_columns(keys)
+        key_codes = [self.value_codes(key) for key in by if key != self.key_genre]
+        genre_subsets = None
+        if self.key_genre in by:
+            bit_positions = genre_positions(self.genre_mask_column(), range(len(self.genre_names)))
+            genre_subsets = [(genre, bit_positions[bit]) for bit, genre in enumerate(self.genre_names)]
+        positions = group_positions(len(self.movies), key_codes, genre_subsets,
+                                    list(by).index(self.key_genre) if self.key_genre in by else 0)
+        return aggregate(columns, positions, quantiles)
+
+    # returns tuple: (codes, values) of a numerical or categorical key: the code of the value of each movie in the order
+    # of self.movies (-1 when missing or invalid), and the value of each code
+    def value_codes(self, key):
+        if key in self.numerical_keys:
+            values, mask = self.numerical_columns([key])[key]
+            distinct_values = sorted(set(compress(values, mask)))
+            value_codes = dict((value, code) for code, value in enumerate(distinct_values))
+            value_type = self.numerical_types[key][1]
+            return ([value_codes[value] if present else -1 for value, present in zip(values, mask)],
+                    [value_type(value) for value in distinct_values])
+        if isinstance(self.movies, MovieStore) and key in self.movies.codes:
+            return self.movies.categorical(key)
+        value_codes = {None: -1}
+        codes = [value_codes.setdefault(value, len(value_codes) - 1)
+                 for value in [movie.get(key) for movie in self.movies.values()]]
+        values = [value for value, code in sorted(value_codes.items(), key=operator.itemgetter(1)) if code >= 0]
+        return codes, values
+
+    # returns tuple: (keys, matrix) of the pearson correlations between the numerical keys and the genres, the columns of
+    # the tables (see Aggregation.correlation_matrix): matrix[i][j] is the correlation of keys[i] and keys[j], over the
+    # movies with both values (nan when a column is constant).
+    #   keys: the numerical keys (by default all of them). genres: by default all of them, the most frequent first
+    def correlation_matrix(self, keys=None, genres=None):
+        keys = list(keys if keys is not None else self.numerical_keys)
+        if self.enable_lazy_load:
+            self.require(keys + [self.key_genre])
+        if genres is None:
+            genres = [genre for genre, _ in sorted(self.genre_count.items(), key=operator.itemgetter(1), reverse=True)]
+        genre_bits = [(genre, bit) for bit, genre in enumerate(self.genre_names) if genre in genres]
+        genre_bits.sort(key=lambda genre_bit: genres.index(genre_bit[0]))
+        matrix = correlation_matrix(self.numerical_columns(keys), keys, self.genre_mask_column(), genre_bits)
+        return keys + [genre for genre, _ in genre_bits], matrix
+
+    # returns the bitmask of a genre, giving a new genre the next bit
+    def intern_genre(self, genre):
+        genre_bit = self.genre_bits.get(genre)
+        if genre_bit is None:
+            genre_bit = self.genre_bits[genre] = 1 << len(self.genre_names)
+            self.genre_names.append(genre)
+        return genre_bit
+
+    # returns the bitmask of a list of genres. genres not seen have no bit (no movie has them)
+    def genre_mask(self, genres):
+        genre_mask = 0
+        for genre in genres:
+            genre_mask |= self.genre_bits.get(genre, 0)
+        return genre_mask
+
+    # returns list of the genre names of a movie
+    def get_genres(self, movie):
+        genre_mask = movie.get(self.key_genre, 0)
+        return [genre for bit, genre in enumerate(self.genre_names) if genre_mask >> bit & 1]
 
-        self.movies_filename = input_directory + "movies.list"
-        self.genres_filename = input_directory + "genres.list"
-        self.ratings_filename = input_directory + "ratings.list"
-        self.business_filename = input_directory + "business.list"
-        self.directors_filename = input_directory + "directors.list"
-        self.runningtimes_filename = input_directory + "running-times.list"
-        self.countries_filename = input_directory + "countries.list"
-        self.languages_filename = input_directory + "language.list"
-        self.mpaa_filename = input_directory + "mpaa-ratings-reasons.list"
-        locale.setlocale(locale.LC_ALL, 'en_US.UTF-8')
-
-    # returns list of tuples: [(title, dict), ...]. case insensitive
-    def get_movies_startwith(self, phrase):
-        return [(k, v) for k, v in self.movies.items() if k.lower().startswith(phrase.lower())]
-
-    # returns list of tuples: [(title, dict), ...]. case insensitive
-    def find_movies_contain(self, phrase):
-        return [(k, v) for k, v in self.movies.items() if k.lower().find(phrase.lower()) != -1]
+    # returns list of the director names of a movie
+    def get_directors(self, movie):
+        return self.director_pool.lookup(movie.get(self.key_director, []))
+
+    # recounts genre_count (number of movies per genre) from the genre bitmasks
+    def count_genres(self):
+        if isinstance(self.movies, MovieStore):
+            genre_masks = self.movies.column(self.key_genre)[0]
+        else:
+            genre_masks = (movie.get(self.key_genre, 0) for movie in self.movies.values())
+        # few distinct combinations of genres: count the masks, then their bits
+        mask_counts = Counter(genre_masks)
+        self.genre_count.clear()
+        for bit, genre in enumerate(self.genre_names):
+            count = sum(mask_count for genre_mask, mask_count in mask_counts.items() if genre_mask >> bit & 1)
+            if count > 0:
+                self.genre_count[genre] = count
 
     # remove all values for a key property
     def clear_property(self, key_name):
+        self.clear_indexes()
+        if isinstance(self.movies, MovieStore):
+            self.movies.clear_property(key_name)
+            return
         for mov in self.movies.values():
             mov.pop(key_name, None)
 
+    # returns whether a list file exists, and tells the stats of the reader run (if any) that it was found
     def check_file_exists(self, filename):
         if not os.path.isfile(filename):
             print("File not found: " + filename)
             return False
+        if self.current_stats is not None:
+            self.current_stats.file_found = True
         if self.enable_print_progress:
             print("\nProcessing: " + filename)
         return True
 
 
-    # reads the movies + year
-    def read_movies(self):
-        if not self.check_file_exists(self.movies_filename):
+    # reads the movies first, then runs the readers for the requested properties in a pool of worker processes.
+    # each reader only touches its own keys, so the merged result is the same as calling the readers in sequence.
+    # list files larger than chunk_size are split into byte ranges that are parsed in parallel and merged in file order.
+    # the readers already run (see loaded_readers) are not run again.
+    #   properties: the property keys to load (default: all_keys)
+    #   workers: number of worker processes (default: number of cpus). 1 reads everything in this process.
+    #   chunk_size: approximate size in bytes of the ranges the large list files are split into
+    #   snapshot: optional snapshot file. loaded instead of the list files when it is up to date, saved otherwise
+    def load(self, properties=None, workers=None, chunk_size=64 * 1024 * 1024, snapshot=None):
+        if properties is None:
+            properties = self.all_keys
+        if snapshot is not None and self.load_snapshot(snapshot, self.property_readers(properties)):
             return
-        duplicates_count = 0
-        series_count = 0
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        self.require(properties, workers, chunk_size)
+        if snapshot is not None:
+            self.save_snapshot(snapshot)
+
+    # returns list of the readers (other than read_movies) that fill in a list of property keys, in the order of readers
+    def property_readers(self, properties):
+        for key in properties:
+            if key not in self.key_readers:
+                raise ValueError("Unknown property: " + str(key))
+        needed = set(self.key_readers[key] for key in properties)
+        return [reader for reader in self.readers[1:] if reader in needed]
+
+    # reads the list files of the properties that are not loaded yet, after movies.list when the titles are not loaded.
+    # with enable_lazy_load, the queries and save_tables call it with the properties they use.
+    # (see load for the arguments. by default the list files are read in this process)
+    def require(self, properties, workers=1, chunk_size=64 * 1024 * 1024):
+        readers = [reader for reader in self.property_readers(properties) if reader not in self.loaded_readers]
+        # the workers need the titles, so the movies are read before the other files
+        if 'read_movies' not in self.loaded_readers:
+            self.run_readers(['read_movies'], workers, chunk_size)
+        if len(readers) > 0:
+            self.run_readers(readers, workers, chunk_size)
+
+    # drops properties that are no longer needed, to free their memory. the other properties of the same list files
+    # and their histograms (e.g. country_count) are dropped too, so that require can read the files again.
+    # the years stay with the titles
+    def drop_properties(self, properties):
+        for reader in self.property_readers(properties):
+            for key, key_reader in self.key_readers.items():
+                if key_reader == reader:
+                    self.clear_property(key)
+            for name in self.reader_state.get(reader, []):
+                setattr(self, name, type(getattr(self, name))())
+            if reader in self.loaded_readers:
+                self.loaded_readers.remove(reader)
+
+    # runs the readers in a pool of worker processes and merges the results into this processor
+    def run_readers(self, readers, workers, chunk_size):
+        tasks = []
+        chunks = {}
+        for reader in readers:
+            ranges = self.chunk_ranges(reader, chunk_size) if workers > 1 else []
+            if len(ranges) > 1:
+                chunks[reader] = {}
+                tasks += [(reader, start, end) for start, end in ranges]
+            else:
+                tasks.append((reader, None, None))
+        workers = min(workers, len(tasks))
+        if workers <= 1:
+            for reader in readers:
+                getattr(self, reader)()
+            return
+
+        self.clear_indexes()
+        started = time.time()
+        pool = multiprocessing.Pool(workers, initializer=_load_worker_init, initargs=(self,))
+        try:
+            for reader, start, values, state, stats in pool.imap_unordered(_load_worker_read, tasks):
+                if start is None:
+                    for title, props in values:
+                        self.movies[title].update(props)
+                    for name, value in state.items():
+                        setattr(self, name, value)
+                    if stats.file_found:
+                        self.mark_loaded(reader)
+                    self.record_stats(stats)
+                    continue
+                chunks[reader][start] = (values, state, stats)
+                if len(chunks[reader]) == len([task for task in tasks if task[0] == reader]):
+                    self.merge_chunks(reader, [chunks[reader][start] for start in sorted(chunks[reader])], started)
+                    del chunks[reader]
+        finally:
+            pool.close()
+            pool.join()
+
+    # describes what a snapshot depends on: the parser version, the settings and the size and mtime of the list files
+    def snapshot_header(self):
+        files = {}
+        for reader, filename_attr in self.reader_files.items():
+            filename = getattr(self, filename_attr)
+            if os.path.isfile(filename):
+                stat = os.stat(filename)
+                files[filename_attr] = [stat.st_size, stat.st_mtime]
+        return {
+            'parser_version': self.parser_version,
+            'python_version': list(sys.version_info[:2]),
+            'compact_store': isinstance(self.movies, MovieStore),
+            'enable_movies': self.enable_movies,
+            'enable_series': self.enable_series,
+            'enable_mpaa_reason': self.enable_mpaa_reason,
+            'files': files
+        }
+
+    # saves the parsed movies and histograms to a binary snapshot file
+    def save_snapshot(self, filename):
+        header = self.snapshot_header()
+        header['readers'] = self.loaded_readers
+        header = json.dumps(header, sort_keys=True).encode("utf-8")
+        state = {
+            'movies': self.movies,
+            'genre_count': self.genre_count,
+            'genre_names': self.genre_names,
+            'genre_bits': self.genre_bits,
+            'country_count': self.country_count,
+            'language_count': self.language_count,
+            'mpaa_count': self.mpaa_count,
+            'director_pool': self.director_pool,
+            'country_pool': self.country_pool,
+            'language_pool': self.language_pool,
+            'length_format_count': self.length_format_count,
+            'business_amounts': self.business_amounts,
+            'currency_not_found': self.currency_not_found,
+            'actor_list': self.actor_list,
+            'actress_list': self.actress_list
+        }
+        # written next to the snapshot and renamed, so a reader never sees a partially written file
+        temp_filename = filename + ".tmp"
+        with io.open(temp_filename, 'wb') as f:
+            f.write(self.snapshot_magic + struct.pack("<I", len(header)) + header)
+            pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+        if os.path.exists(filename):
+            os.remove(filename)
+        os.rename(temp_filename, filename)
+        if self.enable_print_progress:
+            print("\nSaved snapshot: " + filename)
+
+    # loads a snapshot saved by save_snapshot, through a memory map.
+    # returns False (and loads nothing) when the snapshot is missing, or out of date with the list files,
+    # the parser version or the settings, or does not include all the readers given.
+    def load_snapshot(self, filename, readers=None):
+        if not os.path.isfile(filename) or os.path.getsize(filename) == 0:
+            return False
+        with io.open(filename, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                offset = len(self.snapshot_magic) + 4
+                if len(data) < offset or data[:len(self.snapshot_magic)] != self.snapshot_magic:
+                    return False
+                header_length = struct.unpack("<I", data[offset - 4:offset])[0]
+                header = json.loads(data[offset:offset + header_length].decode("utf-8"))
+                saved_readers = header.pop('readers')
+                if header != json.loads(json.dumps(self.snapshot_header())):
+                    return False
+                if readers is not None and len(set(readers) - set(saved_readers)) > 0:
+                    return False
+                if is_python_2:
+                    state = pickle.loads(data[offset + header_length:])
+                else:
+                    payload = memoryview(data)[offset + header_length:]
+                    try:
+                        state = pickle.loads(payload)
+                    finally:
+                        payload.release()
+            finally:
+                data.close()
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.loaded_readers = saved_readers
+        self.title_index = None
+        self.encoded_titles = None
+        self.title_ids = None
+        self.title_resolvers = {}
+        self.clear_indexes()
+        if self.enable_print_progress:
+            print("\nLoaded snapshot: " + filename + " (" + str(len(self.movies)) + " titles)")
+        return True
+
+    # exports the movies to a SQLite database (replacing the file): a movies table with the single valued properties,
+    # the genres and directors in side tables, indexed on year, rating, votes and genre (see SQLiteStore).
+    #   batch_size: number of rows inserted per transaction
+    def save_to_sqlite(self, filename, batch_size=100000):
+        if self.enable_lazy_load:
+            self.require(self.all_keys)
+        save_sqlite(self, filename, batch_size)
+        if self.enable_print_progress:
+            print("\nSaved database: " + filename + " (" + str(len(self.movies)) + " titles)")
+
+    # loads the movies and histograms of a database saved by save_to_sqlite, replacing the movies.
+    # returns False (and loads nothing) when the database is missing or of another schema version
+    def load_from_sqlite(self, filename):
+        movies = {}
+        if isinstance(self.movies, MovieStore):
+            movies = MovieStore(self.numerical_types, self.categorical_keys, {self.key_vote_distribution: 10})
+        if not load_sqlite(self, filename, movies):
+            return False
+        self.title_index = None
+        self.encoded_titles = None
+        self.title_ids = None
+        self.title_resolvers = {}
+        self.clear_indexes()
+        if self.enable_print_progress:
+            print("\nLoaded database: " + filename + " (" + str(len(self.movies)) + " titles)")
+        return True
+
+    # publishes the movies and the histograms to a shared memory block (or to a memory mapped file, with filename) that
+    # worker processes attach to with attach_shared, read only and without copying them. returns the SharedDataset:
+    # keep it open while the workers use it, then close() and unlink() it
+    def publish_shared(self, name=None, filename=None):
+        state = {
+            'genre_count': self.genre_count,
+            'genre_names': self.genre_names,
+            'country_count': self.country_count,
+            'language_count': self.language_count,
+            'mpaa_count': self.mpaa_count,
+            'length_format_count': self.length_format_count,
+            'currency_not_found': self.currency_not_found,
+            'loaded_readers': self.loaded_readers,
+            'enable_movies': self.enable_movies,
+            'enable_series': self.enable_series,
+            'enable_mpaa_reason': self.enable_mpaa_reason
+        }
+        dataset = SharedMovieStore.publish(self.movies, self.numerical_types, self.categorical_keys,
+                                           {self.key_vote_distribution: 10}, [self.key_director],
+                                           [self.key_mpaa_reason], state, {'director_pool': self.director_pool.names},
+                                           name, filename)
+        if self.enable_print_progress:
+            print("\nPublished " + str(len(self.movies)) + " titles to: " + dataset.name + " (" +
+                  "{:,.1f}".format(dataset.size() / 1024.0 / 1024.0) + " MB)")
+        return dataset
+
+    # returns a read only IMDBFileProcessor of a dataset published by publish_shared (by its name or file name).
+    # its movies are a SharedMovieStore over the shared pages: it can query and export them, but not read list files
+    @classmethod
+    def attach_shared(cls, name):
+        processor = cls("")
+        processor.enable_print_progress = False
+        processor.movies = SharedMovieStore.attach(name, cls.numerical_types)
+        for state_name, value in processor.movies.dataset.header['state'].items():
+            setattr(processor, state_name, value)
+        processor.genre_bits = dict((genre, 1 << bit) for bit, genre in enumerate(processor.genre_names))
+        # (the names are only looked up by id, see get_directors)
+        processor.director_pool.names = processor.movies.dataset.strings('director_pool')
+        return processor
+
+    # returns list of byte ranges: [(start, end), ...] for a reader's list file, or [] when it is read as a whole
+    def chunk_ranges(self, reader, chunk_size):
+        filename = getattr(self, self.reader_files[reader])
+        if reader not in self.chunked_readers or not os.path.isfile(filename) or is_gzip_file(filename):
+            return []  # (a compressed file is read as a whole)
+        if os.path.getsize(filename) <= chunk_size:
+            return []
+        if reader not in self.block_readers:
+            return split_list_file(filename, chunk_size)
+        # name blocks depend on the previous lines: split only at the start of a block, after the header
+        header_end = None
+        with io.open(filename, 'rb') as f:
+            for line in f:
+                if line.startswith(b'----\t') and line.strip().endswith(b'------'):
+                    header_end = f.tell()
+                    break
+        if header_end is None:
+            return []
+        return split_list_file(filename, chunk_size, _is_name_line, header_end)
+
+    # merges the per range results of a reader (in file order) the same way the reader treats its records in sequence.
+    #   chunk_results: list of tuples: [(values, state, stats), ...] returned by the workers for each range
+    #   started: the time the ranges started to be read, for the wall time of the merged stats
+    def merge_chunks(self, reader, chunk_results, started=None):
+        self.clear_indexes()
+        if self.enable_print_progress:
+            print("\nProcessing: " + getattr(self, self.reader_files[reader]) +
+                  " (" + str(len(chunk_results)) + " chunks)")
         movies_count = 0
-        # read movie info: title and year
-        with open_imdb(self.movies_filename) as f:
+        duplicates_count = 0
+        for values, state, _ in chunk_results:
+            if reader in ('read_actors', 'read_actresses'):
+                # the persons of each range are appended in file order (a range starts with a new person)
+                state_name = self.reader_state[reader][0]
+                getattr(self, state_name).extend(state[state_name])
+                movies_count += state[state_name].credit_count()
+                continue
+            if reader == 'read_director':
+                # the director ids of each range are translated to the ids of this processor, the lists appended in
+                # file order
+                director_ids = [self.director_pool.intern(name) for name in state['director_pool'].names]
+                for title, props in values:
+                    movie = self.movies[title]
+                    movie_director_ids = array('i', [director_ids[director_id]
+                                                     for director_id in props[self.key_director]])
+                    if movie.get(self.key_director) is None:
+                        movie[self.key_director] = movie_director_ids
+                        movies_count += 1
+                    else:
+                        movie[self.key_director].extend(movie_director_ids)
+                continue
+            if reader == 'read_movies':
+                for title, props in values:
+                    if title not in self.movies:
+                        self.add_movie(title, props)
+                        movies_count += 1
+                    else:
+                        duplicates_count += 1
+                continue
+            if reader == 'read_genres':
+                # the genre bits of each range are translated to the bits of this processor.
+                # the genres are added in the order the range saw them, as the sequential reader would
+                for genre in state['genre_names']:
+                    self.intern_genre(genre)
+                genre_masks = {}
+                for title, props in values:
+                    movie = self.movies[title]
+                    genre_mask = genre_masks.get(props[self.key_genre])
+                    if genre_mask is None:
+                        genre_mask = 0
+                        for bit, genre in enumerate(state['genre_names']):
+                            if props[self.key_genre] >> bit & 1:
+                                genre_mask |= self.intern_genre(genre)
+                        genre_masks[props[self.key_genre]] = genre_mask
+                    if movie.get(self.key_genre, 0) == 0:
+                        movies_count += 1
+                    movie[self.key_genre] = movie.get(self.key_genre, 0) | genre_mask
+                continue
+            for title, props in values:
+                movie = self.movies[title]
+                if reader == 'read_ratings':
+                    # the last record wins
+                    movies_count += 1
+                    movie.update(props)
+                elif reader == 'read_length':
+                    # the first parsed length wins (the format counts are added below)
+                    movie_length = movie.get(self.key_length, -2)
+                    if movie_length != -2:
+                        duplicates_count += 1
+                    if movie_length < 0:
+                        movie[self.key_length] = props[self.key_length]
+                        if props[self.key_length] >= 0:
+                            movies_count += 1
+                else:
+                    # the first record wins
+                    key = self.key_country if reader == 'read_country' else self.key_language
+                    reader_count = getattr(self, self.reader_state[reader][0])
+                    reader_pool = getattr(self, self.reader_state[reader][1])
+                    if key not in movie:
+                        value = movie[key] = reader_pool.share(props[key])
+                        reader_count[value] = reader_count.get(value, 0) + 1
+                        movies_count += 1
+                    else:
+                        duplicates_count += 1
+        if reader == 'read_genres':
+            self.count_genres()
+        if reader == 'read_length':
+            for _, state, _ in chunk_results:
+                for length_format, count in state['length_format_count'].items():
+                    self.length_format_count[length_format] = self.length_format_count.get(length_format, 0) + count
+        if self.enable_print_progress:
+            print("[done]\nAdded " + self.reader_files[reader].replace("_filename", "") + " info to " +
+                  str(movies_count) + " titles.")
+            if duplicates_count > 0:
+                print("Skipped " + str(duplicates_count) + " duplicate records across chunks.")
+        # the counters of the ranges are added up. the titles matched and the duplicates across the ranges are
+        # only known after the merge
+        stats = ReaderStats(reader, getattr(self, self.reader_files[reader]))
+        for _, _, chunk_stats in chunk_results:
+            stats.add(chunk_stats)
+        stats.matched = movies_count
+        stats.duplicates += duplicates_count
+        if started is not None:
+            stats.seconds = time.time() - started
+        if stats.file_found:
+            self.mark_loaded(reader)
+        self.record_stats(stats)
+
+    # yields MovieEntry(title, year) for each record of movies.list. the year is -1 when not valid
+    def iter_movies(self, start=0, end=None):
+        with open_imdb(self.movies_filename, start, end) as f:
             regex_movie = re.compile("\t+")
-            for line in f:
+            for line in self.count_lines(f):
                 tokens = regex_movie.split(line)
                 if len(tokens) == 2:
-                    movie_name = tokens[0].strip()
                     try:
                         movie_year = int(tokens[1])
                     except:
                         # no valid year information
                         movie_year = -1
-                        #continue
+                    yield MovieEntry(tokens[0].strip(), movie_year)
+                else:
+                    self.count_mismatch(line)
 
-                    if movie_name.startswith('"'):
-                        series_count += 1
+    # binary version of iter_movies, for read_movies. the titles skipped by the enable_series / enable_movies settings
+    # are not decoded: their entries are just '"' (a series) or '' (a movie)
+    def _binary_movies(self, start=0, end=None):
+        series_entry = MovieEntry('"', -1)
+        movie_entry = MovieEntry('', -1)
+        years = {}  # year field -> year
+        for lines in self.count_blocks(iter_list_blocks(self.movies_filename, start, end)):
+            for line in lines:
+                # the line must have two fields separated by tabs
+                tab = line.find(b'\t')
+                year_field = line[tab:].lstrip(b'\t')
+                if tab >= 0 and b'\t' not in year_field:
+                    title = line[:tab].strip(_whitespace)
+                    if title.startswith(b'"'):
                         if not self.enable_series:
-                            continue # skip series / tv name
-                    else:
-                        movies_count += 1
-                        if not self.enable_movies:
-                            continue  # skip movie
+                            yield series_entry
+                            continue
+                    elif not self.enable_movies:
+                        yield movie_entry
+                        continue
+                    movie_year = years.get(year_field)
+                    if movie_year is None:
+                        try:
+                            movie_year = int(year_field.decode("ISO-8859-1"))
+                        except:
+                            # no valid year information
+                            movie_year = -1
+                        years[year_field] = movie_year
+                    yield MovieEntry(title.decode("ISO-8859-1"), movie_year)
+                else:
+                    self.count_mismatch(line)
 
-                    if movie_name not in self.movies:
-                        self.movies[movie_name] = {self.key_year: movie_year}
-                    else:
-                        duplicates_count += 1
-                elif self.enable_print_mismatch:
-                    print(line.strip())
+    # reads the movies + year
+    @_measured_reader
+    def read_movies(self, start=0, end=None):
+        if not self.check_file_exists(self.movies_filename):
+            return
+        self.clear_indexes()
+        duplicates_count = 0
+        series_count = 0
+        movies_count = 0
+        titles_count = len(self.movies)
+        # read movie info: title and year
+        entries = self._binary_movies if self.enable_binary_lines else self.iter_movies
+        for entry in entries(start, end):
+            if entry.title.startswith('"'):
+                series_count += 1
+                if not self.enable_series:
+                    continue # skip series / tv name
+            else:
+                movies_count += 1
+                if not self.enable_movies:
+                    continue  # skip movie
+
+            if entry.title not in self.movies:
+                self.add_movie(entry.title, {self.key_year: entry.year})
+            else:
+                duplicates_count += 1
+        stats = self.current_stats
+        stats.matched = len(self.movies) - titles_count
+        stats.duplicates = duplicates_count
+        stats.skipped = ((series_count if not self.enable_series else 0) +
+                         (movies_count if not self.enable_movies else 0))
         if self.enable_print_progress:
             print("[done]\nAdded " + str(len(self.movies)) + " titles.")
             if not self.enable_series and series_count > 0:
@@ -163,34 +1529,62 @@ class IMDBFileProcessor(object):
             if duplicates_count > 0:
                 print("Skipped " + str(duplicates_count) + " duplicate titles.")
 
-    # read movie genres: one [movie]\t[genre] per line. can have multiple genres per movie
-    def read_genres(self):
-        if not self.check_file_exists(self.genres_filename):
-            return
-        not_found_count = 0
-        with open_imdb(self.genres_filename) as f:
+    # yields GenreEntry(title, genre): one [movie]\t[genre] per line. can have multiple genres per movie
+    def iter_genres(self, start=0, end=None):
+        with open_imdb(self.genres_filename, start, end) as f:
             regex_genre = re.compile("\t+")
-            movies_count = 0
-            for line in f:
+            for line in self.count_lines(f):
                 tokens = regex_genre.split(line)
                 if len(tokens) == 2:
-                    movie_name = tokens[0]
-                    movie_genre = tokens[1]
-                    movie = self.movies.get(movie_name)
-
-                    if movie is not None:
-                        # movie[key_genre] = movie.get(key_genre, []) + [movie_genre.strip()]
-                        genre_list = movie.get(self.key_genre, [])
-                        if len(genre_list) == 0:
-                            movies_count += 1
-                        genre = movie_genre.strip()
-                        movie[self.key_genre] = genre_list + [genre]
-                        self.genre_count[genre] = self.genre_count.get(genre, 0) + 1
-                    else:
-                        not_found_count += 1
-                elif self.enable_print_mismatch:
-                    print(line.strip())
+                    yield GenreEntry(tokens[0], tokens[1].strip())
+                else:
+                    self.count_mismatch(line)
+
+    # binary version of iter_genres, for read_genres. the entries of unknown titles are (None, None)
+    def _binary_genres(self, start=0, end=None):
+        encoded_titles = self.get_encoded_titles()
+        unknown_entry = GenreEntry(None, None)
+        genres = {}  # genre field -> genre
+        for lines in self.count_blocks(iter_list_blocks(self.genres_filename, start, end)):
+            for line in lines:
+                # the line must have two fields separated by tabs
+                tab = line.find(b'\t')
+                genre_field = line[tab:].lstrip(b'\t')
+                if tab >= 0 and b'\t' not in genre_field:
+                    title = encoded_titles.get(line[:tab])
+                    if title is None:
+                        yield unknown_entry
+                        continue
+                    genre = genres.get(genre_field)
+                    if genre is None:
+                        genre = genres[genre_field] = genre_field.strip(_whitespace).decode("ISO-8859-1")
+                    yield GenreEntry(title, genre)
+                else:
+                    self.count_mismatch(line)
 
+    # read movie genres, stored as a bitmask of the genre bits (see get_genres)
+    @_measured_reader
+    def read_genres(self, start=0, end=None):
+        if not self.check_file_exists(self.genres_filename):
+            return
+        self.clear_indexes()
+        not_found_count = 0
+        movies_count = 0
+        entries = self._binary_genres if self.enable_binary_lines else self.iter_genres
+        for entry in entries(start, end):
+            movie = self.movies.get(entry.title)
+            if movie is not None:
+                genre_mask = movie.get(self.key_genre, 0)
+                if genre_mask == 0:
+                    movies_count += 1
+                movie[self.key_genre] = genre_mask | self.intern_genre(entry.genre)
+            else:
+                not_found_count += 1
+        self.count_genres()
+
+        stats = self.current_stats
+        stats.matched = movies_count
+        stats.not_found = not_found_count
         if self.enable_print_progress:
             print("[done]\nAdded genere to " + str(movies_count) + " movies.")
             if not_found_count > 0:
@@ -199,53 +1593,97 @@ class IMDBFileProcessor(object):
             print(textwrap.TextWrapper().fill(str(sorted(self.genre_count.items(),
                                                          key=operator.itemgetter(1), reverse=True))))
 
-    # read movie rating information: vote distribution, votes, rating
-    def read_ratings(self):
-        if not self.check_file_exists(self.ratings_filename):
-            return
-
-        not_found_count = 0
-        with open_imdb(self.ratings_filename) as f:
+    # yields RatingEntry(title, vote_distribution, votes, rating): votes is an int, rating a float and
+    # vote_distribution the decoded 10 byte row (see decode_vote_distribution), or None when the code is not valid
+    def iter_ratings(self, start=0, end=None):
+        with open_imdb(self.ratings_filename, start, end) as f:
             # example record: '      0000.00005      69   7.8  Zero Hour (2013)'
             regex_rating_title = re.compile("\s*\S{10}\s+[0-9]+\s+[0-9\.]+\s+")
             regex_rating = re.compile("\s+")
-            movies_count = 0
-            for line in f:
+            for line in self.count_lines(f):
                 title_match = regex_rating_title.match(line)
                 if title_match is not None:
-                    movie_title = line[title_match.end():].strip()
-                    movie = self.movies.get(movie_title)
-                    if movie is not None:
-                        movie_rating_items = regex_rating.split(line[:title_match.end()].strip())
-                        if movie_rating_items is not None:
-                            if len(movie_rating_items) == 3:
-                                movie[self.key_vote_distribution] = movie_rating_items[0]
-                                movie[self.key_votes] = movie_rating_items[1]
-                                movie[self.key_rating] = movie_rating_items[2]
-                                movies_count += 1
-                            else:
-                                if self.enable_print_mismatch:
-                                    print(line.strip())
+                    movie_rating_items = regex_rating.split(line[:title_match.end()].strip())
+                    try:
+                        movie_rating = float(movie_rating_items[2])
+                    except ValueError:
+                        movie_rating = None
+                    if len(movie_rating_items) == 3 and movie_rating is not None:
+                        yield RatingEntry(line[title_match.end():].strip(),
+                                          decode_vote_distribution(movie_rating_items[0]),
+                                          int(movie_rating_items[1]), movie_rating)
                     else:
-                        not_found_count += 1
-                elif self.enable_print_mismatch:
-                    print(line.strip())
-            if self.enable_print_progress:
-                print("[done]\nAdded ratings to " + str(movies_count) + " movies.")
-                if not_found_count > 0:
-                    print("Skipped " + str(not_found_count) + " records for titles not found")
+                        self.count_mismatch(line)
+                else:
+                    self.count_mismatch(line)
 
-    # read movie business information: budget and revenue
-    def read_business(self):
-        if not self.check_file_exists(self.business_filename):
+    # binary version of iter_ratings, for read_ratings. the entries of unknown titles are (None, None, None, None)
+    def _binary_ratings(self, start=0, end=None):
+        regex_rating_title = re.compile(_regex_whitespace + b"*" + _regex_non_whitespace + b"{10}" + _regex_whitespace +
+                                        b"+[0-9]+" + _regex_whitespace + b"+[0-9\\.]+" + _regex_whitespace + b"+")
+        regex_rating = re.compile(_regex_whitespace + b"+")
+        encoded_titles = self.get_encoded_titles()
+        unknown_entry = RatingEntry(None, None, None, None)
+        vote_distributions = {}  # vote distribution code -> decoded vote distribution
+        for lines in self.count_blocks(iter_list_blocks(self.ratings_filename, start, end)):
+            for line in lines:
+                title_match = regex_rating_title.match(line)
+                if title_match is not None:
+                    movie_rating_items = regex_rating.split(line[:title_match.end()].strip(_whitespace))
+                    try:
+                        movie_rating = float(movie_rating_items[2])
+                    except ValueError:
+                        movie_rating = None
+                    if len(movie_rating_items) == 3 and movie_rating is not None:
+                        title = encoded_titles.get(line[title_match.end():].strip(_whitespace))
+                        if title is None:
+                            yield unknown_entry
+                        else:
+                            vote_distribution = vote_distributions.get(movie_rating_items[0], False)
+                            if vote_distribution is False:
+                                vote_distribution = vote_distributions[movie_rating_items[0]] = \
+                                    decode_vote_distribution(movie_rating_items[0].decode("ISO-8859-1"))
+                            yield RatingEntry(title, vote_distribution, int(movie_rating_items[1]), movie_rating)
+                    else:
+                        self.count_mismatch(line)
+                else:
+                    self.count_mismatch(line)
+
+    # read movie rating information: vote distribution, votes, rating
+    @_measured_reader
+    def read_ratings(self, start=0, end=None):
+        if not self.check_file_exists(self.ratings_filename):
             return
-        movies_count = 0
+        self.clear_indexes()
+
         not_found_count = 0
-        with open_imdb(self.business_filename) as f:
-            movie = None
-            movie_budget = None
-            movie_gross = None
-            for line in f:
+        movies_count = 0
+        entries = self._binary_ratings if self.enable_binary_lines else self.iter_ratings
+        for entry in entries(start, end):
+            movie = self.movies.get(entry.title)
+            if movie is not None:
+                if entry.vote_distribution is not None:
+                    movie[self.key_vote_distribution] = entry.vote_distribution
+                movie[self.key_votes] = entry.votes
+                movie[self.key_rating] = entry.rating
+                movies_count += 1
+            else:
+                not_found_count += 1
+        stats = self.current_stats
+        stats.matched = movies_count
+        stats.not_found = not_found_count
+        if self.enable_print_progress:
+            print("[done]\nAdded ratings to " + str(movies_count) + " movies.")
+            if not_found_count > 0:
+                print("Skipped " + str(not_found_count) + " records for titles not found")
+
+    # yields BusinessBlock(title, amounts) for each movie block, with the BT: and GR: amounts parsed but not converted:
+    # list of tuple: (kind, amount, currency, date) (see BusinessAmounts.parse_amount_line)
+    def iter_business_blocks(self, start=0, end=None):
+        with open_imdb(self.business_filename, start, end) as f:
+            movie_title = None
+            amounts = []
+            for line in self.count_lines(f):
                 """ example:
                 -------------------------------------------------------------------------------
                 MV: Deadpool (2016)
@@ -256,69 +1694,110 @@ class IMDBFileProcessor(object):
                 -------------------------------------------------------------------------------
                 """
                 if line.startswith('----------------------------------------------------------'):
-                    if movie is not None:
-                        if movie_budget is not None:
-                            try:
-                                movie[self.key_budget] = int(movie_budget)
-                            except:
-                                pass
-                        if movie_gross is not None:
-                            try:
-                                movie[self.key_revenue] = int(movie_gross)
-                            except:
-                                pass
-                        movies_count += 1
-                    movie = None
-                    movie_budget = None
-                    movie_gross = None
+                    if movie_title is not None:
+                        yield BusinessBlock(movie_title, amounts)
+                    movie_title = None
+                    amounts = []
                 elif line.startswith('MV: '):
                     movie_title = line[4:].strip()
-                    movie = self.movies.get(movie_title)
-                    if movie is None:
-                        not_found_count += 1
-                elif line.startswith('BT:'):
-                    try:
-                        movie_budget = CurrencyEstimator.exchange(locale.atof(line[8:].split(" ")[0]),
-                                                                  line[3:8].strip())
-                        #if movie_budget is None:
-                        # currency_not_found[line[3:8].strip()] = currency_not_found.get(line[3:8].strip(), 0) + 1
-                        # print(movie_title + ": " + line.strip()
-                    except:
-                        pass
-                        # print(movie_title + ": " + line.strip()
+                elif line.startswith('BT:') or line.startswith('GR:'):
+                    amount = parse_amount_line(line)
+                    if amount is not None:
+                        amounts.append(amount)
 
-                elif line.startswith('GR:'):
-                    try:
-                        new_gross = CurrencyEstimator.exchange(locale.atof(line[8:].split(" ")[0]),
-                                                               line[3:8].strip())
-                        if new_gross is not None:
-                            if movie_gross is None or new_gross > movie_gross:
-                                movie_gross = new_gross  # lazy: assuming max gross is the worldwide revenue
-                            # else:
-                            # currency_not_found[line[3:8].strip()] = currency_not_found.get(line[3:8].strip(), 0) + 1
-                            # print(movie_title + ": " + line.strip()
-                    except:
-                        pass
-                        # print(movie_title + ": " + line
+    # yields BusinessEntry(title, budget, revenue) for each movie block. budget and revenue are in USD, or None
+    def iter_business(self, start=0, end=None):
+        for block in self.iter_business_blocks(start, end):
+            business_amounts = BusinessAmounts()
+            business_amounts.add_block(block.title, block.amounts)
+            yield BusinessEntry(*next(business_amounts.values()))
+
+    # binary version of iter_business_blocks, for read_business. the blocks of unknown titles are skipped,
+    # with a (None, []) block
+    def _binary_business_blocks(self):
+        encoded_titles = self.get_encoded_titles()
+        unknown_block = BusinessBlock(None, [])
+        movie_title = None
+        amount_lines = []  # the BT: and GR: lines of the block, parsed at its end when the title is known
+        for lines in self.count_blocks(iter_list_blocks(self.business_filename)):
+            for line in lines:
+                if line.startswith(b'----------------------------------------------------------'):
+                    if movie_title is not None:
+                        movie_title = encoded_titles.get(movie_title)
+                        if movie_title is None:
+                            yield unknown_block
+                        else:
+                            amounts = [parse_amount_line(amount_line.decode("ISO-8859-1"))
+                                       for amount_line in amount_lines]
+                            yield BusinessBlock(movie_title, [amount for amount in amounts if amount is not None])
+                    movie_title = None
+                    amount_lines = []
+                elif line.startswith(b'MV: '):
+                    movie_title = line[4:].strip(_whitespace)
+                elif line.startswith(b'BT:') or line.startswith(b'GR:'):
+                    amount_lines.append(line)
+
+    # read movie business information: budget and revenue.
+    # the amounts are kept in their currency in business_amounts, and converted to USD in one batch (see convert_business)
+    @_measured_reader
+    def read_business(self):
+        if not self.check_file_exists(self.business_filename):
+            return
+        not_found_count = 0
+        self.business_amounts = BusinessAmounts()
+        blocks = self._binary_business_blocks if self.enable_binary_lines else self.iter_business_blocks
+        for block in blocks():
+            movie = self.movies.get(block.title) if block.title is not None else None
+            if movie is None:
+                not_found_count += 1
+                continue
+            # the undated amounts are converted at the rates of the middle of the movie's year
+            year = movie.get(self.key_year, -1)
+            self.business_amounts.add_block(block.title, block.amounts,
+                                            datetime.date(year, 7, 1).toordinal() if year > 0 else 0)
+        movies_count = self.convert_business()
+        stats = self.current_stats
+        stats.matched = movies_count
+        stats.not_found = not_found_count
         if self.enable_print_progress:
             print("[done]\nAdded business info to " + str(movies_count) + " movies.")
             if not_found_count > 0:
                 print("Skipped " + str(not_found_count) + " records for titles not found")
 
-    # read the movie directors info
-    def read_director(self):
-        if not self.check_file_exists(self.directors_filename):
-            return
+    # sets the budget and revenue of the movies from the amounts kept by read_business, converted to a currency at the
+    # current rates of CurrencyEstimator (e.g. after load_rates), without reading business.list again.
+    # the amounts in unknown currencies are counted in currency_not_found. returns the number of movie blocks
+    def convert_business(self, to_currency='USD'):
+        self.clear_indexes()
+        self.clear_property(self.key_budget)
+        self.clear_property(self.key_revenue)
+        converted = self.business_amounts.convert(to_currency)
+        self.currency_not_found = self.business_amounts.unknown_currencies(converted)
         movies_count = 0
-        not_found_count = 0
-        with open_imdb(self.directors_filename) as f:
+        for title, budget, revenue in self.business_amounts.values(to_currency, converted):
+            movie = self.movies[title]
+            if budget is not None:
+                movie[self.key_budget] = budget
+            if revenue is not None:
+                movie[self.key_revenue] = revenue
+            movies_count += 1
+        return movies_count
+
+    # yields DirectorEntry(director, title) for each title of each director.
+    # the title is as listed, e.g. can still end with the episode in { } or a role note
+    def iter_directors(self, start=0, end=None, name=None):
+        return self.iter_credits(self.directors_filename, DirectorEntry, start, end, name)
+
+    # yields entry_type(name, title) for each title of each name of a list file of name blocks (directors.list,
+    # actors.list, actresses.list): a line with the name and its first title, then a line with each other title.
+    #   name: the name of the block when the range starts at one of its other titles (see lookup)
+    def iter_credits(self, filename, entry_type, start=0, end=None, name=None):
+        with open_imdb(filename, start, end) as f:
             regex_director_movie = re.compile("\t+")
-            regex_movie_year = re.compile("\((\d\d\d\d|\?\?\?\?)[^\)]*\)\s*(\(V\)|\(TV\)|\(VG\))*")
-            # note: currently ignoring the info at the end of the movie_field enclosed in { }. e.g. the episode number
-            current_director = None
-            data_started = False
+            current_director = name
+            data_started = start > 0  # a byte range after the first one starts after the header
 
-            for line in f:
+            for line in self.count_lines(f):
                 line = line.strip()
                 tokens = regex_director_movie.split(line)
                 movie_field = None
@@ -330,8 +1809,8 @@ class IMDBFileProcessor(object):
                 elif len(tokens) == 2:
                     current_director = tokens[0]
                     movie_field = tokens[1]
-                elif self.enable_print_mismatch:
-                    print(line)
+                else:
+                    self.count_mismatch(line)
 
                 if (current_director is not None) and (movie_field is not None):
                     if current_director == "----" and movie_field == "------":
@@ -342,138 +1821,302 @@ class IMDBFileProcessor(object):
                         """
                         data_started = True
                         continue
-                    if not data_started:
+                    if data_started and len(movie_field) > 0:
+                        yield entry_type(current_director, movie_field)
+
+    # binary version of iter_credits, for read_director and read_cast. the titles are looked up (as the readers do)
+    # before decoding: the entry of a title found is (name, title of the movie), and (None, None) otherwise
+    def _binary_credits(self, filename, entry_type, start=0, end=None):
+        regex_director_movie = re.compile(b"\t+")
+        encoded_titles = self.get_encoded_titles()
+        title_resolver = self.get_title_resolver(encoded=True)
+        unknown_entry = entry_type(None, None)
+        current_director = None
+        director_name = None  # current_director decoded, when needed
+        data_started = start > 0  # a byte range after the first one starts after the header
+
+        for lines in self.count_blocks(iter_list_blocks(filename, start, end)):
+            for line in lines:
+                line = line.strip(_whitespace)
+                tokens = regex_director_movie.split(line)
+                movie_field = None
+                if len(tokens) == 1:
+                    movie_field = tokens[0]
+                elif len(tokens) == 2:
+                    if tokens[0] != current_director:
+                        current_director = tokens[0]
+                        director_name = None
+                    movie_field = tokens[1]
+                else:
+                    self.count_mismatch(line)
+
+                if (current_director is not None) and (movie_field is not None):
+                    if current_director == b"----" and movie_field == b"------":
+                        data_started = True
                         continue
-                    movie_title = movie_field
-                    if self.movies.get(movie_title) is None:
-                        title_match = regex_movie_year.search(movie_field)
-                        if title_match is not None:
-                            movie_title = movie_field[:title_match.end()].strip()
-                    movie = self.movies.get(movie_title)
-                    if movie is not None:
-                        director_list = movie.get(self.key_director, [])
-                        if len(director_list) == 0:
-                            movies_count += 1
-                        movie[self.key_director] = director_list + [current_director]
-                    elif len(movie_title) > 0:
-                        not_found_count += 1
+                    if data_started and len(movie_field) > 0:
+                        title = self.resolve_title(movie_field, title_resolver)
+                        if title is None:
+                            yield unknown_entry
+                            continue
+                        title = encoded_titles[title]
+                        if director_name is None:
+                            director_name = current_director.decode("ISO-8859-1")
+                        yield entry_type(director_name, title)
+
+    # read the movie directors info
+    @_measured_reader
+    def read_director(self, start=0, end=None):
+        if not self.check_file_exists(self.directors_filename):
+            return
+        self.clear_indexes()
+        movies_count = 0
+        not_found_count = 0
+        # note: currently ignoring the info at the end of the movie_field enclosed in { }. e.g. the episode number
+        title_resolver = self.get_title_resolver()
+        binary = self.enable_binary_lines
+        entries = self._binary_credits if binary else self.iter_credits
+        for entry in entries(self.directors_filename, DirectorEntry, start, end):
+            # (the binary reader resolves the titles itself: its entries of the titles not found are None)
+            movie_title = entry.title if binary else self.resolve_title(entry.title, title_resolver)
+            movie = self.movies.get(movie_title) if movie_title is not None else None
+            if movie is not None:
+                director_id = self.director_pool.intern(entry.director)
+                director_ids = movie.get(self.key_director)
+                if director_ids is None:
+                    movie[self.key_director] = array('i', [director_id])
+                    movies_count += 1
+                else:
+                    director_ids.append(director_id)
+            else:
+                not_found_count += 1
+        stats = self.current_stats
+        stats.matched = movies_count
+        stats.not_found = not_found_count
         if self.enable_print_progress:
             print("[done]\nAdded director info to " + str(movies_count) + " movies.")
             if not_found_count > 0:
                 print("Skipped " + str(not_found_count) + " records for titles not found")
 
-    # read the movie length info
-    def read_length(self):
-        if not self.check_file_exists(self.runningtimes_filename):
+    # yields CastEntry(person, title) for each title of each actor.
+    # the title is as listed, e.g. can still end with the episode in { }, the role in [ ] and the billing in < >
+    def iter_actors(self, start=0, end=None, name=None):
+        return self.iter_credits(self.actors_filename, CastEntry, start, end, name)
+
+    # yields CastEntry(person, title) for each title of each actress (see iter_actors)
+    def iter_actresses(self, start=0, end=None, name=None):
+        return self.iter_credits(self.actresses_filename, CastEntry, start, end, name)
+
+    # read the titles of each actor into actor_list (see get_cast_graph)
+    @_measured_reader
+    def read_actors(self, start=0, end=None):
+        self.read_cast(self.actors_filename, self.actor_list, start, end)
+
+    # read the titles of each actress into actress_list (see get_cast_graph)
+    @_measured_reader
+    def read_actresses(self, start=0, end=None):
+        self.read_cast(self.actresses_filename, self.actress_list, start, end)
+
+    # reads the ids of the titles of each person of a cast list file into a CastList, in file order.
+    # the persons without a known title are left out
+    def read_cast(self, filename, cast_list, start=0, end=None):
+        if not self.check_file_exists(filename):
             return
-        with open_imdb(self.runningtimes_filename) as f:
+        self.clear_indexes()
+        credits_count = 0
+        not_found_count = 0
+        persons_count = len(cast_list)
+        title_ids = self.get_title_ids()
+        title_resolver = self.get_title_resolver()
+        binary = self.enable_binary_lines
+        entries = self._binary_credits if binary else self.iter_credits
+        current_person = None
+        for entry in entries(filename, CastEntry, start, end):
+            # (the binary reader resolves the titles itself: its entries of the titles not found are None)
+            movie_title = entry.title if binary else self.resolve_title(entry.title, title_resolver)
+            title_id = title_ids.get(movie_title) if movie_title is not None else None
+            if title_id is None:
+                not_found_count += 1
+                continue
+            # (the name of a block is the same object for all its entries)
+            if entry.person is not current_person:
+                current_person = entry.person
+                cast_list.add_person(current_person)
+            cast_list.add_title(title_id)
+            credits_count += 1
+        stats = self.current_stats
+        stats.matched = credits_count
+        stats.not_found = not_found_count
+        if self.enable_print_progress:
+            print("[done]\nAdded " + str(credits_count) + " titles of " + str(len(cast_list) - persons_count) +
+                  " persons.")
+            if not_found_count > 0:
+                print("Skipped " + str(not_found_count) + " records for titles not found")
+
+    # returns the CastGraph of actors.list and actresses.list (the actresses numbered after the actors), building it
+    # at the first call: the titles of each person and the persons of each title, by the title ids of get_title_ids
+    def get_cast_graph(self):
+        if self.enable_lazy_load:
+            self.require([self.key_actors, self.key_actresses])
+        if self.cast_graph is None:
+            self.cast_graph = CastGraph([self.actor_list, self.actress_list], len(self.movies))
+        return self.cast_graph
+
+    # returns list of tuples: [(name, number of shared titles), ...] of the persons who share the most titles with a
+    # person (by name, e.g. "Hanks, Tom"), the most first.
+    #   limit: returns at most limit persons
+    def get_co_stars(self, name, limit=None):
+        cast_graph = self.get_cast_graph()
+        person_id = cast_graph.person_id(name)
+        if person_id is None:
+            return []
+        return [(cast_graph.person_name(co_star), count)
+                for co_star, count in cast_graph.co_stars(person_id).most_common(limit)]
+
+    # yields LengthEntry(title, length) with the length in minutes, or -1 when it could not be parsed.
+    # counts the records of each running time format in length_format_count
+    def iter_lengths(self, start=0, end=None):
+        with open_imdb(self.runningtimes_filename, start, end) as f:
             # read movie info: title and length
             regex_time = re.compile("\t+")
-            movies_count = 0
-            duplicates_count = 0
-            not_found_count = 0
-            for line in f:
+            for line in self.count_lines(f):
                 # examples
                 # The Movie (2008)	West Germany:26	(Worldwide Short Film Festival)
                 # Werewolf Tales (2003) (V)				USA:80
                 line = line.strip()
                 tokens = regex_time.split(line)
                 if len(tokens) >= 2:
-                    try:
-                        movie_title = tokens[0].strip()
-                        movie = self.movies.get(movie_title)
-                        if movie is not None:
-                            movie_length = movie.get(self.key_length, -2)
-                            if (movie_length != -2):
-                                duplicates_count += 1
-                            # only if the first length entry for this movie
-                            # or if the previous record could not be parsed correctly (-1)
-                            if movie_length >= 0:
-                                # duplicates  e.g. (uncut, extended, ...) versions (62296 of records)
-                                continue
-                        else:
-                            not_found_count += 1
-                            #if self.enable_print_mismatch:
-                            #    print("not found movie: " + line
-                            continue
-
-                        movie_length = -1
-                        try:
-                            # simplest case: e.g. 85  (909210 of all records)
-                            movie_length =  locale.atof(tokens[1])
-                        except:
-                            try:
-                                # e.g USA:80  (311487 of all records)
-                                movie_length = locale.atof(tokens[1][tokens[1].find(":") + 1:])
-                            except:
-                                try:
-                                    # e.g. Canada:10:53  (1039 of all records)
-                                    movie_length = (locale.atof(tokens[1].split(":")[1]) +     # minutes
-                                                    locale.atof(tokens[1].split(":")[2]) / 60.0) # seconds
-                                except:
-                                    try:
-                                        # all kind of garbage (251 of all records)
-                                        # e.g. "USA:10'30", "50 6 episodes", "UK:10x30", "Japan:2 1/2"
-                                        # take the first numerical component which works for most cases
-                                        movie_length = locale.atof(
-                                                            re.split("\s+", re.sub("(\D)", " ", tokens[1]).strip())[0])
-                                    except:
-                                        pass
-
-                        movie[self.key_length] = movie_length
-                        if movie_length >= 0:
-                            movies_count += 1
+                    # e.g. 85, USA:80, Canada:10:53 or garbage like USA:10'30 (see NumberParser.parse_duration)
+                    movie_length, length_format = parse_duration(tokens[1])
+                    self.length_format_count[length_format] = self.length_format_count.get(length_format, 0) + 1
+                    yield LengthEntry(tokens[0].strip(), movie_length)
+                else:
+                    self.count_mismatch(line)
 
-                    except Exception as ex:
-                        if self.enable_print_mismatch:
-                            print(line)
-                            print(ex)
+    # binary version of iter_lengths, for read_length. the entries of unknown titles are (None, -1)
+    def _binary_lengths(self, start=0, end=None):
+        encoded_titles = self.get_encoded_titles()
+        unknown_entry = LengthEntry(None, -1)
+        durations = {}  # running time field -> tuple: (minutes, format)
+        for lines in self.count_blocks(iter_list_blocks(self.runningtimes_filename, start, end)):
+            for line in lines:
+                line = line.strip(_whitespace)
+                tab = line.find(b'\t')
+                if tab >= 0:
+                    # the second field, up to the next tabs
+                    time_field = line[tab:].lstrip(b'\t')
+                    next_tab = time_field.find(b'\t')
+                    if next_tab >= 0:
+                        time_field = time_field[:next_tab]
+                    # the format of all the records is counted, like iter_lengths does
+                    duration = durations.get(time_field)
+                    if duration is None:
+                        duration = durations[time_field] = parse_duration(time_field.decode("ISO-8859-1"))
+                    self.length_format_count[duration[1]] = self.length_format_count.get(duration[1], 0) + 1
+                    title = encoded_titles.get(line[:tab].strip(_whitespace))
+                    yield unknown_entry if title is None else LengthEntry(title, duration[0])
                 else:
-                    if self.enable_print_mismatch:
-                        print(line)
+                    self.count_mismatch(line)
+
+    # read the movie length info
+    @_measured_reader
+    def read_length(self, start=0, end=None):
+        if not self.check_file_exists(self.runningtimes_filename):
+            return
+        self.clear_indexes()
+        movies_count = 0
+        duplicates_count = 0
+        not_found_count = 0
+        entries = self._binary_lengths if self.enable_binary_lines else self.iter_lengths
+        for entry in entries(start, end):
+            movie = self.movies.get(entry.title)
+            if movie is not None:
+                movie_length = movie.get(self.key_length, -2)
+                if (movie_length != -2):
+                    duplicates_count += 1
+                # only if the first length entry for this movie
+                # or if the previous record could not be parsed correctly (-1)
+                if movie_length >= 0:
+                    # duplicates  e.g. (uncut, extended, ...) versions (62296 of records)
+                    continue
+            else:
+                not_found_count += 1
+                continue
+
+            movie[self.key_length] = entry.length
+            if entry.length >= 0:
+                movies_count += 1
+        stats = self.current_stats
+        stats.matched = movies_count
+        stats.not_found = not_found_count
+        stats.duplicates = duplicates_count
         if self.enable_print_progress:
             print("[done]\nAdded length info to " + str(movies_count) + " movies.")
             print("Skipped " + str(not_found_count) + " records for titles not found")
             print("Skipped " + str(duplicates_count) + " duplicate records.")
+            print("Running time formats: " + str(sorted(self.length_format_count.items())))
+
+    # yields CountryEntry(title, country)
+    def iter_countries(self, start=0, end=None):
+        with open_imdb(self.countries_filename, start, end) as f:
+            regex_country = re.compile("\t+")
+            for line in self.count_lines(f):
+                # example: "Jodaeiye Nader az Simin (2011)				Iran"
+                tokens = regex_country.split(line.strip())
+                if len(tokens) >= 2:
+                    yield CountryEntry(tokens[0].strip(), tokens[1].strip())
+
+    # binary version of iter_countries, for read_country. the entries of unknown titles are (None, None)
+    def _binary_countries(self, start=0, end=None):
+        encoded_titles = self.get_encoded_titles()
+        unknown_entry = CountryEntry(None, None)
+        values = {}  # second field -> value
+        for lines in self.count_blocks(iter_list_blocks(self.countries_filename, start, end)):
+            for line in lines:
+                line = line.strip(_whitespace)
+                tab = line.find(b'\t')
+                if tab >= 0:
+                    title = encoded_titles.get(line[:tab].strip(_whitespace))
+                    if title is None:
+                        yield unknown_entry
+                        continue
+                    # the second field, up to the next tabs
+                    field = line[tab:].lstrip(b'\t')
+                    next_tab = field.find(b'\t')
+                    if next_tab >= 0:
+                        field = field[:next_tab]
+                    value = values.get(field)
+                    if value is None:
+                        value = values[field] = field.strip(_whitespace).decode("ISO-8859-1")
+                    yield CountryEntry(title, value)
 
     # read country information
-    def read_country(self):
+    @_measured_reader
+    def read_country(self, start=0, end=None):
         if not self.check_file_exists(self.countries_filename):
             return
+        self.clear_indexes()
+        movies_count = 0
+        duplicates_count = 0
+        not_found_count = 0
+        entries = self._binary_countries if self.enable_binary_lines else self.iter_countries
+        for entry in entries(start, end):
+            movie = self.movies.get(entry.title)
+            if movie is not None:
+                if self.key_country not in movie:
+                    country = self.country_pool.share(entry.country)
+                    self.country_count[country] = self.country_count.get(country, 0) + 1
+                    movie[self.key_country] = country
+                    movies_count += 1
+                else:
+                    duplicates_count += 1
+            else:
+                not_found_count += 1
 
-        with open_imdb(self.countries_filename) as f:
-            # read movie info: title and country
-            regex_time = re.compile("\t+")
-            movies_count = 0
-            duplicates_count = 0
-            not_found_count = 0
-            for line in f:
-                # example: "Jodaeiye Nader az Simin (2011)				Iran"
-                line = line.strip()
-                tokens = regex_time.split(line)
-                if len(tokens) >= 2:
-                    try:
-                        movie_title = tokens[0].strip()
-                        movie = self.movies.get(movie_title)
-                        if movie is not None:
-                            if self.key_country not in movie:
-                                country = tokens[1].strip()
-                                self.country_count[country] = self.country_count.get(country, 0) + 1
-                                movie[self.key_country] = country
-                                movies_count += 1
-                            else:
-                                duplicates_count += 1
-                                continue
-                        else:
-                            not_found_count += 1
-                            # if self.enable_print_mismatch:
-                            #    print("not found movie: " + line
-                            continue
-                    except Exception as ex:
-                        if self.enable_print_mismatch:
-                            print(line)
-                            print(ex)
-
+        stats = self.current_stats
+        stats.matched = movies_count
+        stats.not_found = not_found_count
+        stats.duplicates = duplicates_count
         if self.enable_print_progress:
             print("[done]\nAdded country info to " + str(movies_count) + " titles.")
             print("Skipped " + str(not_found_count) + " records for titles not found")
@@ -482,44 +2125,66 @@ class IMDBFileProcessor(object):
             print(textwrap.TextWrapper().fill(str(sorted(self.country_count.items(),
                                                          key=operator.itemgetter(1), reverse=True))))
 
+    # yields LanguageEntry(title, language)
+    def iter_languages(self, start=0, end=None):
+        with open_imdb(self.languages_filename, start, end) as f:
+            regex_language = re.compile("\t+")
+            for line in self.count_lines(f):
+                # example: "Jodaeiye Nader az Simin (2011)				Persian"
+                tokens = regex_language.split(line.strip())
+                if len(tokens) >= 2:
+                    yield LanguageEntry(tokens[0].strip(), tokens[1].strip())
+
+    # binary version of iter_languages, for read_language. the entries of unknown titles are (None, None)
+    def _binary_languages(self, start=0, end=None):
+        encoded_titles = self.get_encoded_titles()
+        unknown_entry = LanguageEntry(None, None)
+        values = {}  # second field -> value
+        for lines in self.count_blocks(iter_list_blocks(self.languages_filename, start, end)):
+            for line in lines:
+                line = line.strip(_whitespace)
+                tab = line.find(b'\t')
+                if tab >= 0:
+                    title = encoded_titles.get(line[:tab].strip(_whitespace))
+                    if title is None:
+                        yield unknown_entry
+                        continue
+                    # the second field, up to the next tabs
+                    field = line[tab:].lstrip(b'\t')
+                    next_tab = field.find(b'\t')
+                    if next_tab >= 0:
+                        field = field[:next_tab]
+                    value = values.get(field)
+                    if value is None:
+                        value = values[field] = field.strip(_whitespace).decode("ISO-8859-1")
+                    yield LanguageEntry(title, value)
+
     # read language information
-    def read_language(self):
+    @_measured_reader
+    def read_language(self, start=0, end=None):
         if not self.check_file_exists(self.languages_filename):
             return
-        with open_imdb(self.languages_filename) as f:
-            # read movie info: title and language
-            # example: "Jodaeiye Nader az Simin (2011)				Persian"
-            regex_time = re.compile("\t+")
-            movies_count = 0
-            duplicates_count = 0
-            not_found_count = 0
-            line_count = 0
-            for line in f:
-                line_count += 1
-                line = line.strip()
-                tokens = regex_time.split(line)
-                if len(tokens) >= 2:
-                    try:
-                        movie_title = tokens[0].strip()
-                        movie = self.movies.get(movie_title)
-                        if movie is not None:
-                            if self.key_language not in movie:
-                                language = tokens[1].strip()
-                                self.language_count[language] = self.language_count.get(language, 0) + 1
-                                movie[self.key_language] = language
-                                movies_count += 1
-                            else:
-                                duplicates_count += 1
-                                continue
-                        else:
-                            not_found_count += 1
-                            # if self.enable_print_mismatch:
-                            #    print("not found movie: " + line
-                            continue
-                    except Exception as ex:
-                        if self.enable_print_mismatch:
-                            print(line)
-                            print(ex)
+        self.clear_indexes()
+        movies_count = 0
+        duplicates_count = 0
+        not_found_count = 0
+        entries = self._binary_languages if self.enable_binary_lines else self.iter_languages
+        for entry in entries(start, end):
+            movie = self.movies.get(entry.title)
+            if movie is not None:
+                if self.key_language not in movie:
+                    language = self.language_pool.share(entry.language)
+                    self.language_count[language] = self.language_count.get(language, 0) + 1
+                    movie[self.key_language] = language
+                    movies_count += 1
+                else:
+                    duplicates_count += 1
+            else:
+                not_found_count += 1
+        stats = self.current_stats
+        stats.matched = movies_count
+        stats.not_found = not_found_count
+        stats.duplicates = duplicates_count
         if self.enable_print_progress:
             print("\n[done]\nAdded language info to " + str(movies_count) + " titles.")
             print("Skipped " + str(not_found_count) + " records for titles not found")
@@ -528,19 +2193,13 @@ class IMDBFileProcessor(object):
             print(textwrap.TextWrapper().fill(str(sorted(self.language_count.items(),
                                                          key=operator.itemgetter(1), reverse=True))))
 
-    # read movie mpaa information
-    def read_mpaa(self):
-        # todo: certificates.list  may contain further rating information
-        if not self.check_file_exists(self.mpaa_filename):
-            return
-        movies_count = 0
-        valid_mpaa = {'PG', 'PG-13','R','NV-17'}
-        with open_imdb(self.mpaa_filename) as f:
-            not_found_count = 0
-            duplicates_count = 0
-            movie = None
+    # yields MpaaEntry(title, mpaa, reason) for each movie block.
+    # mpaa is the first word after "rated" (not necessarily a valid rating), reason is the whole text
+    def iter_mpaa(self, start=0, end=None):
+        with open_imdb(self.mpaa_filename, start, end) as f:
+            movie_title = None
             mpaa_string = ""
-            for line in f:
+            for line in self.count_lines(f):
                 line = line.strip()
                 """ example:
                 -------------------------------------------------------------------------------
@@ -551,33 +2210,81 @@ class IMDBFileProcessor(object):
                 -------------------------------------------------------------------------------
                 """
                 if line.startswith('---------------------------'):
-                    if movie is not None:
-                        if self.key_mpaa in movie:
-                            duplicates_count += 1
-                            continue
+                    if movie_title is not None:
                         mpaa_string = mpaa_string.strip()
                         mpaa_reason = mpaa_string
                         idx_rated = mpaa_string.lower().find("rated ")
                         if idx_rated != -1:
                             mpaa_string = mpaa_string[idx_rated+5:].strip()
-                        mpaa = mpaa_string.split(" ")[0]
-                        if mpaa is not None:
-                            if mpaa in valid_mpaa:
-                                movie[self.key_mpaa] = mpaa
-                            self.mpaa_count[mpaa] = self.mpaa_count.get(mpaa, 0) + 1
-
-                        if self.enable_mpaa_reason and mpaa_reason is not None:
-                            movie[self.key_mpaa_reason] = mpaa_reason
-                        movies_count += 1
-                    movie = None
+                        yield MpaaEntry(movie_title, mpaa_string.split(" ")[0], mpaa_reason)
+                    movie_title = None
                     mpaa_string = ""
                 elif line.startswith('MV: '):
                     movie_title = line[4:].strip()
-                    movie = self.movies.get(movie_title)
-                    if movie is None:
-                        not_found_count += 1
                 elif line.startswith('RE:'):
                     mpaa_string += line[3:].strip() + " "
+
+    # binary version of iter_mpaa, for read_mpaa. the blocks of unknown titles are skipped,
+    # with a (None, None, None) entry
+    def _binary_mpaa(self):
+        encoded_titles = self.get_encoded_titles()
+        unknown_entry = MpaaEntry(None, None, None)
+        movie_title = None
+        mpaa_lines = []  # the RE: lines of the block, decoded at its end when the title is known
+        for lines in self.count_blocks(iter_list_blocks(self.mpaa_filename)):
+            for line in lines:
+                line = line.strip(_whitespace)
+                if line.startswith(b'---------------------------'):
+                    if movie_title is not None:
+                        movie_title = encoded_titles.get(movie_title)
+                        if movie_title is None:
+                            yield unknown_entry
+                        else:
+                            mpaa_string = u"".join(mpaa_line[3:].strip(_whitespace).decode("ISO-8859-1") + u" "
+                                                   for mpaa_line in mpaa_lines).strip()
+                            mpaa_reason = mpaa_string
+                            idx_rated = mpaa_string.lower().find("rated ")
+                            if idx_rated != -1:
+                                mpaa_string = mpaa_string[idx_rated+5:].strip()
+                            yield MpaaEntry(movie_title, mpaa_string.split(" ")[0], mpaa_reason)
+                    movie_title = None
+                    mpaa_lines = []
+                elif line.startswith(b'MV: '):
+                    movie_title = line[4:].strip(_whitespace)
+                elif line.startswith(b'RE:'):
+                    mpaa_lines.append(line)
+
+    # read movie mpaa information
+    @_measured_reader
+    def read_mpaa(self):
+        # todo: certificates.list  may contain further rating information
+        if not self.check_file_exists(self.mpaa_filename):
+            return
+        self.clear_indexes()
+        movies_count = 0
+        not_found_count = 0
+        duplicates_count = 0
+        valid_mpaa = {'PG', 'PG-13','R','NV-17'}
+        entries = self._binary_mpaa if self.enable_binary_lines else self.iter_mpaa
+        for entry in entries():
+            movie = self.movies.get(entry.title)
+            if movie is None:
+                not_found_count += 1
+                continue
+            if self.key_mpaa in movie:
+                duplicates_count += 1
+                continue
+            if entry.mpaa in valid_mpaa:
+                movie[self.key_mpaa] = entry.mpaa
+            self.mpaa_count[entry.mpaa] = self.mpaa_count.get(entry.mpaa, 0) + 1
+
+            if self.enable_mpaa_reason:
+                movie[self.key_mpaa_reason] = entry.reason
+            movies_count += 1
+        stats = self.current_stats
+        stats.matched = movies_count
+        stats.not_found = not_found_count
+        stats.duplicates = duplicates_count
         if self.enable_print_progress:
             print("[done]\nAdded rating info to " + str(movies_count) + " movies.")
             if not_found_count > 0:
@@ -588,6 +2295,334 @@ class IMDBFileProcessor(object):
             print(textwrap.TextWrapper().fill(str(sorted(self.mpaa_count.items(),
                                                          key=operator.itemgetter(1), reverse=True))))
 
+    # yields KeywordEntry(title, keyword) for each keyword of each title of keywords.list
+    def iter_keywords(self, start=0, end=None):
+        with open_imdb(self.keywords_filename, start, end) as f:
+            regex_keyword = re.compile("\t+")
+            data_started = start > 0  # a byte range after the first one starts after the header
+            for line in self.count_lines(f):
+                if not data_started:
+                    # the keywords of the titles follow the summary of all the keywords, after the header:
+                    """
+                    8: THE KEYWORDS LIST
+                    ====================
+                    """
+                    data_started = line.rstrip().endswith("THE KEYWORDS LIST")
+                    continue
+                tokens = regex_keyword.split(line)
+                if len(tokens) == 2:
+                    yield KeywordEntry(tokens[0], tokens[1].strip())
+                else:
+                    self.count_mismatch(line)
+
+    # binary version of iter_keywords, for build_text_index. the entries of unknown titles are (None, None)
+    def _binary_keywords(self, start=0, end=None):
+        encoded_titles = self.get_encoded_titles()
+        unknown_entry = KeywordEntry(None, None)
+        keywords = {}  # keyword field -> keyword
+        data_started = start > 0
+        for lines in self.count_blocks(iter_list_blocks(self.keywords_filename, start, end)):
+            for line in lines:
+                if not data_started:
+                    data_started = line.rstrip(_whitespace).endswith(b"THE KEYWORDS LIST")
+                    continue
+                # the line must have two fields separated by tabs
+                tab = line.find(b'\t')
+                keyword_field = line[tab:].lstrip(b'\t')
+                if tab >= 0 and b'\t' not in keyword_field:
+                    title = encoded_titles.get(line[:tab])
+                    if title is None:
+                        yield unknown_entry
+                        continue
+                    keyword = keywords.get(keyword_field)
+                    if keyword is None:
+                        keyword = keywords[keyword_field] = keyword_field.strip(_whitespace).decode("ISO-8859-1")
+                    yield KeywordEntry(title, keyword)
+                else:
+                    self.count_mismatch(line)
+
+    # yields PlotEntry(title, plot) for each movie block of plot.list. the plot is all the PL: lines of the block
+    # (one or more summaries), joined
+    def iter_plots(self, start=0, end=None):
+        with open_imdb(self.plot_filename, start, end) as f:
+            movie_title = None
+            plot_lines = []
+            for line in self.count_lines(f):
+                """ example:
+                -------------------------------------------------------------------------------
+                MV: The Revenant (2015)
+
+                PL: A frontiersman on a fur trading expedition in the 1820s fights for survival
+                PL: after being mauled by a bear and left for dead by members of his own hunting team.
+
+                BY: Anonymous
+
+                -------------------------------------------------------------------------------
+                """
+                if line.startswith('---------------------------'):
+                    if movie_title is not None:
+                        yield PlotEntry(movie_title, " ".join(plot_lines))
+                    movie_title = None
+                    plot_lines = []
+                elif line.startswith('MV: '):
+                    movie_title = line[4:].strip()
+                elif line.startswith('PL:'):
+                    plot_lines.append(line[3:].strip())
+
+    # binary version of iter_plots, for build_text_index. the blocks of unknown titles are skipped,
+    # with a (None, None) entry
+    def _binary_plots(self):
+        encoded_titles = self.get_encoded_titles()
+        unknown_entry = PlotEntry(None, None)
+        movie_title = None
+        plot_lines = []  # the PL: lines of the block, decoded at its end when the title is known
+        for lines in self.count_blocks(iter_list_blocks(self.plot_filename)):
+            for line in lines:
+                if line.startswith(b'---------------------------'):
+                    if movie_title is not None:
+                        movie_title = encoded_titles.get(movie_title)
+                        if movie_title is None:
+                            yield unknown_entry
+                        else:
+                            yield PlotEntry(movie_title, b" ".join(plot_line[3:].strip(_whitespace)
+                                                                   for plot_line in plot_lines).decode("ISO-8859-1"))
+                    movie_title = None
+                    plot_lines = []
+                elif line.startswith(b'MV: '):
+                    movie_title = line[4:].strip(_whitespace)
+                elif line.startswith(b'PL:'):
+                    plot_lines.append(line)
+
+    # describes what an index of the list files depends on: the titles (their ids are their positions in self.movies)
+    # and the list files (filename attributes)
+    def list_index_header(self, filename_attrs):
+        files = {}
+        for filename_attr in filename_attrs:
+            filename = getattr(self, filename_attr)
+            if os.path.isfile(filename):
+                stat = os.stat(filename)
+                files[filename_attr] = [stat.st_size, stat.st_mtime]
+        return {
+            'parser_version': self.parser_version,
+            'title_count': len(self.movies),
+            'titles_digest': hashlib.md5(u"\n".join(self.movies).encode("utf-8")).hexdigest(),
+            'files': files
+        }
+
+    # describes what a text index depends on: the titles and the keywords.list and plot.list files
+    def text_index_header(self):
+        return self.list_index_header(['keywords_filename', 'plot_filename'])
+
+    # opens (memory maps) an index file (of index_type: TextIndex or OffsetIndex) saved with a header. returns the index,
+    # or None when the file is missing, or out of date with the titles or the list files
+    def open_list_index(self, index_type, filename, header):
+        if self.enable_lazy_load:
+            self.require([])
+        if not os.path.isfile(filename):
+            return None
+        index = index_type.open(filename)
+        if dict((name, index.header.get(name)) for name in header) != json.loads(json.dumps(header)):
+            index.close()
+            return None
+        return index
+
+    # builds the full-text index of the keywords (keywords.list) and plot summaries (plot.list) of the movies, saves it
+    # to a file (replacing it) and opens it as text_index (see TextIndex and search_text). a missing list file is
+    # left out of the index. raises RuntimeError on python older than 3.3, before reading the list files
+    def build_text_index(self, filename):
+        check_python_version()
+        if self.enable_lazy_load:
+            self.require([])
+        title_ids = self.get_title_ids()
+        builder = TextIndexBuilder([self.text_keyword, self.text_plot])
+        binary = self.enable_binary_lines
+        sources = [(self.keywords_filename, self._binary_keywords if binary else self.iter_keywords, self.text_keyword,
+                    lambda entry: [keyword_term(entry.keyword)]),
+                   (self.plot_filename, self._binary_plots if binary else self.iter_plots, self.text_plot,
+                    lambda entry: tokenize(entry.plot))]
+        for list_filename, entries, field, terms in sources:
+            if not self.check_file_exists(list_filename):
+                continue
+            movies_count = 0
+            not_found_count = 0
+            for entry in entries():
+                title_id = title_ids.get(entry.title) if entry.title is not None else None
+                if title_id is None:
+                    not_found_count += 1
+                    continue
+                builder.add(field, title_id, terms(entry))
+                movies_count += 1
+            if self.enable_print_progress:
+                print("[done]\nIndexed " + str(movies_count) + " " + field + " records.")
+                if not_found_count > 0:
+                    print("Skipped " + str(not_found_count) + " records for titles not found")
+        if self.text_index is not None:
+            self.text_index.close()
+        self.text_index = builder.write(filename, self.text_index_header())
+        if self.enable_print_progress:
+            print("\nSaved text index: " + filename + " (" +
+                  "{:,.1f}".format(self.text_index.size() / 1024.0 / 1024.0) + " MB)")
+
+    # opens (memory maps) a text index saved by build_text_index as text_index. returns False (and opens nothing) when
+    # the file is missing, or out of date with the titles or the list files. raises RuntimeError on python older than
+    # 3.3
+    def open_text_index(self, filename):
+        check_python_version()
+        text_index = self.open_list_index(TextIndex, filename, self.text_index_header())
+        if text_index is None:
+            return False
+        if self.text_index is not None:
+            self.text_index.close()
+        self.text_index = text_index
+        return True
+
+    # returns list of tuples: [(title, dict), ...] of the movies matching all the conditions, in the order of
+    # self.movies, from the text index (see build_text_index and open_text_index):
+    #   keywords: the movies must have all these keywords, e.g. ['time-travel']
+    #   words: and all the words of these texts in their plot, e.g. ['space station']
+    #   any_keywords, any_words: and at least one of these keywords or plot words
+    #   ranges, equals, genres, ignore_genres: and match these conditions (see select)
+    def search_text(self, keywords=(), words=(), any_keywords=(), any_words=(), ranges=None, equals=None, genres=None,
+                    ignore_genres=None):
+        if self.text_index is None:
+            raise ValueError("No text index: see build_text_index and open_text_index")
+        all_terms = ([(self.text_keyword, keyword_term(keyword)) for keyword in keywords] +
+                     [(self.text_plot, word) for text in words for word in sorted(tokenize(text))])
+        any_terms = ([(self.text_keyword, keyword_term(keyword)) for keyword in any_keywords] +
+                     [(self.text_plot, word) for text in any_words for word in sorted(tokenize(text))])
+        positions = None
+        if ranges or equals or genres or ignore_genres:
+            positions = self.select_positions(ranges, equals, genres, ignore_genres)
+        titles = self.get_movie_index().titles
+        return [(titles[position], self.movies[titles[position]])
+                for position in self.text_index.search(all_terms, any_terms, positions)]
+
+    # describes what an offset index depends on: the titles and the list files of offset_files
+    def offset_index_header(self):
+        return self.list_index_header([filename_attr for _, filename_attr, _, _ in self.offset_files])
+
+    # adds the byte ranges of the records of the known titles in a list file to an OffsetIndexBuilder (see
+    # offset_files for the records). returns tuple: (number of records, number of records of titles not found)
+    def _index_offsets(self, builder, name, filename, records):
+        encoded_titles = self.get_encoded_titles()
+        title_ids = self.get_title_ids()
+        title_resolver = self.get_title_resolver(encoded=True)
+        regex_credit = re.compile(b"\t+")
+        records_count = 0
+        not_found_count = 0
+        offset = 0
+        block_title = None  # the title field of the movie block being read
+        block_start = 0
+        for lines in iter_list_blocks(filename):
+            for line in lines:
+                start = offset
+                offset += len(line)
+                field = None
+                if records == 'line':
+                    tab = line.find(b'\t')
+                    if tab > 0:
+                        field = line[:tab].strip(_whitespace)
+                elif records == 'rating':
+                    fields = line.split(None, 3)
+                    if len(fields) == 4:
+                        field = fields[3].strip(_whitespace)
+                elif records == 'block':
+                    if line.startswith(b'MV: '):
+                        block_title = line[4:].strip(_whitespace)
+                        block_start = start
+                    elif line.startswith(b'---------------------------') and block_title is not None:
+                        field = block_title
+                        start = block_start
+                        block_title = None
+                else:
+                    tokens = regex_credit.split(line.strip(_whitespace))
+                    if len(tokens) == 2:
+                        builder.add_block(name, start, offset)
+                    if len(tokens) <= 2 and len(tokens[-1]) > 0:
+                        field = tokens[-1]
+                if field is None:
+                    continue
+                title = encoded_titles.get(field if records != 'credit' else title_resolver.resolve(field))
+                if title is None:
+                    not_found_count += 1
+                    continue
+                builder.add(name, title_ids[title], start, offset)
+                records_count += 1
+        return records_count, not_found_count
+
+    # builds the byte offset index of the records of each title in the list files (see OffsetIndex and lookup), saves it
+    # to a file (replacing it) and opens it as offset_index. the missing and the gzip compressed list files (which
+    # cannot be read from an offset) are left out of the index. raises RuntimeError on python older than 3.3, before
+    # reading the list files
+    def build_offset_index(self, filename):
+        check_python_version()
+        if self.enable_lazy_load:
+            self.require([])
+        builder = OffsetIndexBuilder([(name, records == 'credit') for name, _, _, records in self.offset_files])
+        for name, filename_attr, _, records in self.offset_files:
+            list_filename = getattr(self, filename_attr)
+            if not os.path.isfile(list_filename) or is_gzip_file(list_filename):
+                continue
+            if self.enable_print_progress:
+                print("\nIndexing: " + list_filename)
+            records_count, not_found_count = self._index_offsets(builder, name, list_filename, records)
+            if self.enable_print_progress:
+                print("[done]\nIndexed " + str(records_count) + " records.")
+                if not_found_count > 0:
+                    print("Skipped " + str(not_found_count) + " records for titles not found")
+        if self.offset_index is not None:
+            self.offset_index.close()
+        self.offset_index = builder.write(filename, self.offset_index_header())
+        if self.enable_print_progress:
+            print("\nSaved offset index: " + filename + " (" +
+                  "{:,.1f}".format(self.offset_index.size() / 1024.0 / 1024.0) + " MB)")
+
+    # opens (memory maps) an offset index saved by build_offset_index as offset_index. returns False (and opens nothing)
+    # when the file is missing, or out of date with the titles or the list files. raises RuntimeError on python older than
+    # 3.3
+    def open_offset_index(self, filename):
+        check_python_version()
+        offset_index = self.open_list_index(OffsetIndex, filename, self.offset_index_header())
+        if offset_index is None:
+            return False
+        if self.offset_index is not None:
+            self.offset_index.close()
+        self.offset_index = offset_index
+        return True
+
+    # returns dict: {list file name: list of entries} of the records of a title in the list files (see offset_files),
+    # parsed by the iter_* generator of each file, e.g. lookup(title)['ratings'] is a list of RatingEntry. only the
+    # records of the title are read, from their offsets in the offset index (see build_offset_index and
+    # open_offset_index). the files without records of the title are left out
+    def lookup(self, title):
+        if self.offset_index is None:
+            raise ValueError("No offset index: see build_offset_index and open_offset_index")
+        title_id = self.get_title_ids().get(title)
+        results = {}
+        if title_id is None:
+            return results
+        # (iter_lengths counts the running time formats of the whole file)
+        length_format_count = self.length_format_count
+        self.length_format_count = {}
+        try:
+            for name, _, iter_name, records in self.offset_files:
+                entries = []
+                for start, end, name_start, name_end in self.offset_index.ranges(name, title_id):
+                    credit_name = None
+                    if name_start is not None and name_start < start:
+                        # (the name is on the first line of the block)
+                        name_entry = next(getattr(self, iter_name)(name_start, name_end), None)
+                        credit_name = name_entry[0] if name_entry is not None else None
+                    if records == 'credit':
+                        entries += getattr(self, iter_name)(start, end, credit_name)
+                    else:
+                        entries += getattr(self, iter_name)(start, end)
+                if len(entries) > 0:
+                    results[name] = entries
+        finally:
+            self.length_format_count = length_format_count
+        return results
+
     # saves the currently processed information into a tab delimited text file
     def save_to_table(self,
                       filename,
@@ -598,85 +2633,90 @@ class IMDBFileProcessor(object):
                       ignore_when_missing=False, # whether to ignore the movie when any of the specified properties are missing
                       replace_missing_number=-1,
                       replace_missing_text="",
-                      output_encoding="utf-8"
-                      # todo:
-                      # min_year=-1,
-                      # max_year=3000,
-                      # min_votes=-1,
-                      # max_votes=sys.maxint,
-                      # min_rating=-1,
-                      # max_rating=10,
+                      output_encoding="utf-8",
+                      min_year=None, # only include the movies in the year range (inclusive)
+                      max_year=None,
+                      min_votes=None, # only include the movies in the votes range (inclusive)
+                      max_votes=None,
+                      min_rating=None, # only include the movies in the rating range (inclusive)
+                      max_rating=None,
+                      query=None # only include the movies matching a query: dict of select() arguments
                       ):
+        self.save_tables([{
+            'filename': filename,
+            'save_properties': save_properties,
+            'save_genres_keys': save_genres_keys,
+            'only_movie_genres': only_movie_genres,
+            'ignore_movie_genres': ignore_movie_genres,
+            'ignore_when_missing': ignore_when_missing,
+            'replace_missing_number': replace_missing_number,
+            'replace_missing_text': replace_missing_text,
+            'output_encoding': output_encoding,
+            'min_year': min_year,
+            'max_year': max_year,
+            'min_votes': min_votes,
+            'max_votes': max_votes,
+            'min_rating': min_rating,
+            'max_rating': max_rating,
+            'query': query
+        }])
 
-        print("\nSaving table to: " + filename)
-
-        if is_python_2:
-            out_file = io.open(filename, "w", encoding=output_encoding)
-        else:
-            out_file = open(filename, "w", encoding=output_encoding)
-
-        if save_properties is None:
-            save_properties = self.all_keys
-
-        if save_genres_keys is None and len(self.genre_count) > 0:
-            save_genres_keys = self.genre_count.keys()
-
-        header = "title\t" + re.sub("(\s|\[|\]|')", "", str(save_properties)).replace(",", "\t")
-        if self.key_genre in save_properties:
-            genres_header = ""
-            if len(save_genres_keys) > 0:
-                genres_header = re.sub("(\s|\[|\]|')", "", str(save_genres_keys)).replace(",", "\t")
-            header = header.replace(self.key_genre, genres_header)
-
-        header += "\n"
-        if is_python_2:
-            header = unicode(header, encoding=output_encoding, errors='replace')
-        out_file.write(header)
-
-        num_rows = 0
-        for title, info in self.movies.items():
-            line = title
-            ignore_movie = False
-            for key in save_properties:
-                curr_info = info.get(key)
-                if key == self.key_genre:
-                    curr_info = (curr_info if curr_info is not None else [])
-                    for genre in save_genres_keys:
-                        line += "\t" + str(1 if genre in curr_info else 0)
-
-                    if only_movie_genres is not None:
-                        for genre in curr_info:
-                            if genre not in only_movie_genres:
-                                ignore_movie = True
-                                break
-
-                    if ignore_movie_genres is not None:
-                        for genre in curr_info:
-                            if genre in ignore_movie_genres:
-                                ignore_movie = True
-                                break
-
-                    continue
-                else:
-                    if curr_info is None:
-                        if ignore_when_missing:
-                            ignore_movie = True
-                            break
-                        if key in self.numerical_keys:
-                            curr_info = replace_missing_number
-                        else:
-                            curr_info = replace_missing_text
-
-                    if type(curr_info) != str:
-                        curr_info = str(curr_info)
-
-                    line += '\t' + curr_info
-            if not ignore_movie:
-                line += "\n"
-                if is_python_2:
-                    line = unicode(line, encoding=output_encoding, errors='replace')
-                out_file.write(line)
-                num_rows += 1
+    # returns set of the property keys used by the tables of save_tables: their columns and filters
+    def table_properties(self, tables):
+        properties = set()
+        for table in tables:
+            save_properties = table.get('save_properties')
+            properties.update(self.all_keys if save_properties is None else save_properties)
+            query = table.get('query') or {}
+            properties.update(list(query.get('ranges') or {}) + list(query.get('equals') or {}))
+            if table.get('only_movie_genres') is not None or table.get('ignore_movie_genres') is not None or \
+                    query.get('genres') or query.get('ignore_genres'):
+                properties.add(self.key_genre)
+            properties.update(key for key in self.numerical_keys
+                              if table.get('min_' + key) is not None or table.get('max_' + key) is not None)
+        return properties
 
-        print("[Done] rows: " + str(num_rows))
-        out_file.close()
+    # saves several tab delimited tables in a single pass over the movies.
+    #   tables: list of dicts, each with the save_to_table arguments of one table. e.g.
+    #           [{'filename': 'all.txt'}, {'filename': 'animations.txt', 'only_movie_genres': ['Animation']}]
+    #           min_[key] / max_[key] can be given for any of the numerical_keys
+    #   buffer_rows: number of rows collected before each write to a file
+    def save_tables(self, tables, buffer_rows=10000):
+        if self.enable_lazy_load:
+            self.require(self.table_properties(tables))
+        writers = []
+        try:
+            for table in tables:
+                table = dict(table)
+                # the rows of a table with a query or min/max ranges are selected through the column indexes
+                query = dict(table.pop('query', None) or {})
+                ranges = dict(query.get('ranges') or {})
+                for key in self.numerical_keys:
+                    min_value = table.pop('min_' + key, None)
+                    max_value = table.pop('max_' + key, None)
+                    if min_value is not None or max_value is not None:
+                        ranges[key] = (min_value, max_value)
+                query['ranges'] = ranges
+                writer = _TableWriter(self, buffer_rows=buffer_rows, **table)
+                if len(ranges) > 0 or len([value for value in query.values() if value]) > 0:
+                    writer.positions = set(self.select_positions(**query))
+                writers.append(writer)
+            keys = set(key for writer in writers for key in writer.save_properties)
+            if len([writer for writer in writers if writer.positions is None]) > 0:
+                positions = range(len(self.movies))
+            else:
+                # only the selected movies are visited
+                positions = sorted(set(position for writer in writers for position in writer.positions))
+            titles = self.get_movie_index().titles
+            for position in positions:
+                title = titles[position]
+                info = self.movies[title]
+                # the values (and their text) are looked up once per movie for all the tables
+                values = dict((key, info.get(key)) for key in keys)
+                texts = {}
+                for writer in writers:
+                    if writer.positions is None or position in writer.positions:
+                        writer.add_movie(title, values, texts)
+        finally:
+            for writer in writers:
+                writer.close()
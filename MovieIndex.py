@@ -0,0 +1,132 @@
+"""
+ Column indexes for selecting movies by ranges of numerical properties, categorical values and genres.
+
+ Each property is indexed the first time a query uses it: numerical properties into their values sorted along
+ with the movie positions (for range lookups by binary search), categorical properties into the positions of each
+ value, and the genres into the positions of each genre bit. A query starts from its most selective condition and
+ only checks the other conditions on those candidates, so its cost follows the size of the result.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+
+# returns a property value as a float, or None when missing or not a number
+def _number(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class MovieIndex(object):
+    # movies: dict like {title: movie}. the positions of the movies are their order in it
+    def __init__(self, movies, key_genre):
+        self.movies = movies
+        self.key_genre = key_genre
+        self.titles = list(movies)  # position -> title
+        self.sorted_values = {}  # numerical key -> tuple: (array of sorted values, array of their positions)
+        self.value_positions = {}  # categorical key -> {value: array of positions}
+        self.genre_positions = None  # genre bit -> array of positions
+
+    def index_numbers(self, key):
+        if key not in self.sorted_values:
+            pairs = []
+            for position, title in enumerate(self.titles):
+                value = _number(self.movies[title].get(key))
+                if value is not None:
+                    pairs.append((value, position))
+            pairs.sort()
+            self.sorted_values[key] = (array('d', [value for value, _ in pairs]),
+                                       array('i', [position for _, position in pairs]))
+        return self.sorted_values[key]
+
+    def index_values(self, key):
+        if key not in self.value_positions:
+            value_positions = {}
+            for position, title in enumerate(self.titles):
+                value = self.movies[title].get(key)
+                if value is not None:
+                    positions = value_positions.get(value)
+                    if positions is None:
+                        positions = value_positions[value] = array('i')
+                    positions.append(position)
+            self.value_positions[key] = value_positions
+        return self.value_positions[key]
+
+    def index_genres(self):
+        if self.genre_positions is None:
+            self.genre_positions = {}
+            for position, title in enumerate(self.titles):
+                genre_mask = self.movies[title].get(self.key_genre, 0) or 0
+                bit = 0
+                while genre_mask:
+                    if genre_mask & 1:
+                        positions = self.genre_positions.get(bit)
+                        if positions is None:
+                            positions = self.genre_positions[bit] = array('i')
+                        positions.append(position)
+                    genre_mask >>= 1
+                    bit += 1
+        return self.genre_positions
+
+    # returns the sorted positions of the movies matching all the conditions.
+    #   ranges: {key: (min, max), ...} inclusive ranges of numerical keys, None for an open end
+    #   equals: {key: [value, ...], ...} the movies must have one of the values
+    #   genres_mask: the movies must have all these genre bits. ignore_genres_mask: and none of these
+    def select(self, ranges=None, equals=None, genres_mask=0, ignore_genres_mask=0):
+        ranges = ranges or {}
+        equals = dict((key, set(values)) for key, values in (equals or {}).items())
+
+        # the candidates of each condition, as a list of position arrays. the smallest one is checked
+        candidate_lists = []
+        for key, (min_value, max_value) in ranges.items():
+            values, positions = self.index_numbers(key)
+            first = 0 if min_value is None else bisect_left(values, min_value)
+            last = len(values) if max_value is None else bisect_right(values, max_value)
+            candidate_lists.append([positions[first:last]])
+        for key, key_values in equals.items():
+            value_positions = self.index_values(key)
+            candidate_lists.append([value_positions.get(value, array('i')) for value in key_values])
+        if genres_mask:
+            genre_positions = self.index_genres()
+            bit = 0
+            while genres_mask >> bit:
+                if genres_mask >> bit & 1:
+                    candidate_lists.append([genre_positions.get(bit, array('i'))])
+                bit += 1
+        if len(candidate_lists) == 0:
+            candidates = range(len(self.titles))
+        else:
+            smallest = min(candidate_lists, key=lambda lists: sum(len(positions) for positions in lists))
+            candidates = sorted(set(position for positions in smallest for position in positions))
+
+        results = []
+        for position in candidates:
+            movie = self.movies[self.titles[position]]
+            matches = True
+            for key, (min_value, max_value) in ranges.items():
+                value = _number(movie.get(key))
+                if value is None or (min_value is not None and value < min_value) or \
+                        (max_value is not None and value > max_value):
+                    matches = False
+                    break
+            if matches:
+                for key, key_values in equals.items():
+                    if movie.get(key) not in key_values:
+                        matches = False
+                        break
+            if matches and (genres_mask or ignore_genres_mask):
+                genre_mask = movie.get(self.key_genre, 0) or 0
+                matches = (genre_mask & genres_mask) == genres_mask and not (genre_mask & ignore_genres_mask)
+            if matches:
+                results.append(position)
+        return results
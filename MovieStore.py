@@ -0,0 +1,239 @@
+"""
+ A compact columnar storage for the movie info parsed by IMDBFileProcessor.
+
+ Titles get dense integer ids (in the order they are added). Numerical properties are kept in typed arrays
+ with a missing value mask, categorical properties are dictionary encoded into integer codes, fixed width byte
+ vectors (e.g. the vote distribution) are rows of a byte matrix, and any other property (e.g. the director lists)
+ is kept in a per property dict of {title id: value}.
+
+ The store behaves like the dict of dicts it replaces: store[title] returns a MovieRecord that reads and
+ writes the columns like a dict, so the readers and save_to_table work on top of it unchanged.
+"""
+
+from array import array
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+
+# a dict like view of one movie in a MovieStore
+class MovieRecord(object):
+    __slots__ = ('store', 'id')
+
+    def __init__(self, store, title_id):
+        self.store = store
+        self.id = title_id
+
+    def get(self, key, default=None):
+        return self.store.get_value(self.id, key, default)
+
+    def __getitem__(self, key):
+        value = self.store.get_value(self.id, key, MovieStore.missing)
+        if value is MovieStore.missing:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.store.set_value(self.id, key, value)
+
+    def __contains__(self, key):
+        return self.store.get_value(self.id, key, MovieStore.missing) is not MovieStore.missing
+
+    def pop(self, key, default=None):
+        value = self.get(key, default)
+        self.store.clear_value(self.id, key)
+        return value
+
+    def update(self, values):
+        for key, value in values.items():
+            self.store.set_value(self.id, key, value)
+
+    def keys(self):
+        return [key for key in self.store.property_keys() if key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        return dict(self.items()) == dict(other.items())
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class MovieStore(object):
+    # returned by get_value when a value is missing and no default is given
+    missing = object()
+
+    #   numerical_types: {key: (array typecode, value type), ...} for the numerical properties
+    #   categorical_keys: the properties with few distinct values to dictionary encode
+    #   vector_widths: {key: number of bytes, ...} for the properties stored as fixed width bytes
+    def __init__(self, numerical_types=None, categorical_keys=None, vector_widths=None):
+        self.titles = []  # title id -> title
+        self.title_ids = {}  # title -> title id
+        self.numerical_types = dict(numerical_types or {})
+        self.columns = dict((key, array(typecode)) for key, (typecode, _) in self.numerical_types.items())
+        self.vector_widths = dict(vector_widths or {})
+        self.vectors = dict((key, bytearray()) for key in self.vector_widths)  # one row of width bytes per title
+        self.masks = dict((key, bytearray()) for key in list(self.numerical_types) + list(self.vector_widths))
+        # (the masks are 1 where the value is present)
+        self.codes = dict((key, array('i')) for key in (categorical_keys or []))  # -1 where the value is missing
+        self.categories = dict((key, []) for key in self.codes)  # code -> value
+        self.category_codes = dict((key, {}) for key in self.codes)  # value -> code
+        self.objects = {}  # any other key -> {title id: value}
+
+    # the property keys that have storage in this store
+    def property_keys(self):
+        return (list(self.columns.keys()) + list(self.codes.keys()) + list(self.vectors.keys()) +
+                list(self.objects.keys()))
+
+    # returns the id of a title, adding it if needed
+    def add_title(self, title):
+        title_id = self.title_ids.get(title)
+        if title_id is None:
+            title_id = len(self.titles)
+            self.titles.append(title)
+            self.title_ids[title] = title_id
+            for key, column in self.columns.items():
+                column.append(0)
+                self.masks[key].append(0)
+            for codes in self.codes.values():
+                codes.append(-1)
+            for key, vector in self.vectors.items():
+                vector.extend(bytearray(self.vector_widths[key]))
+                self.masks[key].append(0)
+        return title_id
+
+    def get_value(self, title_id, key, default=None):
+        if key in self.columns:
+            if self.masks[key][title_id]:
+                return self.numerical_types[key][1](self.columns[key][title_id])
+            return default
+        if key in self.codes:
+            code = self.codes[key][title_id]
+            return self.categories[key][code] if code >= 0 else default
+        if key in self.vectors:
+            if self.masks[key][title_id]:
+                width = self.vector_widths[key]
+                return bytes(self.vectors[key][title_id * width:(title_id + 1) * width])
+            return default
+        return self.objects.get(key, {}).get(title_id, default)
+
+    # sets a property of a title. a numerical value of None clears it
+    def set_value(self, title_id, key, value):
+        if key in self.columns:
+            if value is None:
+                self.clear_value(title_id, key)
+                return
+            self.columns[key][title_id] = self.numerical_types[key][1](value)
+            self.masks[key][title_id] = 1
+        elif key in self.codes:
+            code = self.category_codes[key].get(value)
+            if code is None:
+                code = self.category_codes[key][value] = len(self.categories[key])
+                self.categories[key].append(value)
+            self.codes[key][title_id] = code
+        elif key in self.vectors:
+            if value is None:
+                self.clear_value(title_id, key)
+                return
+            width = self.vector_widths[key]
+            if len(value) != width:
+                raise ValueError(key + " must be " + str(width) + " bytes")
+            self.vectors[key][title_id * width:(title_id + 1) * width] = value
+            self.masks[key][title_id] = 1
+        else:
+            self.objects.setdefault(key, {})[title_id] = value
+
+    def clear_value(self, title_id, key):
+        if key in self.columns:
+            self.masks[key][title_id] = 0
+            self.columns[key][title_id] = 0
+        elif key in self.codes:
+            self.codes[key][title_id] = -1
+        elif key in self.vectors:
+            self.masks[key][title_id] = 0
+        elif key in self.objects:
+            self.objects[key].pop(title_id, None)
+
+    # removes all values for a key property
+    def clear_property(self, key):
+        if key in self.columns:
+            count = len(self.titles)
+            self.columns[key] = array(self.columns[key].typecode, [0]) * count
+            self.masks[key] = bytearray(count)
+        elif key in self.codes:
+            self.codes[key] = array('i', [-1]) * len(self.titles)
+            self.categories[key] = []
+            self.category_codes[key] = {}
+        elif key in self.vectors:
+            self.vectors[key] = bytearray(self.vector_widths[key] * len(self.titles))
+            self.masks[key] = bytearray(len(self.titles))
+        else:
+            self.objects.pop(key, None)
+
+    # the title ids are rebuilt from the titles when unpickled
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['title_ids']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.title_ids = dict((title, title_id) for title_id, title in enumerate(self.titles))
+
+    # returns tuple: (values array, presence mask) of a numerical key, indexed by title id
+    def column(self, key):
+        return self.columns[key], self.masks[key]
+
+    # returns tuple: (codes array, the value of each code) of a categorical key, indexed by title id (-1 where missing)
+    def categorical(self, key):
+        return self.codes[key], self.categories[key]
+
+    # returns tuple: (byte matrix with one row of width bytes per title id, presence mask) of a vector key
+    def vector(self, key):
+        return self.vectors[key], self.masks[key]
+
+    # dict interface over the titles
+    def __len__(self):
+        return len(self.titles)
+
+    def __contains__(self, title):
+        return title in self.title_ids
+
+    def __iter__(self):
+        return iter(self.titles)
+
+    def __getitem__(self, title):
+        return MovieRecord(self, self.title_ids[title])
+
+    def __setitem__(self, title, values):
+        if title in self.title_ids:
+            for key in self.property_keys():
+                self.clear_value(self.title_ids[title], key)
+        MovieRecord(self, self.add_title(title)).update(values)
+
+    def get(self, title, default=None):
+        title_id = self.title_ids.get(title)
+        return MovieRecord(self, title_id) if title_id is not None else default
+
+    def keys(self):
+        return iter(self.titles)
+
+    def values(self):
+        return (MovieRecord(self, title_id) for title_id in range(len(self.titles)))
+
+    def items(self):
+        return ((title, MovieRecord(self, title_id)) for title_id, title in enumerate(self.titles))
@@ -0,0 +1,79 @@
+"""
+ Locale independent parsing of the numbers and running times in the IMDB list files.
+
+ The numbers are written in the en_US format (e.g. 58,000,000 or 7.5): the thousands separators are dropped and the
+ rest is matched by a precompiled regex, so an invalid value returns None instead of raising an exception.
+ The running times come in a few formats (see parse_duration), all matched by a single regex.
+ The dates (e.g. of the gross amounts in business.list) are in English, and parsed without the locale too.
+"""
+
+import datetime
+import re
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+_number = r"\s*([+-]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)\s*"
+regex_number = re.compile(_number + "$")
+# one of: 85 | USA:80 | Canada:10:53 (minutes:seconds, anything after a third colon is ignored)
+regex_duration = re.compile("(?:" + _number + "|[^:]*:(?:" + _number + "|" + _number + ":" + _number + "(?::.*)?))$")
+regex_digits = re.compile(r"\d+")
+# a date in the last parentheses of a line: (5 June 2016) | (June 2016) | (2016)
+regex_date = re.compile(r"\((?:(\d{1,2})\s+)?(?:([A-Za-z]+)\s+)?(\d{4})\)\s*$")
+months = dict((name, number) for number, name in enumerate(
+    ["january", "february", "march", "april", "may", "june", "july", "august", "september", "october", "november",
+     "december"], 1))
+
+# the formats returned by parse_duration
+duration_formats = ['minutes', 'country_minutes', 'minutes_seconds', 'first_number', 'invalid']
+
+
+# returns an en_US formatted number (e.g. "1,234.5") as a float, or None if it is not a number
+def parse_number(text):
+    match = regex_number.match(text.replace(",", ""))
+    return float(match.group(1)) if match is not None else None
+
+
+# returns tuple: (minutes, format) of a running time, with format one of duration_formats:
+#   minutes: e.g. 85
+#   country_minutes: e.g. USA:80
+#   minutes_seconds: e.g. Canada:10:53
+#   first_number: all kind of garbage, e.g. "USA:10'30", "50 6 episodes", "UK:10x30", "Japan:2 1/2".
+#       takes the first number, which works for most cases
+#   invalid: no number at all. minutes is -1
+def parse_duration(text):
+    match = regex_duration.match(text.replace(",", ""))
+    if match is not None:
+        minutes, country_minutes, minutes_part, seconds_part = match.groups()
+        if minutes is not None:
+            return float(minutes), 'minutes'
+        if country_minutes is not None:
+            return float(country_minutes), 'country_minutes'
+        return float(minutes_part) + float(seconds_part) / 60.0, 'minutes_seconds'
+    match = regex_digits.search(text)
+    if match is not None:
+        return float(match.group()), 'first_number'
+    return -1, 'invalid'
+
+
+# returns the date in the last parentheses of a line (e.g. "GR: USD 363,024,263 (USA) (5 June 2016)") as a proleptic
+# gregorian ordinal (see datetime.date.toordinal), or None when there is no valid date.
+# a date without its day is taken at the middle of the month (15th), and without its month at the middle of the year
+def parse_date(text):
+    match = regex_date.search(text)
+    if match is None:
+        return None
+    day, month, year = match.groups()
+    if month is not None:
+        month = months.get(month.lower())
+        if month is None:
+            return None
+    try:
+        if month is None:
+            return datetime.date(int(year), 7, 1).toordinal()
+        return datetime.date(int(year), month, int(day) if day is not None else 15).toordinal()
+    except ValueError:
+        return None
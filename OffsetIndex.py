@@ -0,0 +1,161 @@
+"""
+ A byte offset index of the records of each title in the list files, to read the records of one title without parsing
+ the whole files (see IMDBFileProcessor.lookup).
+
+ A record is a line (e.g. of genres.list), a movie block from its MV: line to the dashes line that ends it (e.g. of
+ business.list), or a title line of a name block (e.g. of directors.list), which also needs the first line of its block
+ for the name. The consecutive records of a title (e.g. its lines of genres.list) are kept as one byte range.
+
+ For each list file, the records are grouped by title id (the records of a title staying in file order), and the ranges
+ of each title are encoded as variable length integers (see TextIndex.encode_varints): the gap from the end of the
+ previous range and the length, then for the name blocks the distance back to the name line and its length. Most
+ ranges take a few bytes. The title ids that have records are kept sorted with the offset of their ranges, so a lookup
+ is a binary search and the decoding of a few bytes. The index is written once by OffsetIndexBuilder to a file of
+ SharedDataset segments, and memory mapped by OffsetIndex.
+
+ Like the SharedDataset files, the index needs python 3.3+ (IMDBFileProcessor.build_offset_index and open_offset_index
+ raise a RuntimeError otherwise).
+"""
+
+from array import array
+from bisect import bisect_left
+from itertools import groupby
+
+from SharedDataset import SharedDataset, offset_typecode
+from TextIndex import decode_varints, encode_varints
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+
+# the records of the titles in one list file, in file order
+class _FileRecords(object):
+    def __init__(self):
+        self.title_ids = array('i')
+        self.starts = array(offset_typecode)
+        self.lengths = array('i')
+        self.blocks = array('i')  # the name block of each record (name blocks only)
+        self.block_starts = array(offset_typecode)  # the offset and length of the name line of each name block
+        self.block_lengths = array('i')
+
+
+# collects the byte ranges of the records of the list files, and writes the index
+class OffsetIndexBuilder(object):
+    #   list_files: list of tuples: [(file name, whether its records are in name blocks), ...]
+    def __init__(self, list_files):
+        self.list_files = [name for name, _ in list_files]
+        self.name_blocks = [name for name, name_blocks in list_files if name_blocks]
+        self.records = dict((name, _FileRecords()) for name in self.list_files)
+
+    # starts a name block at the name line (bytes start:end of the file). the records added next are in this block
+    def add_block(self, name, start, end):
+        records = self.records[name]
+        records.block_starts.append(start)
+        records.block_lengths.append(end - start)
+
+    # adds a record of a title (bytes start:end of the file). a record right after the previous one of the same title
+    # (in the same block) extends it
+    def add(self, name, title_id, start, end):
+        records = self.records[name]
+        block = len(records.block_starts) - 1
+        name_blocks = name in self.name_blocks
+        if (len(records.title_ids) > 0 and records.title_ids[-1] == title_id and
+                records.starts[-1] + records.lengths[-1] == start and (not name_blocks or records.blocks[-1] == block)):
+            records.lengths[-1] += end - start
+            return
+        records.title_ids.append(title_id)
+        records.starts.append(start)
+        records.lengths.append(end - start)
+        if name_blocks:
+            records.blocks.append(block)
+
+    # writes the index to a file (replacing it) and returns the OffsetIndex of it.
+    #   header: dict saved with the index, e.g. what it was built from (OffsetIndex.header)
+    def write(self, filename, header=None):
+        segments = {}
+        record_counts = {}
+        for name in self.list_files:
+            records = self.records[name]
+            starts, lengths, blocks = records.starts, records.lengths, records.blocks
+            name_blocks = name in self.name_blocks
+            titles = array('i')
+            offsets = array(offset_typecode, [0])
+            encoded = bytearray()
+            # the records in title order (the list files are mostly in the order of the titles: sorted in C, the runs
+            # in order are merged), the records of a title staying in file order
+            order = sorted(range(len(records.title_ids)), key=records.title_ids.__getitem__)
+            for title_id, indexes in groupby(order, key=records.title_ids.__getitem__):
+                numbers = []
+                end = 0
+                for index in indexes:
+                    numbers.append(starts[index] - end)
+                    numbers.append(lengths[index])
+                    end = starts[index] + lengths[index]
+                    if name_blocks:
+                        numbers.append(starts[index] - records.block_starts[blocks[index]])
+                        numbers.append(records.block_lengths[blocks[index]])
+                encoded += encode_varints(numbers)
+                titles.append(title_id)
+                offsets.append(len(encoded))
+            segments[name + ":titles"] = titles
+            segments[name + ":offsets"] = offsets
+            segments[name + ":ranges"] = encoded
+            record_counts[name] = len(records.title_ids)
+        header = dict(header or {})
+        header['list_files'] = self.list_files
+        header['name_blocks'] = self.name_blocks
+        header['record_counts'] = record_counts
+        SharedDataset.publish(header, segments, filename=filename).close()
+        return OffsetIndex.open(filename)
+
+
+class OffsetIndex(object):
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.header = dataset.header
+        self.list_files = self.header['list_files']
+        self.name_blocks = set(self.header['name_blocks'])
+        self.titles = dict((name, dataset.segment(name + ":titles")) for name in self.list_files)
+        self.offsets = dict((name, dataset.segment(name + ":offsets")) for name in self.list_files)
+        self.ranges_data = dict((name, dataset.segment(name + ":ranges")) for name in self.list_files)
+
+    # memory maps an index written by OffsetIndexBuilder
+    @classmethod
+    def open(cls, filename):
+        return cls(SharedDataset.attach(filename))
+
+    # returns list of tuples: [(start, end, name start, name end), ...] the byte ranges of the records of a title in a
+    # list file, in file order. name start and end are the range of the name line of the block of a record in a name
+    # block, else None
+    def ranges(self, name, title_id):
+        titles = self.titles.get(name)
+        if titles is None:
+            return []
+        position = bisect_left(titles, title_id)
+        if position == len(titles) or titles[position] != title_id:
+            return []
+        offsets = self.offsets[name]
+        numbers = decode_varints(self.ranges_data[name][offsets[position]:offsets[position + 1]])
+        width = 4 if name in self.name_blocks else 2
+        ranges = []
+        end = 0
+        for i in range(0, len(numbers), width):
+            start = end + numbers[i]
+            end = start + numbers[i + 1]
+            if width == 4:
+                name_start = start - numbers[i + 2]
+                ranges.append((start, end, name_start, name_start + numbers[i + 3]))
+            else:
+                ranges.append((start, end, None, None))
+        return ranges
+
+    # returns the number of bytes of the index file
+    def size(self):
+        return self.dataset.size()
+
+    # releases the memory map. the ranges returned stay valid
+    def close(self):
+        self.dataset.close()
@@ -0,0 +1,136 @@
+"""
+ Ingestion metrics of the IMDBFileProcessor readers.
+
+ Each read_* run fills in a ReaderStats: lines and bytes read, wall time, the records matched to a title, not found,
+ duplicated or not parsed, and the peak memory growth while reading. The stats are kept on the processor
+ (reader_stats) and passed to its stats_callback, e.g. to log them.
+
+ A run can also be wrapped in cProfile (profile) and tracemalloc (memory_top) to find its hot spots.
+"""
+
+import os
+import sys
+import time
+import cProfile
+
+try:
+    import tracemalloc  # python 3.4+
+except ImportError:
+    tracemalloc = None
+
+try:
+    import resource  # not available on windows
+except ImportError:
+    resource = None
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+
+# returns the peak resident memory of this process in bytes, or None when not available
+def peak_resident_memory():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # (bytes on mac os, KB elsewhere)
+
+
+class ReaderStats(object):
+    # the counters added up by add()
+    counters = ['lines', 'bytes', 'matched', 'resolved', 'not_found', 'duplicates', 'skipped', 'parse_failures']
+
+    #   reader: the read_* method. filename: its list file. start, end: the byte range read (end None for the end)
+    def __init__(self, reader, filename, start=0, end=None):
+        self.reader = reader
+        self.filename = filename
+        self.start_offset = start
+        self.end_offset = end
+        self.file_found = False  # whether the reader found its list file (see IMDBFileProcessor.check_file_exists)
+        self.lines = 0  # lines read
+        self.bytes = 0  # bytes of the list file read (compressed bytes for a .gz file)
+        self.seconds = 0.0  # wall time
+        self.matched = 0  # titles given a value
+        self.resolved = 0  # records of a title with an episode or notes, resolved to the title (see TitleResolver)
+        self.not_found = 0  # records of titles that are not in the movies
+        self.duplicates = 0  # records of titles that already had a value
+        self.skipped = 0  # records skipped by the settings (e.g. the series, with enable_series off)
+        self.parse_failures = 0  # lines that did not match the format of the file
+        self.memory_delta = None  # peak memory growth in bytes: traced by tracemalloc, or else of the resident memory
+        self.profile = None  # cProfile.Profile of the run, with profile. e.g. pstats.Stats(stats.profile)
+        self.memory_top = None  # the 10 source lines that allocated the most memory, with trace_memory
+        self.started = None
+        self.start_memory = None
+        self.traced = False  # whether this run started tracemalloc
+
+    # starts measuring a run. profile: runs it in cProfile. trace_memory: traces its allocations with tracemalloc
+    def start(self, profile=False, trace_memory=False):
+        if os.path.isfile(self.filename):
+            end = self.end_offset if self.end_offset is not None else os.path.getsize(self.filename)
+            self.bytes = max(end - self.start_offset, 0)
+        if trace_memory and tracemalloc is not None and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.traced = True
+        if tracemalloc is not None and tracemalloc.is_tracing():
+            if hasattr(tracemalloc, 'reset_peak'):  # python 3.9+
+                tracemalloc.reset_peak()
+            self.start_memory = tracemalloc.get_traced_memory()[0]
+        else:
+            self.start_memory = peak_resident_memory()
+        if profile:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        self.started = time.time()
+
+    def stop(self):
+        self.seconds = time.time() - self.started
+        if self.profile is not None:
+            self.profile.disable()
+        if tracemalloc is not None and tracemalloc.is_tracing():
+            self.memory_delta = max(tracemalloc.get_traced_memory()[1] - self.start_memory, 0)
+            if self.traced:
+                self.memory_top = tracemalloc.take_snapshot().statistics('lineno')[:10]
+                tracemalloc.stop()
+                self.traced = False
+        elif self.start_memory is not None:
+            self.memory_delta = peak_resident_memory() - self.start_memory
+
+    # adds the counters of another run (e.g. a byte range of the same file)
+    def add(self, other):
+        for name in self.counters:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.file_found = self.file_found or other.file_found
+        if other.memory_delta is not None:
+            self.memory_delta = max(self.memory_delta or 0, other.memory_delta)
+
+    def lines_per_second(self):
+        return self.lines / self.seconds if self.seconds > 0 else 0.0
+
+    # returns dict of the metrics, e.g. for a json log
+    def as_dict(self):
+        metrics = dict((name, getattr(self, name)) for name in self.counters)
+        metrics.update({
+            'reader': self.reader,
+            'filename': self.filename,
+            'seconds': self.seconds,
+            'lines_per_second': self.lines_per_second(),
+            'memory_delta': self.memory_delta
+        })
+        return metrics
+
+    # the state sent back by a load() worker process (the profile can not be pickled)
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['profile'] = None
+        return state
+
+    def __str__(self):
+        text = "{}: {:,} lines ({:,.1f} MB) in {:.2f} s ({:,.0f} lines/s). matched {:,}, resolved {:,}, " \
+               "not found {:,}, duplicates {:,}, skipped {:,}, parse failures {:,}".format(
+                   self.reader, self.lines, self.bytes / 1024.0 / 1024.0, self.seconds, self.lines_per_second(),
+                   self.matched, self.resolved, self.not_found, self.duplicates, self.skipped, self.parse_failures)
+        if self.memory_delta is not None:
+            text += ", memory +{:,.1f} MB".format(self.memory_delta / 1024.0 / 1024.0)
+        return text
@@ -0,0 +1,222 @@
+"""
+ Exports the movies parsed by IMDBFileProcessor to a SQLite database, and loads them back.
+
+ The single valued properties are the columns of the movies table. The genres and the directors go to side tables
+ (movie_genres, movie_directors) that refer to the genres and directors tables by id, so they can be joined and
+ indexed. The histograms and settings of the processor are kept as json in the metadata table.
+
+ The rows are inserted in large batched transactions with the journal and the syncs off (the database is written to a
+ temporary file and renamed when complete), and the indexes on year, rating, votes and genre are built after the rows
+ are loaded, which is faster than updating them row by row.
+"""
+
+import json
+import os
+import sqlite3
+from array import array
+
+from SymbolTable import SymbolTable
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+# increase when the schema changes
+schema_version = 1
+
+# the columns of the movies table: (property key, sql type)
+movie_columns = [
+    ('year', 'INTEGER'),
+    ('rating', 'REAL'),
+    ('length', ''),  # (no type affinity: -1 for an invalid running time stays an integer)
+    ('votes', 'INTEGER'),
+    ('vote_distribution', 'BLOB'),
+    ('budget', 'INTEGER'),
+    ('revenue', 'INTEGER'),
+    ('country', 'TEXT'),
+    ('language', 'TEXT'),
+    ('mpaa', 'TEXT'),
+    ('mpaa_reason', 'TEXT')
+]
+
+schema = [
+    "CREATE TABLE metadata (name TEXT PRIMARY KEY, value TEXT)",
+    "CREATE TABLE movies (id INTEGER PRIMARY KEY, title TEXT NOT NULL, " +
+    ", ".join(key + " " + sql_type for key, sql_type in movie_columns) + ")",
+    "CREATE TABLE genres (id INTEGER PRIMARY KEY, name TEXT NOT NULL)",  # id: the bit of the genre in the bitmasks
+    "CREATE TABLE movie_genres (movie_id INTEGER NOT NULL, genre_id INTEGER NOT NULL)",
+    "CREATE TABLE directors (id INTEGER PRIMARY KEY, name TEXT NOT NULL)",
+    "CREATE TABLE movie_directors (movie_id INTEGER NOT NULL, position INTEGER NOT NULL, director_id INTEGER NOT NULL)"
+]
+
+# built after the rows are inserted
+indexes = [
+    "CREATE UNIQUE INDEX movies_title ON movies (title)",
+    "CREATE INDEX movies_year ON movies (year)",
+    "CREATE INDEX movies_rating ON movies (rating)",
+    "CREATE INDEX movies_votes ON movies (votes)",
+    "CREATE INDEX movie_genres_genre ON movie_genres (genre_id, movie_id)",
+    "CREATE INDEX movie_genres_movie ON movie_genres (movie_id)",
+    "CREATE INDEX movie_directors_movie ON movie_directors (movie_id, position)",
+    "CREATE INDEX movie_directors_director ON movie_directors (director_id)"
+]
+
+# the integer columns that can exceed 64 bits (e.g. an amount converted from an obsolete currency), saved as REAL then
+large_integer_keys = ['budget', 'revenue']
+
+# the pragmas of the bulk export: no rollback journal and no syncs (a failed export leaves only the temporary file),
+# large pages and cache
+export_pragmas = [
+    "PRAGMA page_size = 65536",
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA locking_mode = EXCLUSIVE",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144"  # 256MB
+]
+
+# the processor attributes saved in the metadata table
+metadata_names = [
+    'genre_count',
+    'country_count',
+    'language_count',
+    'mpaa_count',
+    'length_format_count',
+    'currency_not_found',
+    'loaded_readers',
+    'enable_movies',
+    'enable_series',
+    'enable_mpaa_reason'
+]
+
+
+# writes the movies of a processor to a new SQLite database (replacing the file).
+#   batch_size: number of rows inserted per transaction
+def save_sqlite(processor, filename, batch_size=100000):
+    temp_filename = filename + ".tmp"
+    if os.path.exists(temp_filename):
+        os.remove(temp_filename)
+    connection = sqlite3.connect(temp_filename, isolation_level=None)
+    try:
+        for pragma in export_pragmas:
+            connection.execute(pragma)
+        for statement in schema:
+            connection.execute(statement)
+        metadata = dict((name, getattr(processor, name)) for name in metadata_names)
+        metadata['schema_version'] = schema_version
+        metadata['parser_version'] = processor.parser_version
+        _insert(connection, "metadata", [(name, json.dumps(value)) for name, value in metadata.items()], batch_size)
+        _insert(connection, "genres", enumerate(processor.genre_names), batch_size)
+        _insert(connection, "directors", enumerate(processor.director_pool.names), batch_size)
+        keys = [key for key, _ in movie_columns]
+        large_columns = [keys.index(key) + 2 for key in large_integer_keys]
+        movie_rows = []
+        genre_rows = []
+        director_rows = []
+        mask_bits = {}  # genre mask -> its bits
+        for movie_id, (title, movie) in enumerate(processor.movies.items()):
+            row = [movie_id, title] + [movie.get(key) for key in keys]
+            for column in large_columns:
+                if row[column] is not None and not -2 ** 63 <= row[column] < 2 ** 63:
+                    row[column] = float(row[column])
+            movie_rows.append(row)
+            # (few distinct combinations of genres: the bits of each mask are listed once)
+            genre_mask = movie.get(processor.key_genre, 0) or 0
+            bits = mask_bits.get(genre_mask)
+            if bits is None:
+                bits = mask_bits[genre_mask] = [bit for bit in range(genre_mask.bit_length()) if genre_mask >> bit & 1]
+            for bit in bits:
+                genre_rows.append((movie_id, bit))
+            for position, director_id in enumerate(movie.get(processor.key_director) or []):
+                director_rows.append((movie_id, position, director_id))
+            if len(movie_rows) >= batch_size:
+                _insert(connection, "movies", movie_rows, batch_size)
+                movie_rows = []
+        _insert(connection, "movies", movie_rows, batch_size)
+        _insert(connection, "movie_genres", genre_rows, batch_size)
+        _insert(connection, "movie_directors", director_rows, batch_size)
+        for statement in indexes:
+            connection.execute(statement)
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+    if os.path.exists(filename):
+        os.remove(filename)
+    os.rename(temp_filename, filename)
+
+
+# inserts rows into a table, batch_size rows per transaction
+def _insert(connection, table, rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = [row for _, row in zip(range(batch_size), rows)]
+        if len(batch) == 0:
+            return
+        statement = "INSERT INTO " + table + " VALUES (" + ", ".join("?" * len(batch[0])) + ")"
+        connection.execute("BEGIN")
+        connection.executemany(statement, batch)
+        connection.execute("COMMIT")
+        if len(batch) < batch_size:
+            return
+
+
+# loads the movies of a database written by save_sqlite into an empty movies store (dict or MovieStore), and sets it
+# as the movies of a processor. returns False (and loads nothing) when the file is missing or not of this schema version
+def load_sqlite(processor, filename, movies):
+    if not os.path.isfile(filename):
+        return False
+    connection = sqlite3.connect(filename)
+    try:
+        try:
+            metadata = dict((name, json.loads(value))
+                            for name, value in connection.execute("SELECT name, value FROM metadata"))
+        except sqlite3.DatabaseError:
+            return False
+        if metadata.get('schema_version') != schema_version:
+            return False
+        genre_names = [name for _, name in connection.execute("SELECT id, name FROM genres ORDER BY id")]
+        director_pool = SymbolTable(name for _, name in connection.execute("SELECT id, name FROM directors ORDER BY id"))
+        genre_masks = {}
+        for movie_id, genre_id in connection.execute("SELECT movie_id, genre_id FROM movie_genres"):
+            genre_masks[movie_id] = genre_masks.get(movie_id, 0) | 1 << genre_id
+        directors = {}
+        for movie_id, director_id in connection.execute(
+                "SELECT movie_id, director_id FROM movie_directors ORDER BY movie_id, position"):
+            movie_directors = directors.get(movie_id)
+            if movie_directors is None:
+                movie_directors = directors[movie_id] = array('i')
+            movie_directors.append(director_id)
+
+        processor.genre_names = genre_names
+        processor.genre_bits = dict((genre, 1 << bit) for bit, genre in enumerate(genre_names))
+        processor.director_pool = director_pool
+        processor.country_pool = SymbolTable()
+        processor.language_pool = SymbolTable()
+        pools = {processor.key_country: processor.country_pool, processor.key_language: processor.language_pool}
+        keys = [key for key, _ in movie_columns]
+        rows = connection.execute("SELECT id, title, " + ", ".join(keys) + " FROM movies ORDER BY id")
+        for row in rows:
+            movie_id = row[0]
+            movie = {}
+            for key, value in zip(keys, row[2:]):
+                if value is not None:
+                    pool = pools.get(key)
+                    if pool is not None:
+                        value = pool.share(value)
+                    elif key in large_integer_keys:
+                        value = int(value)
+                    movie[key] = value
+            if movie_id in genre_masks:
+                movie[processor.key_genre] = genre_masks[movie_id]
+            if movie_id in directors:
+                movie[processor.key_director] = directors[movie_id]
+            movies[row[1]] = movie
+    finally:
+        connection.close()
+    processor.movies = movies
+    for name in metadata_names:
+        if name in metadata:
+            setattr(processor, name, metadata[name])
+    return True
@@ -0,0 +1,420 @@
+"""
+ Shares a loaded movie dataset with other processes, read only and without copying it.
+
+ The dataset is published once as flat typed segments (the numerical columns and their masks, the category codes, the
+ vote distribution matrix, the director ids in compressed sparse rows, the titles and strings as offsets into a utf-8
+ blob) in a multiprocessing.shared_memory block, or in a file that is memory mapped. The workers attach to it by name:
+ each segment is a memoryview of the shared pages, so attaching costs a json header, and reading the movies does not
+ touch reference counts in those pages (unlike the dict of dicts inherited through fork, which gets copied page by page
+ as the workers read it).
+
+ SharedMovieStore is a read only MovieStore on top of the segments, so an IMDBFileProcessor attached to the dataset
+ (see IMDBFileProcessor.attach_shared) can query and export it as usual. Publishing and attaching need python 3.3+
+ (memoryview.cast, a RuntimeError is raised otherwise); shared memory blocks need python 3.8+, a file can be used
+ otherwise.
+"""
+
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from MovieStore import MovieStore
+
+try:
+    from multiprocessing import shared_memory  # python 3.8+
+except ImportError:
+    shared_memory = None
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+# the typecode of the offset arrays: 64 bit integers ('q' is python 3.3+, 'l' is 64 bit with python 2 on 64 bit linux
+# and mac os)
+offset_typecode = 'q' if sys.version_info >= (3, 3) else 'l'
+
+
+# raises RuntimeError on the pythons that cannot attach to a dataset (memoryview.cast is python 3.3+). checked before
+# publishing, so that a dataset is not built for nothing
+def check_python_version():
+    if sys.version_info < (3, 3):
+        raise RuntimeError("shared datasets need python 3.3+ (memoryview.cast)")
+
+
+# a sequence of strings stored as a utf-8 blob and the offsets of each string in it (count + 1 offsets)
+class SharedStrings(object):
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def encoded(self, index):
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]])
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.encoded(index).decode("utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+
+# returns tuple: (offsets array, utf-8 blob) of a sequence of strings, for SharedStrings
+def encode_strings(strings):
+    offsets = array(offset_typecode, [0])
+    blob = bytearray()
+    for string in strings:
+        blob += string.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, blob
+
+
+class SharedDataset(object):
+    # first bytes of a published dataset, followed by the length of the json header, the header and the segments
+    magic = b'IMDBSHM1'
+
+    # each segment starts at a multiple of this
+    alignment = 8
+
+    def __init__(self, name, buffer, header, shared_block=None, mapped=None, owner=False):
+        self.name = name  # the shared memory block name, or the file name
+        self.buffer = buffer  # read only memoryview of the whole dataset
+        self.header = header
+        self.shared_block = shared_block
+        self.mapped = mapped
+        self.owner = owner  # the publisher unlinks a shared memory block
+        self.views = []  # the memoryviews given out, released by close()
+
+    # publishes segments to a new shared memory block (named, or given a unique name), or to a file when filename is
+    # given, and returns the SharedDataset attached to it. the publisher must keep it open while the workers attach,
+    # then close() and unlink() it.
+    #   header: dict saved as json, returned by attach().header. segments: {name: array, bytearray or bytes}
+    @classmethod
+    def publish(cls, header, segments, name=None, filename=None):
+        check_python_version()
+        header = dict(header)
+        header['segments'] = {}
+        offset = 0
+        for segment_name, segment in sorted(segments.items()):
+            typecode = segment.typecode if isinstance(segment, array) else 'B'
+            data = _segment_bytes(segment)
+            header['segments'][segment_name] = [typecode, offset, len(data)]
+            offset += _aligned(len(data), cls.alignment)
+        encoded_header = json.dumps(header).encode("utf-8")  # (keeps the order of the dicts, e.g. of genre_count)
+        data_start = _aligned(len(cls.magic) + 4 + len(encoded_header), cls.alignment)
+        size = data_start + offset
+        prefix = cls.magic + struct.pack("<I", len(encoded_header)) + encoded_header
+        if filename is not None:
+            # written next to the file and renamed, so a worker never attaches to a partially written file
+            temp_filename = filename + ".tmp"
+            with io.open(temp_filename, 'wb') as f:
+                f.write(prefix + b'\0' * (data_start - len(prefix)))
+                for segment_name, segment in sorted(segments.items()):
+                    data = _segment_bytes(segment)
+                    f.write(data)
+                    f.write(b'\0' * (_aligned(len(data), cls.alignment) - len(data)))
+            if os.path.exists(filename):
+                os.remove(filename)
+            os.rename(temp_filename, filename)
+            return cls.attach(filename)
+        if shared_memory is None:
+            raise RuntimeError("shared memory needs python 3.8+, publish to a file instead")
+        block = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+        block.buf[:len(prefix)] = prefix
+        for segment_name, (_, segment_offset, length) in header['segments'].items():
+            start = data_start + segment_offset
+            block.buf[start:start + length] = _segment_bytes(segments[segment_name])
+        dataset = cls._open(block.name, block.buf, shared_block=block)
+        dataset.owner = True
+        return dataset
+
+    # attaches to a dataset published by publish(), by its shared memory name or file name
+    @classmethod
+    def attach(cls, name):
+        check_python_version()
+        if os.path.isfile(name):
+            with io.open(name, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return cls._open(name, memoryview(mapped), mapped=mapped)
+        if shared_memory is None:
+            raise RuntimeError("shared memory needs python 3.8+: " + name)
+        if sys.version_info >= (3, 13):
+            block = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            # (registered with the resource tracker, which the pool workers share with the publisher)
+            block = shared_memory.SharedMemory(name=name)
+        return cls._open(name, block.buf, shared_block=block)
+
+    @classmethod
+    def _open(cls, name, buffer, shared_block=None, mapped=None):
+        if buffer[:len(cls.magic)].tobytes() != cls.magic:
+            raise ValueError("not a shared dataset: " + name)
+        header_length = struct.unpack("<I", buffer[len(cls.magic):len(cls.magic) + 4])[0]
+        header_start = len(cls.magic) + 4
+        header = json.loads(buffer[header_start:header_start + header_length].tobytes().decode("utf-8"))
+        data_start = _aligned(header_start + header_length, cls.alignment)
+        header['data_start'] = data_start
+        if hasattr(buffer, 'toreadonly'):  # python 3.8+
+            buffer = buffer.toreadonly()
+        return cls(name, buffer, header, shared_block, mapped)
+
+    def __contains__(self, segment_name):
+        return segment_name in self.header['segments']
+
+    # returns the memoryview of a segment, with the item type it was published with
+    def segment(self, segment_name):
+        typecode, offset, length = self.header['segments'][segment_name]
+        start = self.header['data_start'] + offset
+        view = self.buffer[start:start + length].cast(typecode)
+        self.views.append(view)
+        return view
+
+    # returns SharedStrings of the segments published by strings_segments()
+    def strings(self, segment_name):
+        return SharedStrings(self.segment(segment_name + ":offsets"), self.segment(segment_name + ":blob"))
+
+    # returns the memory in bytes of the published dataset
+    def size(self):
+        return len(self.buffer)
+
+    # releases the memoryviews and detaches from the dataset. anything read from the segments must not be used after
+    def close(self):
+        if self.buffer is None:
+            return
+        for view in self.views:
+            view.release()
+        self.views = []
+        self.buffer.release()
+        self.buffer = None
+        if self.shared_block is not None:
+            self.shared_block.close()
+        if self.mapped is not None:
+            self.mapped.close()
+
+    # the views must be released before the shared memory block or the memory map is closed
+    def __del__(self):
+        self.close()
+
+    # removes the published dataset (by its publisher, once the workers are done)
+    def unlink(self):
+        if self.shared_block is not None:
+            if self.owner:
+                self.shared_block.unlink()
+        elif os.path.isfile(self.name):
+            os.remove(self.name)
+
+
+# returns {name:offsets, name:blob} segments of a sequence of strings, read by SharedDataset.strings(name)
+def strings_segments(segment_name, strings):
+    offsets, blob = encode_strings(strings)
+    return {segment_name + ":offsets": offsets, segment_name + ":blob": blob}
+
+
+def _segment_bytes(segment):
+    if isinstance(segment, array):
+        return memoryview(segment).cast('B') if sys.version_info >= (3, 3) else segment.tostring()
+    return segment
+
+
+def _aligned(size, alignment):
+    return (size + alignment - 1) // alignment * alignment
+
+
+# the title ids of a SharedMovieStore, looked up by binary search in the titles sorted by their utf-8 encoding
+# (instead of a dict of all the titles in each worker)
+class _SortedTitleIds(object):
+    def __init__(self, titles, sorted_ids):
+        self.titles = titles
+        self.sorted_ids = sorted_ids
+
+    def get(self, title, default=None):
+        if not hasattr(title, 'encode'):
+            return default
+        encoded = title.encode("utf-8")
+        low, high = 0, len(self.sorted_ids)
+        while low < high:
+            middle = (low + high) // 2
+            if self.titles.encoded(self.sorted_ids[middle]) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.sorted_ids) and self.titles.encoded(self.sorted_ids[low]) == encoded:
+            return self.sorted_ids[low]
+        return default
+
+    def __contains__(self, title):
+        return self.get(title) is not None
+
+    def __getitem__(self, title):
+        title_id = self.get(title)
+        if title_id is None:
+            raise KeyError(title)
+        return title_id
+
+
+# a read only MovieStore over the segments of a SharedDataset.
+# the keys not stored in columns are either lists of ints (list_keys, e.g. the director ids) or strings (text_keys)
+class SharedMovieStore(MovieStore):
+    #   numerical_types: {key: (array typecode, value type), ...} the value types of the numerical columns
+    #       (by default int, or float for the 'd' columns)
+    def __init__(self, dataset, numerical_types=None):
+        self.dataset = dataset
+        header = dataset.header
+        self.titles = dataset.strings("titles")
+        self.title_ids = _SortedTitleIds(self.titles, dataset.segment("title_order"))
+        self.numerical_types = dict(numerical_types or {})
+        self.columns = {}
+        self.masks = {}
+        for key, typecode in header['numerical'].items():
+            if key not in self.numerical_types:
+                self.numerical_types[key] = (typecode, float if typecode == 'd' else int)
+            self.columns[key] = dataset.segment("column:" + key)
+            self.masks[key] = dataset.segment("mask:" + key)
+        self.vector_widths = dict(header['vectors'])
+        self.vectors = {}
+        for key in self.vector_widths:
+            self.vectors[key] = dataset.segment("vector:" + key)
+            self.masks[key] = dataset.segment("mask:" + key)
+        self.codes = dict((key, dataset.segment("codes:" + key)) for key in header['categories'])
+        self.categories = dict((key, list(categories)) for key, categories in header['categories'].items())
+        self.category_codes = dict((key, dict((value, code) for code, value in enumerate(categories)))
+                                   for key, categories in self.categories.items())
+        self.objects = {}
+        self.lists = dict((key, (dataset.segment("list_offsets:" + key), dataset.segment("list_values:" + key)))
+                          for key in header['lists'])
+        self.texts = dict((key, (dataset.segment("text_mask:" + key), dataset.strings("text:" + key)))
+                          for key in header['texts'])
+
+    # returns the SharedDataset of the movies of a dataset store (dict of dicts or MovieStore), published as in
+    # SharedDataset.publish. state: json serializable dict saved along, returned by dataset.header['state'].
+    # strings: {name: list of strings} published along, returned by dataset.strings(name) (e.g. the director names)
+    @classmethod
+    def publish(cls, movies, numerical_types, categorical_keys, vector_widths, list_keys=(), text_keys=(),
+                state=None, strings=None, name=None, filename=None):
+        check_python_version()
+        titles = list(movies)
+        count = len(titles)
+        header = {
+            'count': count,
+            'numerical': dict((key, typecode) for key, (typecode, _) in numerical_types.items()),
+            'vectors': dict(vector_widths),
+            'categories': {},
+            'lists': list(list_keys),
+            'texts': list(text_keys),
+            'state': state or {}
+        }
+        segments = strings_segments("titles", titles)
+        encoded_titles = [title.encode("utf-8") for title in titles]
+        segments["title_order"] = array('i', sorted(range(count), key=encoded_titles.__getitem__))
+        del encoded_titles
+        store = movies if isinstance(movies, MovieStore) else None
+        records = [movies[title] for title in titles] if store is None else None
+        for key, (typecode, _) in numerical_types.items():
+            if store is not None and key in store.columns:
+                segments["column:" + key], segments["mask:" + key] = store.column(key)
+                continue
+            column = array(typecode, [0]) * count
+            mask = bytearray(count)
+            for title_id, movie in enumerate(records or movies.values()):
+                value = movie.get(key)
+                if value is not None:
+                    column[title_id] = value
+                    mask[title_id] = 1
+            segments["column:" + key], segments["mask:" + key] = column, mask
+        for key, width in vector_widths.items():
+            if store is not None and key in store.vectors:
+                segments["vector:" + key], segments["mask:" + key] = store.vector(key)
+                continue
+            vector = bytearray(width * count)
+            mask = bytearray(count)
+            for title_id, movie in enumerate(records or movies.values()):
+                value = movie.get(key)
+                if value is not None:
+                    vector[title_id * width:(title_id + 1) * width] = value
+                    mask[title_id] = 1
+            segments["vector:" + key], segments["mask:" + key] = vector, mask
+        for key in categorical_keys:
+            if store is not None and key in store.codes:
+                segments["codes:" + key] = store.codes[key]
+                header['categories'][key] = store.categories[key]
+                continue
+            codes = array('i', [-1]) * count
+            categories = []
+            category_codes = {}
+            for title_id, movie in enumerate(records or movies.values()):
+                value = movie.get(key)
+                if value is not None:
+                    code = category_codes.get(value)
+                    if code is None:
+                        code = category_codes[value] = len(categories)
+                        categories.append(value)
+                    codes[title_id] = code
+            segments["codes:" + key] = codes
+            header['categories'][key] = categories
+        for key in list_keys:
+            offsets = array(offset_typecode, [0])
+            values = array('i')
+            for movie in records or movies.values():
+                values.extend(movie.get(key) or [])
+                offsets.append(len(values))
+            segments["list_offsets:" + key], segments["list_values:" + key] = offsets, values
+        for key in text_keys:
+            texts = [movie.get(key) for movie in records or movies.values()]
+            segments["text_mask:" + key] = bytearray(text is not None for text in texts)
+            segments.update(strings_segments("text:" + key, [text or u"" for text in texts]))
+        for segment_name, segment_strings in (strings or {}).items():
+            segments.update(strings_segments(segment_name, segment_strings))
+        return SharedDataset.publish(header, segments, name, filename)
+
+    # attaches to a dataset published by publish()
+    @classmethod
+    def attach(cls, name, numerical_types=None):
+        return cls(SharedDataset.attach(name), numerical_types)
+
+    def property_keys(self):
+        return MovieStore.property_keys(self) + list(self.lists.keys()) + list(self.texts.keys())
+
+    def get_value(self, title_id, key, default=None):
+        if key in self.lists:
+            offsets, values = self.lists[key]
+            if offsets[title_id] == offsets[title_id + 1]:
+                return default
+            return array('i', values[offsets[title_id]:offsets[title_id + 1]])
+        if key in self.texts:
+            mask, texts = self.texts[key]
+            return texts[title_id] if mask[title_id] else default
+        return MovieStore.get_value(self, title_id, key, default)
+
+    # the store is read only
+    def add_title(self, title):
+        raise TypeError("a shared movie store is read only")
+
+    def set_value(self, title_id, key, value):
+        raise TypeError("a shared movie store is read only")
+
+    def clear_value(self, title_id, key):
+        raise TypeError("a shared movie store is read only")
+
+    def clear_property(self, key):
+        raise TypeError("a shared movie store is read only")
+
+    def __setitem__(self, title, values):
+        raise TypeError("a shared movie store is read only")
+
+    # sent to another process by the name of its dataset, which attaches to it
+    def __reduce__(self):
+        return self.__class__.attach, (self.dataset.name, self.numerical_types)
+
+    def close(self):
+        self.dataset.close()
@@ -0,0 +1,50 @@
+"""
+ A pool of the distinct strings of a property (e.g. the director names, the countries).
+
+ Each distinct string is kept once and gets a dense integer id (in the order they are interned), so the movies can
+ store the ids, or share the pooled string instead of holding their own copy.
+"""
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+
+class SymbolTable(object):
+    def __init__(self, names=None):
+        self.names = []  # id -> name
+        self.ids = {}  # name -> id
+        for name in names or []:
+            self.intern(name)
+
+    # returns the id of a name, giving a new name the next id
+    def intern(self, name):
+        symbol_id = self.ids.get(name)
+        if symbol_id is None:
+            symbol_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return symbol_id
+
+    # returns the pooled copy of a name, adding it if needed
+    def share(self, name):
+        return self.names[self.intern(name)]
+
+    # returns list of the names of a sequence of ids
+    def lookup(self, symbol_ids):
+        return [self.names[symbol_id] for symbol_id in symbol_ids]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    # the ids are rebuilt from the names when unpickled
+    def __getstate__(self):
+        return {'names': self.names}
+
+    def __setstate__(self, state):
+        self.names = state['names']
+        self.ids = dict((name, symbol_id) for symbol_id, name in enumerate(self.names))
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+
+"""
+Writes synthetic versions of the IMDB list files read by IMDBFileProcessor, for testing and benchmarking
+without the real data files.
+
+The files follow the formats of the real ones (headers, series and episode lines, duplicate and unknown titles,
+MV:/BT:/GR: business blocks, director continuation lines, odd running time formats, ...) at any number of titles.
+The titles are a function of their number, so the files are written in one streaming pass and the output only
+depends on the number of titles and the seed.
+
+usage: python SyntheticData.py output_path [titles] [seed] [--gzip]
+"""
+
+import gzip
+import io
+import os
+import random
+import sys
+import textwrap
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+
+class SyntheticData(object):
+    words = [u"Love", u"War", u"Night", u"Star", u"Dead", u"Blue", u"Secret", u"City", u"Last", u"Dream", u"House",
+             u"Man", u"Girl", u"Lost", u"Time", u"Am\xe9lie", u"K\xf6nig", u"Se\xf1or", u"Road", u"Fire"]
+    genres = [u"Drama", u"Comedy", u"Short", u"Documentary", u"Action", u"Thriller", u"Romance", u"Horror",
+              u"Animation", u"Family", u"Crime", u"Adventure", u"Sci-Fi", u"Fantasy", u"Mystery", u"Music",
+              u"Biography", u"History", u"War", u"Western", u"Adult", u"Reality-TV", u"Talk-Show", u"Game-Show"]
+    countries = [u"USA", u"UK", u"Canada", u"France", u"Germany", u"India", u"Japan", u"Italy", u"Spain", u"Iran",
+                 u"Brazil", u"West Germany", u"Soviet Union"]
+    languages = [u"English", u"French", u"German", u"Spanish", u"Japanese", u"Hindi", u"Italian", u"Persian",
+                 u"Portuguese", u"None"]
+    currencies = [u"USD", u"USD", u"USD", u"EUR", u"GBP", u"CAD", u"INR", u"DEM", u"XYZ"]
+    # the running time formats, roughly in the proportions of the real file
+    running_times = [u"85", u"90", u"104", u"12", u"USA:80", u"UK:95", u"Canada:10:53", u"USA:10'30",
+                     u"Japan:2 1/2", u"UK:10x30", u"50 6 episodes", u"1,200", u"approx. 90"]
+    mpaa_ratings = [u"R", u"R", u"PG-13", u"PG", u"NC-17", u"G"]
+    mpaa_reasons = [u"strong violence", u"language", u"some sexual content", u"drug use", u"thematic elements",
+                    u"brief nudity", u"action and peril"]
+    separator = u"-" * 79
+
+    #   titles: the number of titles in movies.list (series, episodes and movies)
+    #   seed: seed of the random choices (the titles themselves only depend on their number)
+    def __init__(self, titles=10000, seed=0):
+        self.titles = titles
+        self.seed = seed
+
+    # returns tuple: (title, year) of the title number i. about 60% are series and episodes, like the real files
+    def title(self, i):
+        name = self.words[(i * 7) % len(self.words)] + u" " + self.words[(i // 3 * 11) % len(self.words)] + \
+            u" " + str(i)
+        year = 1910 + (i * 37) % 107
+        kind = i % 10
+        if kind == 0:
+            return u'"' + name + u'" (' + str(year) + u")", year
+        if kind < 6:
+            return u'"' + name + u'" (' + str(year) + u") {Episode #" + str(kind) + u"." + str(i % 24 + 1) + u"}", year
+        if i % 97 == 6:
+            return name + u" (????)", None
+        title = name + u" (" + str(year) + (u"/II" if i % 89 == 7 else u"") + u")"
+        if i % 50 == 7:
+            title += u" (V)"
+        elif i % 50 == 8:
+            title += u" (TV)"
+        elif i % 50 == 9:
+            title += u" (VG)"
+        return title, year
+
+    # returns a random value, the first values being the most common (like Drama in genres or USA in countries)
+    @staticmethod
+    def skewed_choice(rand, values):
+        return values[int(len(values) * rand.random() ** 2)]
+
+    # returns tuple: (title, year) of a random title, or of a title that is not in movies.list (about 2%)
+    def random_title(self, rand):
+        if rand.random() < 0.02:
+            return u"Missing Title " + str(rand.randrange(self.titles)) + u" (2000)", 2000
+        return self.title(rand.randrange(self.titles))
+
+    # iterates the titles in order, with a random generator for each file
+    def each_title(self, file_seed):
+        rand = random.Random(self.seed * 1000 + file_seed)
+        for i in range(self.titles):
+            title, year = self.title(i)
+            yield rand, title, year
+
+    def write_movies(self, f):
+        f.write(u"CRC: 0x2A0E3D0A  File: movies.list  Date: Fri Dec 23 00:00:00 2016\n\nMOVIES LIST\n===========\n\n")
+        for rand, title, year in self.each_title(1):
+            if title.startswith(u'"') and title.endswith(u")"):
+                year_text = str(year) + u"-" + (str(year + rand.randint(0, 9)) if rand.random() < 0.7 else u"????")
+            else:
+                year_text = str(year) if year is not None else u"????"
+            line = title + u"\t" * (1 + (len(title) < 64) + (len(title) < 32)) + year_text + u"\n"
+            f.write(line)
+            if rand.random() < 0.01:
+                f.write(line)  # duplicate title
+        f.write(u"\n" + u"-" * 80 + u"\n")
+
+    def write_genres(self, f):
+        f.write(u"CRC: 0x5A3B9D10  File: genres.list\n\n8: THE GENRES LIST\n==================\n\n")
+        for rand, title, year in self.each_title(2):
+            genres = set(self.skewed_choice(rand, self.genres) for _ in range(rand.choice([0, 1, 1, 1, 2, 2, 3])))
+            for genre in sorted(genres):
+                f.write(title + u"\t\t\t\t" + genre + u"\n")
+            if rand.random() < 0.02:
+                f.write(self.random_title(rand)[0] + u"\t\t\t\t" + self.skewed_choice(rand, self.genres) + u"\n")
+
+    def write_ratings(self, f):
+        f.write(u"CRC: 0x88A5B2FD  File: ratings.list\n\nMOVIE RATINGS REPORT\n\n"
+                u"New  Distribution  Votes  Rank  Title\n")
+        for rand, title, year in self.each_title(3):
+            if rand.random() < 0.6:
+                distribution = u"".join(rand.choice(u"..000001112223456789*") for _ in range(10))
+                f.write(u"      %s  %7d   %4.1f  %s\n" % (distribution, int(rand.paretovariate(1.2) * 5),
+                                                          rand.randint(10, 100) / 10.0, title))
+        f.write(u"\n" + self.separator + u"\nREPORT FORMAT\n")
+
+    def write_business(self, f):
+        f.write(u"CRC: 0x3BC3D2E8  File: business.list\n\nBUSINESS LIST\n=============\n\n" + self.separator + u"\n")
+        for rand, title, year in self.each_title(4):
+            if title.startswith(u'"') or rand.random() < 0.85:
+                continue
+            f.write(u"MV: " + title + u"\n\n")
+            currency = rand.choice(self.currencies)
+            if rand.random() < 0.6:
+                amount = u"{:,}".format(rand.randint(1000, 300000000)) if rand.random() < 0.98 else u"(estimated)"
+                f.write(u"BT: " + currency + u" " + amount + u"\n")
+            for _ in range(rand.randint(0, 4)):
+                f.write(u"GR: " + currency + u" " + u"{:,}".format(rand.randint(1000, 900000000)) +
+                        u" (" + rand.choice([u"USA", u"Worldwide", u"UK"]) + u") (5 June " + str(year or 2000) + u")\n")
+            if rand.random() < 0.3:
+                f.write(u"OW: USD " + u"{:,}".format(rand.randint(1000, 90000000)) + u" (USA) (3,558 screens)\n")
+            f.write(u"\n" + self.separator + u"\n")
+
+    def write_directors(self, f):
+        f.write(u"CRC: 0x4F1E6AD2  File: directors.list\n\nTHE DIRECTORS LIST\n==================\n\n"
+                u"Name\t\t\tTitles\n----\t\t\t------\n")
+        rand = random.Random(self.seed * 1000 + 5)
+        for director in range(max(self.titles // 4, 1)):
+            name = self.words[director % len(self.words)] + u", Person " + str(director)
+            for line in range(rand.choice([1, 1, 1, 2, 3, 5, 12])):
+                title = self.random_title(rand)[0]
+                if rand.random() < 0.1:
+                    title += u"  (as P. " + str(director) + u")"
+                if rand.random() < 0.05:
+                    title += u"  (uncredited)"
+                f.write((name + u"\t\t" if line == 0 else u"\t\t\t") + title + u"\n")
+            f.write(u"\n")
+        f.write(u"\n" + self.separator + u"\nSUBMITTING UPDATES\n==================\n")
+
+    # writes actors.list or actresses.list: blocks of a name and its titles, with roles and billing positions
+    def write_cast(self, f, header, label, persons, file_seed):
+        f.write(u"CRC: 0x6A1C2B3D  File: " + header + u"\n\nName\t\t\tTitles\n----\t\t\t------\n")
+        rand = random.Random(self.seed * 1000 + file_seed)
+        for person in range(persons):
+            name = self.words[(person * 3) % len(self.words)] + u", " + label + u" " + str(person) + \
+                (u" (" + [u"I", u"II", u"III"][person % 3] + u")" if person % 17 == 0 else u"")
+            titles = sorted(self.random_title(rand)[0] for _ in range(rand.choice([1, 1, 2, 3, 5, 8, 20])))
+            for line, title in enumerate(titles):
+                if rand.random() < 0.05:
+                    title += u"  (uncredited)"
+                title += u"  [" + self.words[rand.randrange(len(self.words))] + u" (voice)" * (rand.random() < 0.1) + \
+                    u"]"
+                if rand.random() < 0.5:
+                    title += u"  <" + str(rand.randint(1, 40)) + u">"
+                f.write((name + u"\t" if line == 0 else u"\t\t\t") + title + u"\n")
+            f.write(u"\n")
+        f.write(u"\n" + self.separator + u"\nSUBMITTING UPDATES\n==================\n")
+
+    # writes keywords.list: the summary of the keywords, then a line per keyword of each title
+    def write_keywords(self, f):
+        keywords = [(first + u"-" + second).lower() for first in self.words for second in self.words] + \
+            [u"character-name-in-title", u"based-on-novel", u"independent-film", u"time-travel", u"se\xf1or-n\xba-1"]
+        f.write(u"CRC: 0x7B2D3E4F  File: keywords.list\n\nkeywords in use:\n\n")
+        for index in range(0, len(keywords), 3):
+            f.write(u"   ".join(keyword + u" (" + str(index) + u")" for keyword in keywords[index:index + 3]) + u"\n")
+        f.write(u"\n\n8: THE KEYWORDS LIST\n====================\n\n")
+        for rand, title, year in self.each_title(12):
+            for keyword in sorted(set(self.skewed_choice(rand, keywords)
+                                      for _ in range(rand.choice([0, 0, 1, 2, 3, 5, 8])))):
+                f.write(title + u"\t" * rand.choice([1, 2, 3]) + keyword + u"\n")
+        f.write(u"\n")
+
+    # writes plot.list: MV: blocks with one or two summaries of PL: lines, each followed by its BY: author
+    def write_plots(self, f):
+        vocabulary = [word.lower() + suffix for word in self.words
+                      for suffix in [u"", u"s", u"ed", u"ing", u"er", u"ly", u"ness", u"'s"]] + \
+            [u"the", u"a", u"of", u"and", u"to", u"in", u"his", u"her", u"don't", u"1820s"]
+        f.write(u"CRC: 0x8C3E4F5A  File: plot.list\n\nPLOT SUMMARIES LIST\n===================\n\n" +
+                self.separator + u"\n")
+        for rand, title, year in self.each_title(13):
+            if rand.random() < 0.4:
+                continue
+            f.write(u"MV: " + title + u"\n\n")
+            for _ in range(rand.choice([1, 1, 1, 2])):
+                words = [self.skewed_choice(rand, vocabulary) for _ in range(rand.randint(10, 80))]
+                words[0] = words[0].capitalize()
+                for line in textwrap.wrap(u" ".join(words) + u".", 72):
+                    f.write(u"PL: " + line + u"\n")
+                f.write(u"\nBY: Anonymous\n\n")
+            f.write(self.separator + u"\n")
+
+    def write_running_times(self, f):
+        f.write(u"CRC: 0x1B2C3D4E  File: running-times.list\n\nRUNNING TIMES LIST\n==================\n")
+        for rand, title, year in self.each_title(6):
+            for _ in range(rand.choice([0, 1, 1, 1, 2])):
+                note = u"\t(" + rand.choice([u"uncut", u"director's cut", u"TV version"]) + u")" \
+                    if rand.random() < 0.1 else u""
+                f.write(title + u"\t\t\t" + rand.choice(self.running_times) + note + u"\n")
+        f.write(u"\n" + self.separator + u"\n")
+
+    def write_values(self, f, header, values, file_seed):
+        f.write(header)
+        for rand, title, year in self.each_title(file_seed):
+            for _ in range(rand.choice([0, 1, 1, 1, 2])):
+                f.write(title + u"\t\t\t\t" + self.skewed_choice(rand, values) + u"\n")
+            if rand.random() < 0.02:
+                f.write(self.random_title(rand)[0] + u"\t\t\t" + self.skewed_choice(rand, values) + u"\n")
+        f.write(u"\n" + self.separator + u"\n")
+
+    def write_mpaa(self, f):
+        f.write(u"MPAA RATINGS REASONS LIST\n=========================\n\n" + self.separator + u"\n")
+        for rand, title, year in self.each_title(9):
+            if title.startswith(u'"') or rand.random() < 0.8:
+                continue
+            reason = u"Rated " + rand.choice(self.mpaa_ratings) + u" for " + \
+                u", ".join(rand.sample(self.mpaa_reasons, rand.randint(1, 3))) + u" and " + \
+                rand.choice(self.mpaa_reasons) + u"."
+            f.write(u"MV: " + title + u"\n")
+            while len(reason) > 0:
+                f.write(u"RE: " + reason[:70] + u"\n")
+                reason = reason[70:]
+            f.write(u"\n" + self.separator + u"\n")
+
+    # writes all the list files to output_directory, gzip compressed (name.list.gz) with compress.
+    # returns the list of the files written
+    def write(self, output_directory, compress=False):
+        writers = [("movies.list", self.write_movies),
+                   ("genres.list", self.write_genres),
+                   ("ratings.list", self.write_ratings),
+                   ("business.list", self.write_business),
+                   ("directors.list", self.write_directors),
+                   ("running-times.list", self.write_running_times),
+                   ("countries.list", lambda f: self.write_values(
+                       f, u"COUNTRIES LIST\n==============\n", self.countries, 7)),
+                   ("language.list", lambda f: self.write_values(
+                       f, u"LANGUAGE LIST\n=============\n", self.languages, 8)),
+                   ("mpaa-ratings-reasons.list", self.write_mpaa),
+                   ("actors.list", lambda f: self.write_cast(
+                       f, u"actors.list\n\nTHE ACTORS LIST\n===============\n", u"Actor", max(self.titles // 2, 1), 10)),
+                   ("actresses.list", lambda f: self.write_cast(
+                       f, u"actresses.list\n\nTHE ACTRESSES LIST\n==================\n", u"Actress",
+                       max(self.titles // 4, 1), 11)),
+                   ("keywords.list", self.write_keywords),
+                   ("plot.list", self.write_plots)]
+        if not os.path.isdir(output_directory):
+            os.makedirs(output_directory)
+        filenames = []
+        for name, writer in writers:
+            filename = os.path.join(output_directory, name + (".gz" if compress else ""))
+            raw = gzip.open(filename, 'wb') if compress else io.open(filename, 'wb')
+            with io.TextIOWrapper(raw, encoding="ISO-8859-1", newline="\n") as f:
+                writer(f)
+            filenames.append(filename)
+        return filenames
+
+
+if __name__ == '__main__':
+    arguments = [argument for argument in sys.argv[1:] if argument != "--gzip"]
+    if len(arguments) < 1:
+        print(__doc__)
+        sys.exit(1)
+    data = SyntheticData(int(arguments[1]) if len(arguments) > 1 else 10000,
+                         int(arguments[2]) if len(arguments) > 2 else 0)
+    for written in data.write(arguments[0], compress="--gzip" in sys.argv):
+        print(written + ": " + str(os.path.getsize(written)) + " bytes")
@@ -0,0 +1,207 @@
+"""
+ A full-text inverted index of the keywords (keywords.list) and plot summaries (plot.list) of the movies.
+
+ Each field (e.g. 'keyword', 'plot') maps its terms to postings: the sorted title ids (the positions of the titles in
+ IMDBFileProcessor.movies) of the movies that have the term. The postings are delta encoded as variable length integers
+ (7 bits per byte, the high bit set on all but the last byte of a number), so a frequent term takes about a byte per
+ movie. The index is written once by TextIndexBuilder to a file of SharedDataset segments, and memory mapped by
+ TextIndex: the sorted terms (a utf-8 blob, binary searched) and the postings are read from the mapped pages, only the
+ postings of the query terms are decoded.
+
+ A query intersects (all terms) or unites (any term) the postings of its terms, the shortest postings first.
+
+ Like the SharedDataset files, the index needs python 3.3+ (IMDBFileProcessor.build_text_index and open_text_index raise
+ a RuntimeError otherwise).
+"""
+
+import re
+from array import array
+
+from SharedDataset import SharedDataset, offset_typecode, strings_segments
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+# the words of a text: letters and digits, apostrophes inside a word dropped (e.g. "don't" -> "dont")
+regex_word = re.compile(r"\w+(?:'\w+)*", re.UNICODE)
+
+
+# returns the distinct lower case words of a text, of 2 characters or more
+def tokenize(text):
+    return set(word.replace("'", "") for word in regex_word.findall(text.lower()) if len(word) > 1)
+
+
+# returns the term of a keyword (lower case, e.g. "character-name-in-title")
+def keyword_term(keyword):
+    return keyword.strip().lower()
+
+
+# returns the variable length encoding (bytes) of non negative integers: 7 bits per byte, the high bit set on all but
+# the last byte of a number. packed in C when all of them fit in one byte
+def encode_varints(numbers):
+    if len(numbers) == 0 or max(numbers) < 0x80:
+        return bytes(bytearray(numbers))
+    encoded = bytearray()
+    for number in numbers:
+        while number >= 0x80:
+            encoded.append(number & 0x7f | 0x80)
+            number >>= 7
+        encoded.append(number)
+    return bytes(encoded)
+
+
+# returns list of the integers of encode_varints
+def decode_varints(encoded):
+    numbers = []
+    number = 0
+    shift = 0
+    for byte in bytearray(encoded):
+        number |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        numbers.append(number)
+        number = 0
+        shift = 0
+    return numbers
+
+
+# returns the variable length encoding (bytes, see encode_varints) of the deltas between sorted distinct title ids
+# (the first delta is the first id). most deltas of a frequent term fit in one byte
+def encode_postings(title_ids):
+    return encode_varints([title_ids[0]] + [title_id - previous for previous, title_id in zip(title_ids, title_ids[1:])]
+                          if len(title_ids) > 0 else [])
+
+
+# returns list of the title ids of encoded postings (see encode_postings) of count title ids
+def decode_postings(encoded, count):
+    # (all the deltas in one byte when there is a byte per title id)
+    deltas = bytearray(encoded) if len(encoded) == count else decode_varints(encoded)
+    title_ids = []
+    title_id = 0
+    for delta in deltas:
+        title_id += delta
+        title_ids.append(title_id)
+    return title_ids
+
+
+# collects the terms of the movies of each field, and writes the index
+class TextIndexBuilder(object):
+    def __init__(self, fields):
+        self.fields = list(fields)
+        self.postings = dict((field, {}) for field in self.fields)  # field -> {term: array of title ids}
+
+    # adds the terms of a movie to a field
+    def add(self, field, title_id, terms):
+        field_postings = self.postings[field]
+        for term in terms:
+            title_ids = field_postings.get(term)
+            if title_ids is None:
+                title_ids = field_postings[term] = array('i')
+            title_ids.append(title_id)
+
+    # writes the index to a file (replacing it) and returns the TextIndex of it.
+    #   header: dict saved with the index, e.g. what it was built from (TextIndex.header)
+    def write(self, filename, header=None):
+        segments = {}
+        term_counts = {}
+        for field in self.fields:
+            field_postings = self.postings[field]
+            # (sorted by their utf-8 encoding, the order of the binary search)
+            terms = sorted(field_postings, key=lambda term: term.encode("utf-8"))
+            posting_offsets = array(offset_typecode, [0])
+            posting_counts = array('i')
+            encoded_postings = bytearray()
+            for term in terms:
+                title_ids = sorted(set(field_postings[term]))
+                encoded_postings += encode_postings(title_ids)
+                posting_offsets.append(len(encoded_postings))
+                posting_counts.append(len(title_ids))
+            segments.update(strings_segments(field + ":terms", terms))
+            segments[field + ":posting_offsets"] = posting_offsets
+            segments[field + ":posting_counts"] = posting_counts
+            segments[field + ":postings"] = encoded_postings
+            term_counts[field] = len(terms)
+        header = dict(header or {})
+        header['fields'] = self.fields
+        header['term_counts'] = term_counts
+        SharedDataset.publish(header, segments, filename=filename).close()
+        return TextIndex.open(filename)
+
+
+class TextIndex(object):
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.header = dataset.header
+        self.fields = self.header['fields']
+        self.terms = dict((field, dataset.strings(field + ":terms")) for field in self.fields)
+        self.posting_offsets = dict((field, dataset.segment(field + ":posting_offsets")) for field in self.fields)
+        self.posting_counts = dict((field, dataset.segment(field + ":posting_counts")) for field in self.fields)
+        self.postings_data = dict((field, dataset.segment(field + ":postings")) for field in self.fields)
+
+    # memory maps an index written by TextIndexBuilder
+    @classmethod
+    def open(cls, filename):
+        return cls(SharedDataset.attach(filename))
+
+    # returns the position of a term in the sorted terms of a field, or None
+    def term_position(self, field, term):
+        terms = self.terms[field]
+        encoded = term.encode("utf-8")
+        low, high = 0, len(terms)
+        while low < high:
+            middle = (low + high) // 2
+            if terms.encoded(middle) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(terms) and terms.encoded(low) == encoded:
+            return low
+        return None
+
+    # returns the number of movies with a term
+    def count(self, field, term):
+        position = self.term_position(field, term)
+        return self.posting_counts[field][position] if position is not None else 0
+
+    # returns sorted list of the title ids of the movies with a term
+    def postings(self, field, term):
+        position = self.term_position(field, term)
+        if position is None:
+            return []
+        offsets = self.posting_offsets[field]
+        return decode_postings(self.postings_data[field][offsets[position]:offsets[position + 1]],
+                               self.posting_counts[field][position])
+
+    # returns sorted list of the title ids of the movies matching all the conditions:
+    #   all_terms: list of tuples: [(field, term), ...] the movies must have all of them
+    #   any_terms: list of tuples: [(field, term), ...] the movies must have at least one of them
+    #   title_ids: optional candidates (e.g. the positions of IMDBFileProcessor.select_positions) to intersect with
+    def search(self, all_terms=(), any_terms=(), title_ids=None):
+        # the rarest terms first: the candidates only shrink
+        all_terms = sorted(all_terms, key=lambda field_term: self.count(*field_term))
+        if len(all_terms) > 0 and self.count(*all_terms[0]) == 0:
+            return []
+        results = set(title_ids) if title_ids is not None else None
+        for field, term in all_terms:
+            postings = self.postings(field, term)
+            results = set(postings) if results is None else results.intersection(postings)
+            if len(results) == 0:
+                return []
+        if len(any_terms) > 0:
+            matches = set()
+            for field, term in any_terms:
+                matches.update(self.postings(field, term))
+            results = matches if results is None else results.intersection(matches)
+        return sorted(results) if results is not None else []
+
+    # returns the number of bytes of the index file
+    def size(self):
+        return self.dataset.size()
+
+    # releases the memory map. the results of the queries stay valid
+    def close(self):
+        self.dataset.close()
@@ -0,0 +1,111 @@
+"""
+ A case insensitive search index over the movie titles.
+
+ Prefix queries are answered by a binary search over the sorted lower case titles.
+ Substring queries intersect the posting lists of the trigrams of the phrase, then check the few candidates left.
+ Titles added after the index is built are kept aside and merged into the sorted list at the next query.
+"""
+
+from array import array
+from bisect import bisect_left
+import heapq
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+
+class TitleIndex(object):
+    ngram_length = 3
+
+    def __init__(self, titles=None):
+        self.titles = []  # title id -> title
+        self.folded = []  # title id -> lower case title
+        self.sorted_keys = []  # sorted lower case titles
+        self.sorted_ids = array('i')  # title ids in the order of sorted_keys
+        self.pending_ids = []  # title ids not merged into sorted_keys yet
+        self.ngrams = None  # trigram -> array of title ids. built at the first substring query
+        for title in (titles or []):
+            self.add(title)
+        self.merge_pending()
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add(self, title):
+        title_id = len(self.titles)
+        key = title.lower()
+        self.titles.append(title)
+        self.folded.append(key)
+        self.pending_ids.append(title_id)
+        if self.ngrams is not None:
+            self.add_ngrams(title_id, key)
+
+    def add_ngrams(self, title_id, key):
+        for ngram in set(key[i:i + self.ngram_length] for i in range(len(key) - self.ngram_length + 1)):
+            postings = self.ngrams.get(ngram)
+            if postings is None:
+                postings = self.ngrams[ngram] = array('i')
+            postings.append(title_id)
+
+    # merges the titles added since the last query into the sorted keys
+    def merge_pending(self):
+        if len(self.pending_ids) == 0:
+            return
+        folded = self.folded
+        pending = sorted(self.pending_ids, key=lambda title_id: folded[title_id])
+        merged = heapq.merge(zip(self.sorted_keys, self.sorted_ids),
+                             ((folded[title_id], title_id) for title_id in pending))
+        self.sorted_keys = []
+        self.sorted_ids = array('i')
+        for key, title_id in merged:
+            self.sorted_keys.append(key)
+            self.sorted_ids.append(title_id)
+        self.pending_ids = []
+
+    # returns list of titles starting with phrase, sorted by lower case title.
+    #   limit, offset: returns at most limit titles, after skipping the first offset ones (for paging)
+    def startwith(self, phrase, limit=None, offset=0):
+        self.merge_pending()
+        phrase = phrase.lower()
+        results = []
+        position = bisect_left(self.sorted_keys, phrase) + offset
+        while position < len(self.sorted_keys) and (limit is None or len(results) < limit):
+            if not self.sorted_keys[position].startswith(phrase):
+                break
+            results.append(self.titles[self.sorted_ids[position]])
+            position += 1
+        return results
+
+    # returns list of titles containing phrase, sorted by lower case title.
+    #   limit, offset: returns at most limit titles, after skipping the first offset ones (for paging)
+    def contain(self, phrase, limit=None, offset=0):
+        phrase = phrase.lower()
+        folded = self.folded
+        if len(phrase) < self.ngram_length:
+            # too short for the trigrams: scan the lower case titles
+            self.merge_pending()
+            matches = [title_id for key, title_id in zip(self.sorted_keys, self.sorted_ids) if phrase in key]
+        else:
+            if self.ngrams is None:
+                self.ngrams = {}
+                for title_id, key in enumerate(folded):
+                    self.add_ngrams(title_id, key)
+            postings = []
+            for i in range(len(phrase) - self.ngram_length + 1):
+                ngram_postings = self.ngrams.get(phrase[i:i + self.ngram_length])
+                if ngram_postings is None:
+                    return []
+                postings.append(ngram_postings)
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for ngram_postings in postings[1:]:
+                if len(candidates) < 64:
+                    break  # cheaper to check the few candidates left directly
+                candidates.intersection_update(ngram_postings)
+            matches = sorted((title_id for title_id in candidates if phrase in folded[title_id]),
+                             key=lambda title_id: (folded[title_id], title_id))
+        end = None if limit is None else offset + limit
+        return [self.titles[title_id] for title_id in matches[offset:end]]
@@ -0,0 +1,45 @@
+"""
+ Resolves the title fields of the list files that carry more than the title (e.g. in directors.list) to the movies.
+
+ A field is either the title itself, or the title followed by an episode in { } or notes such as (as ...) or
+ (uncredited): '"Show" (2005) {Pilot (#1.1)}', 'Movie (1999) (V)  (as J. Doe)', 'Movie (????)  (uncredited)'.
+ Every title ends with a ")" (its year, e.g. (2005), (2005/II) or (????), then any (V), (TV) or (VG) marker), so the
+ field is resolved by looking up its prefixes that end with a ")" in the titles, the longest first: a few hash lookups
+ instead of matching a regex to each field.
+
+ The fields are str or bytes (looked up in the ISO-8859-1 encoded titles of the binary readers).
+"""
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+
+class TitleResolver(object):
+    # the variants of the fields resolved to a shorter title
+    variants = ['episode', 'note']
+
+    #   titles: dict like of the titles, or of the encoded titles
+    def __init__(self, titles):
+        self.titles = titles
+        self.variant_count = dict((variant, 0) for variant in self.variants)  # variant -> number of fields resolved
+
+    # returns the title (the key of titles) a field refers to, or None when it is not found
+    def resolve(self, field):
+        if field in self.titles:
+            return field
+        if isinstance(field, bytes):
+            close, brace = b')', b'{'
+        else:
+            close, brace = u')', u'{'
+        end = field.rfind(close)
+        while end > 0:
+            title = field[:end + 1]
+            if title in self.titles:
+                variant = 'episode' if field.find(brace, end) >= 0 else 'note'
+                self.variant_count[variant] += 1
+                return title
+            end = field.rfind(close, 0, end)
+        return None
@@ -0,0 +1,71 @@
+"""
+ Tests of the grouped statistics and the correlation matrix of IMDBFileProcessor, with both stores.
+"""
+
+import io
+import math
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from IMDBFileProcessor import IMDBFileProcessor
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+movies_list = u"""Alpha (1999)\t\t\t\t1999
+Beta (2005)\t\t\t\t2005
+Gamma (2010)\t\t\t\t2010
+Delta (2010)\t\t\t\t2010
+"""
+
+genres_list = u"""Alpha (1999)\t\t\t\tDrama
+Beta (2005)\t\t\t\tDrama
+Beta (2005)\t\t\t\tHorror
+Gamma (2010)\t\t\t\tHorror
+"""
+
+
+class AggregationTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name, text in [("movies.list", movies_list), ("genres.list", genres_list)]:
+            with io.open(os.path.join(self.directory, name), 'w', encoding="ISO-8859-1") as f:
+                f.write(text)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, compact_store):
+        processor = IMDBFileProcessor(self.directory + os.sep, compact_store=compact_store)
+        processor.enable_print_progress = False
+        processor.load([IMDBFileProcessor.key_genre], workers=1)
+        return processor
+
+    def test_aggregate_by_genre(self):
+        for compact_store in [False, True]:
+            groups = self.read(compact_store).aggregate([IMDBFileProcessor.key_year], by=[IMDBFileProcessor.key_genre])
+            self.assertEqual(sorted(groups), [("Drama",), ("Horror",)])
+            self.assertEqual(groups[("Drama",)][IMDBFileProcessor.key_year].count, 2)
+            self.assertEqual(groups[("Horror",)][IMDBFileProcessor.key_year].mean, 2007.5)
+
+    def test_correlation_matrix(self):
+        for compact_store in [False, True]:
+            keys, matrix = self.read(compact_store).correlation_matrix([IMDBFileProcessor.key_year])
+            self.assertEqual(len(matrix), len(keys))
+            self.assertEqual(matrix[0][0], 1.0)
+            for i in range(len(keys)):
+                for j in range(len(keys)):
+                    self.assertTrue(math.isnan(matrix[i][j]) and math.isnan(matrix[j][i]) or
+                                    matrix[i][j] == matrix[j][i])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+ Tests of the load() worker functions of IMDBFileProcessor, run in this process.
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+try:
+    from StringIO import StringIO  # python 2 print writes str
+except ImportError:
+    from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from IMDBFileProcessor import IMDBFileProcessor, _load_worker_init, _load_worker_read
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+movies_list = u"""Alpha (1999)\t\t\t\t1999
+Beta (2005)\t\t\t\t2005
+"""
+
+genres_list = u"""Alpha (1999)\t\t\t\tDrama
+Beta (2005)\t\t\t\tHorror
+"""
+
+
+class LoadWorkerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name, text in [("movies.list", movies_list), ("genres.list", genres_list)]:
+            with io.open(os.path.join(self.directory, name), 'w', encoding="ISO-8859-1") as f:
+                f.write(text)
+        self.processor = IMDBFileProcessor(self.directory + os.sep)
+        self.processor.enable_print_progress = False
+        self.processor.read_movies()
+        self.processor.enable_print_progress = True
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # the stats of a whole file read are printed by the parent only (see run_readers)
+    def test_worker_does_not_print(self):
+        _load_worker_init(self.processor)
+        stdout = sys.stdout
+        sys.stdout = output = StringIO()
+        try:
+            reader, start, values, state, stats = _load_worker_read(('read_genres', None, None))
+        finally:
+            sys.stdout = stdout
+        self.assertEqual(output.getvalue(), "")
+        self.assertEqual(reader, 'read_genres')
+        self.assertEqual(len(values), 2)
+        self.assertEqual(stats.lines, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+ Tests of the readers recorded as loaded (IMDBFileProcessor.loaded_readers) by load and require.
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from IMDBFileProcessor import IMDBFileProcessor
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+movies_list = u"""Alpha (1999)\t\t\t\t1999
+Beta (2005)\t\t\t\t2005
+"""
+
+genres_list = u"""Alpha (1999)\t\t\t\tDrama
+Beta (2005)\t\t\t\tHorror
+"""
+
+countries_list = u"""Alpha (1999)\t\t\t\tFrance
+"""
+
+
+class LoadedReadersTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name, text in [("movies.list", movies_list), ("genres.list", genres_list)]:
+            with io.open(os.path.join(self.directory, name), 'w', encoding="ISO-8859-1") as f:
+                f.write(text)
+        self.processor = IMDBFileProcessor(self.directory + os.sep)
+        self.processor.enable_print_progress = False
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_failed_reader_not_loaded(self):
+        def intern_genre(genre):
+            raise IOError("read failed")
+        self.processor.intern_genre = intern_genre
+        self.assertRaises(IOError, self.processor.require, [IMDBFileProcessor.key_genre])
+        self.assertEqual(self.processor.loaded_readers, ['read_movies'])
+        # the reader is run again by the next require
+        del self.processor.intern_genre
+        self.processor.require([IMDBFileProcessor.key_genre])
+        self.assertEqual(self.processor.loaded_readers, ['read_movies', 'read_genres'])
+        self.assertEqual(self.processor.get_genres(self.processor.movies[u"Beta (2005)"]), [u"Horror"])
+
+    # a missing list file is not loaded, and is read by the next require once it is there
+    def check_missing_file(self, workers):
+        self.processor.load([IMDBFileProcessor.key_genre, IMDBFileProcessor.key_country], workers=workers)
+        self.assertFalse(self.processor.reader_stats['read_country'].file_found)
+        self.assertEqual(self.processor.loaded_readers, ['read_movies', 'read_genres'])
+        with io.open(os.path.join(self.directory, "countries.list"), 'w', encoding="ISO-8859-1") as f:
+            f.write(countries_list)
+        self.processor.require([IMDBFileProcessor.key_country])
+        self.assertEqual(self.processor.loaded_readers, ['read_movies', 'read_genres', 'read_country'])
+        self.assertEqual(self.processor.movies[u"Alpha (1999)"][IMDBFileProcessor.key_country], u"France")
+
+    def test_missing_file(self):
+        self.check_missing_file(workers=1)
+
+    def test_missing_file_workers(self):
+        self.check_missing_file(workers=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
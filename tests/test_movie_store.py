@@ -0,0 +1,72 @@
+"""
+ Tests of the compact MovieStore of IMDBFileProcessor (compact_store=True).
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from IMDBFileProcessor import IMDBFileProcessor
+from MovieStore import MovieStore
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+movies_list = u"""Alpha (1999)\t\t\t\t1999
+Beta (2005)\t\t\t\t2005
+Gamma (2010)\t\t\t\t2010
+"""
+
+genres_list = u"""Alpha (1999)\t\t\t\tDrama
+Alpha (1999)\t\t\t\tComedy
+Beta (2005)\t\t\t\tHorror
+Unknown (2001)\t\t\t\tDrama
+"""
+
+
+class CompactStoreGenresTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name, text in [("movies.list", movies_list), ("genres.list", genres_list)]:
+            with io.open(os.path.join(self.directory, name), 'w', encoding="ISO-8859-1") as f:
+                f.write(text)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, compact_store):
+        processor = IMDBFileProcessor(self.directory + os.sep, compact_store=compact_store)
+        processor.enable_print_progress = False
+        processor.load([IMDBFileProcessor.key_genre], workers=1)
+        return processor
+
+    def test_genres(self):
+        processor = self.read(compact_store=True)
+        self.assertIsInstance(processor.movies, MovieStore)
+        self.assertEqual(sorted(processor.get_genres(processor.movies["Alpha (1999)"])), ["Comedy", "Drama"])
+        self.assertEqual(processor.get_genres(processor.movies["Beta (2005)"]), ["Horror"])
+        self.assertEqual(processor.get_genres(processor.movies["Gamma (2010)"]), [])
+        self.assertEqual([title for title, _ in processor.select(genres=["Drama"])], ["Alpha (1999)"])
+
+    def test_same_as_dict_store(self):
+        compact = self.read(compact_store=True)
+        default = self.read(compact_store=False)
+        for title in default.movies:
+            self.assertEqual(compact.get_genres(compact.movies[title]), default.get_genres(default.movies[title]))
+
+    def test_64_genre_bits(self):
+        store = MovieStore(IMDBFileProcessor.numerical_types)
+        store["Alpha (1999)"] = {IMDBFileProcessor.key_genre: 1 << 63 | 1}
+        self.assertEqual(store["Alpha (1999)"][IMDBFileProcessor.key_genre], 1 << 63 | 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+ Tests of OffsetIndex written to a file by OffsetIndexBuilder.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OffsetIndex import OffsetIndexBuilder
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+
+class OffsetIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "offset.index")
+        self.builder = OffsetIndexBuilder([('genres', False), ('directors', True)])
+        # two consecutive lines of title 1 are one range, a line past 4 GB needs 64 bit offsets
+        self.builder.add('genres', 1, 10, 20)
+        self.builder.add('genres', 1, 20, 35)
+        self.builder.add('genres', 0, 35, 50)
+        self.builder.add('genres', 1, 5000000000, 5000000012)
+        self.builder.add_block('directors', 100, 120)
+        self.builder.add('directors', 1, 120, 140)
+        self.builder.add_block('directors', 200, 210)
+        self.builder.add('directors', 1, 210, 230)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @unittest.skipIf(sys.version_info < (3, 3), "the offset index needs python 3.3+")
+    def test_write_open(self):
+        index = self.builder.write(self.filename)
+        try:
+            self.assertEqual(index.ranges('genres', 1), [(10, 35, None, None), (5000000000, 5000000012, None, None)])
+            self.assertEqual(index.ranges('genres', 0), [(35, 50, None, None)])
+            self.assertEqual(index.ranges('genres', 2), [])
+            self.assertEqual(index.ranges('directors', 1), [(120, 140, 100, 120), (210, 230, 200, 210)])
+            self.assertEqual(index.ranges('ratings', 1), [])
+        finally:
+            index.close()
+
+    @unittest.skipIf(sys.version_info >= (3, 3), "the offset index needs python 3.3+")
+    def test_old_python(self):
+        self.assertRaises(RuntimeError, self.builder.write, self.filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
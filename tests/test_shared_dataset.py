@@ -0,0 +1,51 @@
+"""
+ Tests of SharedDataset published to a file.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SharedDataset import SharedDataset, strings_segments
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+
+class SharedDatasetFileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "dataset")
+        self.segments = {'values': array('i', [1, 2, 3])}
+        self.segments.update(strings_segments('names', [u"Alpha (1999)", u"Am\xe9lie (2001)"]))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @unittest.skipIf(sys.version_info < (3, 3), "attaching needs python 3.3+")
+    def test_publish_attach(self):
+        SharedDataset.publish({'count': 3}, self.segments, filename=self.filename).close()
+        dataset = SharedDataset.attach(self.filename)
+        try:
+            self.assertEqual(dataset.header['count'], 3)
+            self.assertEqual(list(dataset.segment('values')), [1, 2, 3])
+            self.assertEqual(list(dataset.strings('names')), [u"Alpha (1999)", u"Am\xe9lie (2001)"])
+        finally:
+            dataset.close()
+
+    @unittest.skipIf(sys.version_info >= (3, 3), "attaching needs python 3.3+")
+    def test_old_python(self):
+        self.assertRaises(RuntimeError, SharedDataset.publish, {'count': 3}, self.segments, filename=self.filename)
+        self.assertFalse(os.path.exists(self.filename))
+
+
+if __name__ == '__main__':
+    unittest.main()
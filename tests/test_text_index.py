@@ -0,0 +1,52 @@
+"""
+ Tests of TextIndex written to a file by TextIndexBuilder.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from TextIndex import TextIndexBuilder
+
+__author__ = "Hamid Younesy"
+__copyright__ = "Copyright 2016"
+__license__ = "MIT"
+__version__ = "1.0.1"
+__maintainer__ = "Hamid Younesy"
+
+
+class TextIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "text.index")
+        self.builder = TextIndexBuilder(['keyword', 'plot'])
+        self.builder.add('keyword', 2, [u"time-travel"])
+        self.builder.add('keyword', 0, [u"time-travel", u"robot"])
+        self.builder.add('plot', 0, [u"space", u"station"])
+        self.builder.add('plot', 1, [u"space"])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @unittest.skipIf(sys.version_info < (3, 3), "the text index needs python 3.3+")
+    def test_write_open(self):
+        index = self.builder.write(self.filename)
+        try:
+            self.assertEqual(index.postings('keyword', u"time-travel"), [0, 2])
+            self.assertEqual(index.count('plot', u"space"), 2)
+            self.assertEqual(index.search(all_terms=[('plot', u"space"), ('keyword', u"robot")]), [0])
+            self.assertEqual(index.postings('plot', u"missing"), [])
+        finally:
+            index.close()
+
+    @unittest.skipIf(sys.version_info >= (3, 3), "the text index needs python 3.3+")
+    def test_old_python(self):
+        self.assertRaises(RuntimeError, self.builder.write, self.filename)
+
+
+if __name__ == '__main__':
+    unittest.main()